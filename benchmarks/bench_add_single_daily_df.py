@@ -0,0 +1,43 @@
+"""
+add_single_daily_df의 하루치 추가 비용이 전체 기간에 따라 어떻게 변하는지 측정한다.
+append 경로(마지막 일자 이후 추가)와 기존 방식(concat 후 전체 재설정)을 비교한다.
+
+실행: PYTHONPATH=src python benchmarks/bench_add_single_daily_df.py
+"""
+import time
+import pandas as pd
+
+from mydatahandler import StockDataHandler
+from synthetic import make_history, make_daily_df
+
+N_SYMBOLS = 2700
+N_APPENDS = 20
+
+def bench(n_days: int, engine: str = 'frame'):
+    history = make_history(n_days, N_SYMBOLS)
+    next_dates = pd.bdate_range(history['일자'].max() + pd.Timedelta(days=1), periods=N_APPENDS)
+    daily_dfs = [make_daily_df(date, N_SYMBOLS, seed=n_days + i) for i, date in enumerate(next_dates)]
+
+    # append 경로
+    dh = StockDataHandler(history, engine=engine)
+    start = time.perf_counter()
+    for daily_df in daily_dfs:
+        dh.add_single_daily_df(daily_df)
+    append_ms = (time.perf_counter() - start) / N_APPENDS * 1000
+
+    # 기존 방식: 전체 concat 후 set_data (복사 + 정렬)
+    dh = StockDataHandler(history, engine=engine)
+    start = time.perf_counter()
+    for daily_df in daily_dfs:
+        daily_df = dh._convert_index_to_primary_keys(daily_df)
+        dh.df = pd.concat([dh.df, daily_df])
+        dh._sort_df()
+    merge_ms = (time.perf_counter() - start) / N_APPENDS * 1000
+    return append_ms, merge_ms
+
+if __name__ == '__main__':
+    print(f"{'engine':>6} {'days':>6} {'rows':>10} {'append(ms/day)':>15} {'concat+sort(ms/day)':>20}")
+    for engine in ['frame', 'panel']:
+        for n_days in [250, 500, 1000, 2000]:
+            append_ms, merge_ms = bench(n_days, engine)
+            print(f"{engine:>6} {n_days:>6} {n_days * N_SYMBOLS:>10,} {append_ms:>15.2f} {merge_ms:>20.2f}")
@@ -0,0 +1,63 @@
+"""
+Arrow IPC memory map 로딩(load_arrow)과 기존 방식의 시작 시간과 메모리(RSS)를 비교한다.
+각 방식은 별도의 프로세스에서 측정한다.
+    RssAnon: 프로세스 전용 메모리 (다른 워커와 공유되지 않음)
+    RssFile: 파일 매핑 메모리 (page cache, 같은 파일을 여는 워커끼리 공유)
+리눅스의 /proc/self/status를 사용한다.
+
+실행: PYTHONPATH=src python benchmarks/bench_arrow_mmap.py [n_days]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+N_SYMBOLS = 2700
+
+def rss_kb() -> dict:
+    status = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('RssAnon', 'RssFile'):
+                status[key] = int(value.split()[0])
+    return status
+
+def run_loader(method: str, workdir: str):
+    # 자식 프로세스에서 실행
+    import pandas as pd
+    from mydatahandler import StockDataHandler
+    before = rss_kb()
+    start = time.perf_counter()
+    dh = StockDataHandler()
+    if method == 'feather+set_data':
+        dh.set_data(pd.read_feather(os.path.join(workdir, 'history.feather')))
+    elif method == 'parquet partitions':
+        dh.load(os.path.join(workdir, 'partitions'))
+    elif method == 'arrow mmap':
+        dh.load_arrow(os.path.join(workdir, 'history.arrow'))
+    dh.tdf  # 접근 가능한 상태까지
+    elapsed = time.perf_counter() - start
+    after = rss_kb()
+    print(f"{method:>20} {elapsed:>8.2f}s {(after['RssAnon'] - before['RssAnon']) / 1024:>12.1f} {(after['RssFile'] - before['RssFile']) / 1024:>12.1f}")
+
+def main(n_days: int):
+    from mydatahandler import StockDataHandler
+    from synthetic import make_history
+    with tempfile.TemporaryDirectory() as workdir:
+        dh = StockDataHandler(make_history(n_days, N_SYMBOLS))
+        dh.df.reset_index().to_feather(os.path.join(workdir, 'history.feather'))
+        dh.save(os.path.join(workdir, 'partitions'))
+        dh.save_arrow(os.path.join(workdir, 'history.arrow'))
+        del dh
+        print(f"rows={n_days * N_SYMBOLS:,}")
+        print(f"{'method':>20} {'time':>9} {'RssAnon(MB)':>12} {'RssFile(MB)':>12}")
+        for method in ['feather+set_data', 'parquet partitions', 'arrow mmap']:
+            subprocess.run([sys.executable, __file__, '--child', method, workdir], check=True)
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        run_loader(sys.argv[2], sys.argv[3])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,50 @@
+"""
+1년치(약 250거래일) 일별 시세 받아오기 비용을 측정한다. 요청마다 LATENCY초 걸리는 가짜 fetch를 사용한다.
+    sequential: 하루씩 fetch 후 add_single_daily_df
+    backfill: StockDataHandler.backfill_from_krx (스레드 WORKERS개, 초당 RATE회 제한, 체크포인트 저장 후 한 번에 합치기)
+    resume: 같은 체크포인트 디렉터리로 다시 실행 (요청 없이 체크포인트만 읽음)
+
+실행: PYTHONPATH=src python benchmarks/bench_backfill.py
+"""
+import tempfile
+import time
+import pandas as pd
+
+from mydatahandler import StockDataHandler
+from mydatahandler.handler.functions import TradingCalendar
+from synthetic import make_daily_df
+
+N_SYMBOLS = 2700
+LATENCY = 0.05
+WORKERS = 8
+RATE = 100.0
+START, END = '2023-01-02', '2023-12-29'
+
+def fake_fetch(date, market='ALL'):
+    time.sleep(LATENCY)
+    return make_daily_df(date, N_SYMBOLS, seed=date.dayofyear)
+
+if __name__ == '__main__':
+    calendar = TradingCalendar(pd.bdate_range(START, END), start=START, end=END)
+    sessions = calendar.sessions_between(START, END)
+
+    start = time.perf_counter()
+    dh = StockDataHandler()
+    for date in sessions:
+        dh.add_single_daily_df(fake_fetch(date))
+    sequential = time.perf_counter() - start
+
+    checkpoint_dir = tempfile.mkdtemp()
+    results = {}
+    for name in ['backfill', 'resume']:
+        start = time.perf_counter()
+        dh_backfill = StockDataHandler()
+        dh_backfill.backfill_from_krx(START, END, checkpoint_dir, fetch=fake_fetch, calendar=calendar,
+                                      max_workers=WORKERS, rate=RATE)
+        results[name] = time.perf_counter() - start
+        assert dh_backfill.df.equals(dh.df)
+
+    print(f"{len(sessions)} days, latency {LATENCY * 1000:.0f}ms")
+    print(f"{'sequential':>10}: {sequential:7.2f}s")
+    for name, elapsed in results.items():
+        print(f"{name:>10}: {elapsed:7.2f}s")
@@ -0,0 +1,42 @@
+"""
+dh.indicators와 groupby('종목코드').rolling(...)의 계산 시간을 비교한다.
+
+실행: PYTHONPATH=src python benchmarks/bench_indicators.py [n_days]
+"""
+import sys
+import time
+
+import pandas as pd
+
+from synthetic import make_daily_df, make_history
+from mydatahandler import StockDataHandler
+
+def timeit(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def bench(n_days: int):
+    dh = StockDataHandler(make_history(n_days))
+    df = dh.df
+    cases = [
+        ('sma', '종가', 20, lambda: df['종가'].groupby(level='종목코드').rolling(20).mean()),
+        ('returns', '종가', 5, lambda: df['종가'].groupby(level='종목코드').pct_change(5)),
+        ('max', '고가', 52, lambda: df['고가'].groupby(level='종목코드').rolling(52).max()),
+        ('sum', '거래대금', 20, lambda: df['거래대금'].groupby(level='종목코드').rolling(20).sum()),
+    ]
+    print(f"rows={len(df):,}")
+    print(f"{'indicator':>16} {'groupby':>9} {'engine':>9} {'cached':>9} {'append+1':>9}")
+    results = []
+    for name, column, window, groupby in cases:
+        t_groupby = timeit(groupby)
+        t_engine = timeit(lambda: dh.indicators.compute(name, column, window))
+        t_cached = timeit(lambda: dh.indicators.compute(name, column, window))
+        results.append([f"{name}({column},{window})", t_groupby, t_engine, t_cached])
+    dh.add_single_daily_df(make_daily_df(dh.last_date + pd.offsets.BDay(1), seed=n_days))
+    for (name, column, window, _), row in zip(cases, results):
+        row.append(timeit(lambda: dh.indicators.compute(name, column, window)))
+        print(f"{row[0]:>16} {row[1]:>8.3f}s {row[2]:>8.3f}s {row[3]:>8.4f}s {row[4]:>8.3f}s")
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
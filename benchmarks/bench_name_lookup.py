@@ -0,0 +1,34 @@
+"""
+종목명 -> 종목코드 조회 시간을 측정한다. (오늘 2,700종목, 5,000건)
+    scan: 기존 방식 (건마다 df['종목명'] == name 전체 비교)
+    dict: get_stock_symbol을 건마다 호출
+    batch: get_stock_symbols로 한 번에 조회
+
+실행: PYTHONPATH=src python benchmarks/bench_name_lookup.py
+"""
+import time
+import numpy as np
+
+from synthetic import make_history
+from mydatahandler import StockDataHandler
+
+N_LOOKUPS = 5000
+
+def timeit(func, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == '__main__':
+    dh = StockDataHandler(make_history(2))
+    df = dh.sdh.df
+    names = list(np.random.default_rng(0).choice(df['종목명'].to_numpy(), N_LOOKUPS))
+
+    t_scan = timeit(lambda: [df[df['종목명'] == name].index[0] for name in names], repeat=1)
+    t_dict = timeit(lambda: [dh.get_stock_symbol(name) for name in names])
+    t_batch = timeit(lambda: dh.get_stock_symbols(names))
+    print(f"{'scan':>6} {'dict':>9} {'batch':>9}  ({N_LOOKUPS:,} lookups)")
+    print(f"{t_scan:>5.2f}s {t_dict * 1000:>7.2f}ms {t_batch * 1000:>7.2f}ms")
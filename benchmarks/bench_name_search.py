@@ -0,0 +1,42 @@
+"""
+일부 종목명 검색 시간을 측정한다. (2,700종목)
+    contains: 기존 방식 (df['종목명'].str.contains(query))
+    index: search_stocks (NameSearchIndex, 처음 한 번 인덱스를 만든 후)
+
+실행: PYTHONPATH=src python benchmarks/bench_name_search.py
+"""
+import random
+import time
+
+import pandas as pd
+
+from mydatahandler import SingledayDataHandler
+
+N_SYMBOLS = 2700
+
+def make_names(n: int, seed: int = 0) -> list:
+    random.seed(seed)
+    syllables = [chr(0xAC00 + random.randrange(11172)) for _ in range(300)]
+    return [''.join(random.choice(syllables) for _ in range(random.randint(2, 8))) for _ in range(n)]
+
+def per_query_us(func, queries, repeat: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            func(query)
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1e6
+
+if __name__ == '__main__':
+    names = make_names(N_SYMBOLS)
+    sdh = SingledayDataHandler()
+    sdh.set_data(pd.DataFrame({'종목코드': [f"{i:06d}" for i in range(N_SYMBOLS)], '종목명': names}))
+    queries = [names[i][:1] for i in range(5)] + [names[i][:2] for i in range(5)] + [names[i][1:3] for i in range(5)]
+    start = time.perf_counter()
+    sdh.search_stocks(queries[0])
+    build_ms = (time.perf_counter() - start) * 1000
+
+    t_contains = per_query_us(lambda q: sdh.df[sdh.df['종목명'].str.contains(q)].index.tolist(), queries, repeat=2)
+    t_index = per_query_us(sdh.search_stocks, queries)
+    print(f"build: {build_ms:.1f}ms")
+    print(f"{'contains':>10} {'index':>9}  (us/query)")
+    print(f"{t_contains:>10.0f} {t_index:>9.1f}")
@@ -0,0 +1,90 @@
+"""
+KRX 일별 시세 응답(전종목시세().fetch의 결과) 파싱 비용을 측정한다. (네트워크 없음)
+    legacy: 모든 칼럼에 df.apply(str.replace) 두 번 + 칼럼별 astype (이전 구현)
+    parse_krx_daily: 숫자 칼럼을 한 배열로 모아 한 번에 정리하고 pd.to_numeric으로 변환
+두 결과가 같은지도 확인한다. (compare)
+    값이 없는('', '-', NaN) 숫자 칸은 의도적으로 다르다. 이전 구현은 '-'에서 예외, NaN은 1이었고,
+    parse_krx_daily는 가격 칼럼 -1, 전일대비/변동률 0이다. 이런 칸은 값만 확인하고 해당 행은 비교에서 제외한다.
+    일자 칼럼의 단위: 이전 구현은 date의 단위(s, us 등)를 따랐고, parse_krx_daily는 항상 ns이다.
+
+실행: PYTHONPATH=src python benchmarks/bench_parse_krx.py [payload.pkl ...]
+    payload.pkl: 기록한 응답. 예) 전종목시세().fetch('20240102', 'ALL').to_pickle('payload.pkl')
+    주지 않으면 synthetic.make_krx_raw로 만든 2700종목 응답(값이 없는 칸이 있는 응답 포함)을 사용한다.
+"""
+import sys
+import time
+import pandas as pd
+
+from mydatahandler.handler.functions.crawler_krx import parse_krx_daily, KRX_COLUMNS
+from synthetic import make_krx_raw
+
+N_REPEAT = 20
+DATE = pd.Timestamp('2024-01-02')
+
+def legacy_parse(raw_df: pd.DataFrame, date: pd.Timestamp) -> pd.DataFrame:
+    df = raw_df.copy()
+    df.columns = KRX_COLUMNS
+    df = df.fillna({'종목코드': '', '표준코드': '', '종목명': '', '마켓구분': '', '섹터구분': '',
+                    '종가': '-1', '변동코드': '-1', '전일대비': '0', '변동률': '0',
+                    '시가': '-1', '고가': '-1', '저가': '-1', '거래량': '-1', '거래대금': '-1',
+                    '시가총액': '-1', '상장주식수': '-1', '시장ID': ''})
+    df = df.apply(lambda x: x.str.replace('[, ]', '', regex=True) if x.dtype == "object" else x)
+    col_to_apply = [col for col in df.columns if not col in ['전일대비', '변동률']]
+    df[col_to_apply] = df[col_to_apply].apply(lambda x: x.str.replace(r'[\-]', '', regex=True) if x.dtype == "object" else x)
+    if (df['전일대비'] == '-').all():
+        return pd.DataFrame(columns=['일자'] + KRX_COLUMNS)
+    for col in ['종가', '전일대비', '시가', '고가', '저가', '거래량', '거래대금', '시가총액', '상장주식수']:
+        df[col] = df[col].astype('int64')
+    df['기준가'] = df['종가'] - df['전일대비']
+    df['변동률'] = df['변동률'].astype('float64') / 100
+    df['일자'] = pd.to_datetime(date).normalize()
+    return df[['일자'] + [col for col in df.columns if col != '일자']]
+
+PRICE_COLUMNS = ['종가', '전일대비', '시가', '고가', '저가', '거래량', '거래대금', '시가총액', '상장주식수', '변동률']
+SENTINELS = {col: (0 if col in ('전일대비', '변동률') else -1) for col in PRICE_COLUMNS}
+
+def compare(payload: pd.DataFrame):
+    result = parse_krx_daily(payload, DATE)
+    if result.empty:
+        assert legacy_parse(payload, DATE).empty
+        return
+    df = payload.copy(deep=False)
+    df.columns = KRX_COLUMNS
+    text = df[PRICE_COLUMNS].apply(lambda x: x.str.replace(r'[, ]', '', regex=True))
+    missing = text.isna() | text.isin(['', '-'])
+    for col in PRICE_COLUMNS:
+        assert (result.loc[missing[col], col] == SENTINELS[col]).all(), col
+    rows = missing.any(axis=1).to_numpy()
+    if (~rows).any():
+        expected = legacy_parse(payload[~rows], DATE)
+        expected['일자'] = expected['일자'].astype('datetime64[ns]')
+        pd.testing.assert_frame_equal(result[~rows], expected)
+
+def _legacy_parsable(payload: pd.DataFrame) -> bool:
+    try:
+        legacy_parse(payload, DATE)
+    except ValueError:
+        return False
+    return True
+
+def timeit(func, payloads) -> float:
+    start = time.perf_counter()
+    for _ in range(N_REPEAT):
+        for payload in payloads:
+            func(payload, DATE)
+    return (time.perf_counter() - start) / (N_REPEAT * len(payloads)) * 1000
+
+if __name__ == '__main__':
+    paths = sys.argv[1:]
+    payloads = [pd.read_pickle(path) for path in paths] if paths else \
+        [make_krx_raw(2700, seed=i, missing=i % 2 == 1) for i in range(5)]
+    for payload in payloads:
+        compare(payload)
+
+    # 이전 구현은 '-'인 가격 칸에서 예외가 나므로, 시간은 이전 구현이 처리할 수 있는 응답으로만 잰다.
+    payloads = [payload for payload in payloads if _legacy_parsable(payload)]
+    legacy_ms = timeit(legacy_parse, payloads)
+    new_ms = timeit(parse_krx_daily, payloads)
+    print(f"{len(payloads)} payloads x {len(payloads[0])} rows")
+    print(f"{'legacy':>16}: {legacy_ms:8.2f} ms/day")
+    print(f"{'parse_krx_daily':>16}: {new_ms:8.2f} ms/day ({legacy_ms / new_ms:.1f}x)")
@@ -0,0 +1,45 @@
+"""
+remove_unnecessary_symbols(df_filtered)의 시간을 측정한다.
+    scan: 기존 방식 (reset_index + 행마다 정규식/문자열 검사 + set_index)
+    cached: SymbolEligibility (유일한 값별 검사 결과를 codes로 모음, 인덱스는 그대로)
+    compact: compact() 후 (종목명, 시장ID가 category이므로 factorize도 하지 않음)
+
+실행: PYTHONPATH=src python benchmarks/bench_remove_unnecessary.py
+"""
+import time
+import pandas as pd
+
+from synthetic import make_history
+from mydatahandler import StockDataHandler
+from mydatahandler.handler.functions import remove_unnecessary_symbols
+
+def scan_remove(df: pd.DataFrame) -> pd.DataFrame:
+    index_names = df.index.names
+    df = df.reset_index(drop=False)
+    df = df[
+        ~df['종목명'].str.contains(r'\d+호$') &
+        ~df['종목명'].str.contains('스팩') &
+        df['종목코드'].str.endswith('0')
+    ]
+    df = df[df['시장ID'].str.contains('STK|KSQ')]
+    return df.set_index(index_names, drop=True)
+
+def timeit(func, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == '__main__':
+    print(f"{'days':>6} {'rows':>10} {'scan':>9} {'cached':>9} {'compact':>9}")
+    for n_days in (100, 500, 1000):
+        dh = StockDataHandler(make_history(n_days))
+        df = dh.df
+        t_scan = timeit(lambda: scan_remove(df))
+        t_cached = timeit(lambda: remove_unnecessary_symbols(df))
+        dh.compact()
+        compact_df = dh.df
+        t_compact = timeit(lambda: remove_unnecessary_symbols(compact_df))
+        print(f"{n_days:>6} {len(df):>10,} {t_scan:>8.3f}s {t_cached:>8.3f}s {t_compact:>8.3f}s")
@@ -0,0 +1,47 @@
+"""
+최근 700일만 유지하면서 하루치를 계속 추가하는 비용을 측정한다.
+    recent: StockDataHandler.add_single_daily_df 후 set_as_recent_df(700)
+    rolling: RollingWindowStockDataHandler(days=700).add_single_daily_df
+rolling은 slack(175)번의 append마다 한 번 배열을 옮기므로 최대값도 함께 출력한다.
+mem(MB)은 append가 끝난 후 panel 배열의 크기이다.
+
+실행: PYTHONPATH=src python benchmarks/bench_rolling_window.py
+"""
+import time
+import pandas as pd
+
+from mydatahandler import StockDataHandler, RollingWindowStockDataHandler
+from synthetic import make_history, make_daily_df
+
+N_SYMBOLS = 2700
+DAYS = 700
+N_APPENDS = 200
+
+def run(dh, daily_dfs, trim: bool):
+    times = []
+    for daily_df in daily_dfs:
+        start = time.perf_counter()
+        dh.add_single_daily_df(daily_df)
+        if trim:
+            dh.set_as_recent_df(DAYS)
+        times.append(time.perf_counter() - start)
+    return sum(times) / len(times) * 1000, max(times) * 1000
+
+def panel_mb(dh) -> float:
+    panel = dh._panel
+    return (panel._mask.nbytes + sum(arr.nbytes for arr in panel._values.values())) / 2**20
+
+if __name__ == '__main__':
+    history = make_history(DAYS, N_SYMBOLS)
+    next_dates = pd.bdate_range(history['일자'].max() + pd.Timedelta(days=1), periods=N_APPENDS)
+    daily_dfs = [make_daily_df(date, N_SYMBOLS, seed=DAYS + i) for i, date in enumerate(next_dates)]
+
+    print(f"{'handler':>8} {'mean(ms/day)':>13} {'max(ms)':>9} {'mem(MB)':>8}")
+    for name, dh, trim in [
+        ('recent', StockDataHandler(history), True),
+        ('rolling', RollingWindowStockDataHandler(history, days=DAYS), False),
+    ]:
+        mean_ms, max_ms = run(dh, daily_dfs, trim)
+        mem = f"{panel_mb(dh):.0f}" if dh._panel is not None else '-'
+        assert len(dh.date_list) == DAYS
+        print(f"{name:>8} {mean_ms:>13.2f} {max_ms:>9.1f} {mem:>8}")
@@ -0,0 +1,80 @@
+"""
+update_df_with_another_df의 장중 갱신(오늘 ~2,700행의 종가/고가/저가/거래량) 시간을 이력 길이별로 측정한다.
+    label: 기존 방식 (정렬 + intersection/difference + .loc 대입 + 정렬)
+    positional: update_df_positional (일자 구간 안에서 get_indexer 후 위치로 대입, 갱신 칼럼만 복사)
+    inplace: update_df_positional(inplace=True) (복사 없이 직접 대입)
+    handler: StockDataHandler.update_df_with_another_df (기본. 갱신 칼럼만 복사)
+    handler_inplace: StockDataHandler.update_df_with_another_df(inplace=True) (직접 대입)
+upsert_df_with_similar_df로 10년치 이력에 1일, 20일, 1년치 데이터를 upsert하는 시간을 측정한다.
+    concat: 기존 방식 (copy + intersection + drop + concat + 전체 정렬)
+    merge: merge_upsert_df (정렬 병합)
+    skip: merge_upsert_df(skip_unchanged=True). 절반은 기존과 같은 값이다.
+
+실행: PYTHONPATH=src python benchmarks/bench_update_upsert.py
+"""
+import time
+import warnings
+
+import pandas as pd
+
+from synthetic import make_history
+from mydatahandler import StockDataHandler
+from mydatahandler.handler.functions import update_df_positional, merge_upsert_df
+
+def label_update(df: pd.DataFrame, another_df: pd.DataFrame) -> pd.DataFrame:
+    df = df.sort_index()
+    another_df = another_df.sort_index()
+    common_columns = list(set(df.columns).intersection(another_df.columns))
+    valid_index = another_df.index.intersection(df.index)
+    another_df.index.difference(df.index)
+    df.loc[valid_index, common_columns] = another_df.loc[valid_index, common_columns]
+    return df.sort_index()
+
+def concat_upsert(df: pd.DataFrame, similar_df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    common_indices = df.index.intersection(similar_df.index)
+    df = pd.concat([df.drop(common_indices), similar_df])
+    return df.sort_index()
+
+def timeit(func, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_update(n_days_list=(100, 500, 1000)):
+    print(f"{'days':>6} {'rows':>10} {'label':>9} {'positional':>11} {'inplace':>9} {'handler':>9} {'handler_inplace':>16}")
+    for n_days in n_days_list:
+        dh = StockDataHandler(make_history(n_days))
+        df = dh.df
+        intraday = dh.df_today[['종가', '고가', '저가', '거래량']] + 1
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            t_label = timeit(lambda: label_update(df, intraday))
+        t_positional = timeit(lambda: update_df_positional(df, intraday))
+        t_inplace = timeit(lambda: update_df_positional(df, intraday, inplace=True))
+        t_handler = timeit(lambda: dh.update_df_with_another_df(intraday))
+        t_handler_inplace = timeit(lambda: dh.update_df_with_another_df(intraday, inplace=True))
+        print(f"{n_days:>6} {len(df):>10,} {t_label:>8.3f}s {t_positional:>10.4f}s {t_inplace:>8.4f}s "
+              f"{t_handler:>8.4f}s {t_handler_inplace:>15.4f}s")
+
+def bench_upsert(history_days: int = 2500, upsert_days_list=(1, 20, 250)):
+    df = StockDataHandler(make_history(history_days)).df
+    dates = df.index.get_level_values('일자').unique()
+    print(f"history: {history_days} days, {len(df):,} rows")
+    print(f"{'days':>6} {'rows':>10} {'concat':>9} {'merge':>9} {'skip':>9}")
+    for n_days in upsert_days_list:
+        # 기존 마지막 n_days 중 절반 일자는 값을 바꾸고, 나머지 일자는 같은 값으로 다시 넣는다.
+        similar_df = df.loc[dates[-n_days]:].copy()
+        changed = similar_df.index.get_level_values('일자') >= dates[-n_days // 2 - 1]
+        similar_df.loc[changed, '종가'] += 1
+        t_concat = timeit(lambda: concat_upsert(df, similar_df), repeat=2)
+        t_merge = timeit(lambda: merge_upsert_df(df, similar_df), repeat=2)
+        t_skip = timeit(lambda: merge_upsert_df(df, similar_df, skip_unchanged=True), repeat=2)
+        print(f"{n_days:>6} {len(similar_df):>10,} {t_concat:>8.3f}s {t_merge:>8.3f}s {t_skip:>8.3f}s")
+
+if __name__ == '__main__':
+    bench_update()
+    bench_upsert()
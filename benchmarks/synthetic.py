@@ -0,0 +1,78 @@
+"""
+벤치마크용 가상 주가 데이터 생성
+"""
+import numpy as np
+import pandas as pd
+
+def make_daily_df(date, n_symbols: int = 2700, seed: int = 0) -> pd.DataFrame:
+    """
+    하루치 가상 데이터 (칼럼에 '일자', '종목코드' 포함)
+    """
+    rng = np.random.default_rng(seed)
+    close = rng.integers(1_000, 500_000, n_symbols)
+    symbols = [f"{i:06d}" for i in range(0, n_symbols * 10, 10)]
+    return pd.DataFrame({
+        '일자': pd.Timestamp(date).normalize(),
+        '종목코드': symbols,
+        '종목명': [f"종목{s}" for s in symbols],
+        '시장ID': np.where(np.arange(n_symbols) % 2 == 0, 'STK', 'KSQ'),
+        '종가': close,
+        '전일대비': rng.integers(-1_000, 1_000, n_symbols),
+        '변동률': rng.normal(0, 0.02, n_symbols),
+        '시가': close - 10,
+        '고가': close + 100,
+        '저가': close - 100,
+        '거래량': rng.integers(0, 10_000_000, n_symbols),
+        '거래대금': rng.integers(0, 100_000_000_000, n_symbols),
+    })
+
+def make_history(n_days: int, n_symbols: int = 2700, start: str = '2015-01-02') -> pd.DataFrame:
+    """
+    n_days 영업일치 가상 데이터
+    """
+    dates = pd.bdate_range(start, periods=n_days)
+    return pd.concat([make_daily_df(date, n_symbols, seed=i) for i, date in enumerate(dates)], ignore_index=True)
+
+KRX_RAW_COLUMNS = [
+    'ISU_SRT_CD', 'ISU_CD', 'ISU_ABBRV', 'MKT_NM', 'SECT_TP_NM', 'TDD_CLSPRC', 'FLUC_TP_CD', 'CMPPREVDD_PRC', 'FLUC_RT',
+    'TDD_OPNPRC', 'TDD_HGPRC', 'TDD_LWPRC', 'ACC_TRDVOL', 'ACC_TRDVAL', 'MKTCAP', 'LIST_SHRS', 'MKT_ID',
+]
+
+def make_krx_raw(n_symbols: int = 2700, seed: int = 0, missing: bool = False) -> pd.DataFrame:
+    """
+    전종목시세().fetch 형식의 가상 응답 (모든 값이 쉼표가 들어간 문자열)
+    missing: True이면 일부 종목에 값이 없는 경우를 넣는다. (관리구분 NaN, 거래정지 종목의 시가/고가/저가 '-', 거래대금 NaN)
+    """
+    rng = np.random.default_rng(seed)
+    close = rng.integers(1_000, 500_000, n_symbols)
+    change = rng.integers(-1_000, 1_000, n_symbols)
+    shares = rng.integers(1_000_000, 100_000_000, n_symbols)
+    volume = rng.integers(0, 10_000_000, n_symbols)
+    fmt = lambda values: [f"{v:,}" for v in values]
+    symbols = [f"{i:06d}" for i in range(0, n_symbols * 10, 10)]
+    market = np.where(np.arange(n_symbols) % 3 == 0, 'KOSDAQ GLOBAL', np.where(np.arange(n_symbols) % 2 == 0, 'KOSPI', 'KOSDAQ'))
+    raw = pd.DataFrame(dict(zip(KRX_RAW_COLUMNS, [
+        symbols,
+        [f"KR7{s}003" for s in symbols],
+        [f"종목 {s}" for s in symbols],
+        market,
+        np.where(np.arange(n_symbols) % 50 == 0, '관리종목(소속부없음)', '-'),
+        fmt(close),
+        np.where(change > 0, '1', np.where(change < 0, '2', '3')),
+        fmt(change),
+        [f"{v:.2f}" for v in change / close * 100],
+        fmt(close - 10),
+        fmt(close + 100),
+        fmt(close - 100),
+        fmt(volume),
+        fmt(volume * close),
+        fmt(close * shares),
+        fmt(shares),
+        np.where(market == 'KOSPI', 'STK', 'KSQ'),
+    ])))
+    if missing:
+        raw.loc[raw.index % 7 == 0, 'SECT_TP_NM'] = np.nan
+        halted = raw.index % 97 == 1
+        raw.loc[halted, ['TDD_OPNPRC', 'TDD_HGPRC', 'TDD_LWPRC']] = '-'
+        raw.loc[halted, 'ACC_TRDVAL'] = np.nan
+    return raw
@@ -1,3 +1,3 @@
-from .handler.stock_data_handler import StockDataHandler
+from .handler.stock_data_handler import StockDataHandler, RollingWindowStockDataHandler
 from .handler.singleday_data_handler import SingledayDataHandler
 from .handler.functions import remove_unnecessary_symbols, get_recent_df, update_df_with_another_df, upsert_df_with_similar_df, fetch_recent_usable_stock_prices_from_krx
\ No newline at end of file
@@ -0,0 +1,379 @@
+import copy
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+"""
+일자 x 종목코드의 2차원 NumPy 배열로 데이터를 보관하는 저장소
+StockDataHandler(engine='panel')에서 사용한다.
+.dates: 정렬된 일자 배열 (datetime64[ns])
+.symbols: 정렬된 종목코드 배열
+.values: {칼럼명: (일자, 종목코드) 2차원 배열}
+.mask: (일자, 종목코드) 위치에 데이터가 존재하는지 여부
+"""
+
+class DensePanel:
+    def __init__(
+        self,
+        dates: np.ndarray,
+        symbols: np.ndarray,
+        values: Dict[str, np.ndarray],
+        mask: np.ndarray,
+        dtypes: Dict[str, object],
+        date_col_name: str = '일자',
+        symbol_col_name: str = '종목코드',
+    ):
+        # 일자 축은 append_date를 위해 여유 공간(capacity)을 두고, _start부터 _n개 행만 사용한다.
+        self._dates = np.asarray(dates, dtype='datetime64[ns]')
+        self._mask = mask
+        self._values = values
+        self._start = 0
+        self._n = len(self._dates)
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.dtypes = dtypes  # 프레임으로 복원할 때 사용할 칼럼별 원래 dtype
+        self.date_col_name = date_col_name
+        self.symbol_col_name = symbol_col_name
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, date_col_name: str = '일자', symbol_col_name: str = '종목코드') -> 'DensePanel':
+        """
+        [일자, 종목코드] 멀티인덱스를 가지는 df로부터 DensePanel을 만든다.
+        인덱스는 중복이 없어야 한다.
+        """
+        index = df.index
+        if not isinstance(index, pd.MultiIndex):
+            raise ValueError("df must have a MultiIndex of [일자, 종목코드].")
+        dates, date_codes = cls._sorted_level(index, date_col_name)
+        symbols, symbol_codes = cls._sorted_level(index, symbol_col_name)
+        shape = (len(dates), len(symbols))
+
+        mask = np.zeros(shape, dtype=bool)
+        mask[date_codes, symbol_codes] = True
+        if mask.sum() != len(df):
+            raise ValueError("df has duplicated [일자, 종목코드] index.")
+
+        values = {}
+        dtypes = {}
+        for col in df.columns:
+            series = df[col]
+            dtypes[col] = series.dtype
+            arr = cls._empty(series.dtype, shape)
+            arr[date_codes, symbol_codes] = series.to_numpy(dtype=arr.dtype)
+            values[col] = arr
+        return cls(
+            dates=dates.to_numpy(dtype='datetime64[ns]'),
+            symbols=symbols.to_numpy(dtype=object),
+            values=values,
+            mask=mask,
+            dtypes=dtypes,
+            date_col_name=date_col_name,
+            symbol_col_name=symbol_col_name,
+        )
+
+    @staticmethod
+    def _sorted_level(index: pd.MultiIndex, name: str):
+        # 사용하지 않는 레벨 값을 제거하고, 레벨을 정렬한 뒤 codes를 다시 매긴다.
+        level_num = index.names.index(name)
+        level = index.levels[level_num]
+        codes = np.asarray(index.codes[level_num])
+        used = np.zeros(len(level), dtype=bool)
+        used[codes] = True
+        order = np.flatnonzero(used)[level[used].argsort(kind='stable')]
+        rank = np.full(len(level), -1, dtype=np.intp)
+        rank[order] = np.arange(len(order))
+        return level[order], rank[codes]
+
+    @staticmethod
+    def _fill_value(dtype: np.dtype):
+        # 데이터가 없는 위치에 채울 값
+        if dtype.kind in 'biu':
+            return 0
+        if dtype.kind in 'fc':
+            return np.nan
+        if dtype.kind in 'mM':
+            return np.datetime64('NaT')
+        return None
+    @classmethod
+    def _empty(cls, dtype, shape) -> np.ndarray:
+        # 숫자형은 같은 dtype의 배열로, 나머지는 object 배열로 보관한다.
+        if not (isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM'):
+            dtype = np.dtype(object)
+        return np.full(shape, cls._fill_value(dtype), dtype=dtype)
+
+    """
+    기본 정보
+    """
+    @property
+    def _rows(self) -> slice:
+        # 사용 중인 행 구간
+        return slice(self._start, self._start + self._n)
+    @property
+    def dates(self) -> np.ndarray:
+        return self._dates[self._rows]
+    @property
+    def mask(self) -> np.ndarray:
+        return self._mask[self._rows]
+    @property
+    def values(self) -> Dict[str, np.ndarray]:
+        rows = self._rows
+        return {col: arr[rows] for col, arr in self._values.items()}
+    @property
+    def columns(self) -> List[str]:
+        return list(self._values.keys())
+    @property
+    def n_dates(self) -> int:
+        return len(self.dates)
+    @property
+    def empty(self) -> bool:
+        return not self.mask.any()
+    def date_index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.dates, name=self.date_col_name)
+    def symbol_index(self) -> pd.Index:
+        return pd.Index(self.symbols, name=self.symbol_col_name, dtype=object)
+
+    def date_loc(self, date: pd.Timestamp) -> int:
+        """
+        date의 행 위치를 반환한다. 없으면 KeyError
+        """
+        date = np.datetime64(pd.Timestamp(date).normalize(), 'ns')
+        pos = int(np.searchsorted(self.dates, date))
+        if pos >= len(self.dates) or self.dates[pos] != date:
+            raise KeyError(date)
+        return pos
+    def symbol_loc(self, symbol: str) -> int:
+        """
+        symbol의 열 위치를 반환한다. 없으면 KeyError
+        """
+        pos = int(np.searchsorted(self.symbols, symbol))
+        if pos >= len(self.symbols) or self.symbols[pos] != symbol:
+            raise KeyError(symbol)
+        return pos
+    def date_slice(self, from_date: pd.Timestamp = None, to_date: pd.Timestamp = None,
+                   include_from: bool = True, include_to: bool = True) -> slice:
+        """
+        from_date ~ to_date 범위에 해당하는 행의 slice를 이진탐색으로 구한다.
+        """
+        start, stop = 0, len(self.dates)
+        if from_date is not None:
+            from_date = np.datetime64(pd.Timestamp(from_date).normalize(), 'ns')
+            start = int(np.searchsorted(self.dates, from_date, side='left' if include_from else 'right'))
+        if to_date is not None:
+            to_date = np.datetime64(pd.Timestamp(to_date).normalize(), 'ns')
+            stop = int(np.searchsorted(self.dates, to_date, side='right' if include_to else 'left'))
+        return slice(start, max(start, stop))
+
+    def view(self) -> 'DensePanel':
+        """
+        현재까지의 일자만 보이는 얕은 복사본 (스냅샷용)
+        append_date는 사용 중인 행 구간(_start, _n) 이후의 행에만 쓰고, 종목 추가/dtype 변경은 새 배열을 만들므로
+        이후의 변경은 복사본에 보이지 않는다.
+        """
+        view = copy.copy(self)
+        view._values = dict(self._values)
+        view.dtypes = dict(self.dtypes)
+        return view
+
+    def take_dates(self, rows: slice) -> 'DensePanel':
+        """
+        rows 구간의 일자만 복사하여 새 DensePanel을 만든다.
+        """
+        return DensePanel(
+            dates=self.dates[rows].copy(),
+            symbols=self.symbols,
+            values={col: arr[rows].copy() for col, arr in self.values.items()},
+            mask=self.mask[rows].copy(),
+            dtypes=dict(self.dtypes),
+            date_col_name=self.date_col_name,
+            symbol_col_name=self.symbol_col_name,
+        )
+
+    """
+    DataFrame으로 변환
+    """
+    def _column(self, col: str, values: np.ndarray) -> np.ndarray:
+        # 원래 dtype으로 복원
+        dtype = self.dtypes[col]
+        if isinstance(dtype, np.dtype) and values.dtype == dtype:
+            return values
+        return pd.array(values, dtype=dtype)
+
+    def to_frame(self, rows: slice = slice(None), columns: List[str] = None, symbol_positions: np.ndarray = None) -> pd.DataFrame:
+        """
+        rows에 해당하는 일자들의 데이터를 [일자, 종목코드] 멀티인덱스 DataFrame으로 반환한다.
+        columns: 주어지면 해당 칼럼만 만든다.
+        symbol_positions: 주어지면 해당 종목(self.symbols의 정렬된 위치)만 만든다.
+        """
+        columns = self.columns if columns is None else list(columns)
+        sub_mask = self.mask[rows]
+        if symbol_positions is None:
+            date_pos, symbol_pos = np.nonzero(sub_mask)
+        else:
+            date_pos, k = np.nonzero(sub_mask[:, symbol_positions])
+            symbol_pos = np.asarray(symbol_positions)[k]
+        index = pd.MultiIndex(
+            levels=[self.date_index()[rows], self.symbol_index()],
+            codes=[date_pos, symbol_pos],
+            names=[self.date_col_name, self.symbol_col_name],
+            verify_integrity=False,
+        )
+        data = {col: self._column(col, self.values[col][rows][date_pos, symbol_pos]) for col in columns}
+        return pd.DataFrame(data, index=index, columns=columns)
+
+    def date_frame(self, pos: int, drop_level: bool = True) -> pd.DataFrame:
+        """
+        pos번째 일자의 데이터를 반환한다. (음수 가능)
+        drop_level=True이면 index='종목코드', False이면 [일자, 종목코드] 멀티인덱스
+        """
+        pos = range(len(self.dates))[pos]  # 음수 처리 및 IndexError
+        row_mask = self.mask[pos]
+        symbols = self.symbols[row_mask]
+        if drop_level:
+            index = pd.Index(symbols, name=self.symbol_col_name, dtype=object)
+        else:
+            index = pd.MultiIndex.from_arrays(
+                [np.repeat(self.dates[pos], len(symbols)), symbols],
+                names=[self.date_col_name, self.symbol_col_name],
+            )
+        data = {col: self._column(col, arr[pos, row_mask]) for col, arr in self.values.items()}
+        return pd.DataFrame(data, index=index, columns=self.columns)
+
+    def symbol_frame(self, symbol: str, drop_level: bool = True) -> pd.DataFrame:
+        """
+        symbol 종목의 전 일자 데이터를 반환한다.
+        drop_level=True이면 index='일자', False이면 [일자, 종목코드] 멀티인덱스
+        """
+        pos = self.symbol_loc(symbol)
+        col_mask = self.mask[:, pos]
+        dates = self.dates[col_mask]
+        if drop_level:
+            index = pd.DatetimeIndex(dates, name=self.date_col_name)
+        else:
+            index = pd.MultiIndex.from_arrays(
+                [dates, np.repeat(np.asarray([symbol], dtype=object), len(dates))],
+                names=[self.date_col_name, self.symbol_col_name],
+            )
+        data = {col: self._column(col, arr[col_mask, pos]) for col, arr in self.values.items()}
+        return pd.DataFrame(data, index=index, columns=self.columns)
+
+    def symbols_frame(self, symbols: List[str]) -> pd.DataFrame:
+        """
+        symbols 종목들의 전 일자 데이터를 [일자, 종목코드] 멀티인덱스 DataFrame으로 반환한다.
+        .loc[idx[:, symbols], :]와 동일하게 종목 순서대로, 종목 안에서는 일자 순으로 정렬된다.
+        존재하지 않는 종목이 있으면 KeyError
+        """
+        positions = np.asarray(list(dict.fromkeys(self.symbol_loc(symbol) for symbol in symbols)), dtype=np.intp)
+        k, date_pos = np.nonzero(self.mask[:, positions].T)
+        symbol_pos = positions[k]
+        index = pd.MultiIndex(
+            levels=[self.date_index(), self.symbol_index()],
+            codes=[date_pos, symbol_pos],
+            names=[self.date_col_name, self.symbol_col_name],
+            verify_integrity=False,
+        )
+        data = {col: self._column(col, arr[date_pos, symbol_pos]) for col, arr in self.values.items()}
+        return pd.DataFrame(data, index=index, columns=self.columns)
+
+    def symbols_of_date(self, pos: int) -> List[str]:
+        """
+        pos번째 일자에 존재하는 종목코드 리스트
+        """
+        return self.symbols[self.mask[pos]].tolist()
+    def all_symbols(self) -> List[str]:
+        """
+        한 번이라도 데이터가 존재하는 종목코드 리스트
+        멀티인덱스의 get_level_values().unique()와 같이 처음 등장한 순서를 따른다.
+        """
+        present = np.flatnonzero(self.mask.any(axis=0))
+        first_pos = self.mask[:, present].argmax(axis=0)
+        return self.symbols[present[np.argsort(first_pos, kind='stable')]].tolist()
+
+    """
+    데이터 추가
+    """
+    def can_append(self, daily_df: pd.DataFrame) -> bool:
+        """
+        daily_df를 append_date로 추가할 수 있는지 확인한다. 
+        칼럼 구성과 dtype이 기존과 동일해야 한다.
+        """
+        if set(daily_df.columns) != set(self._values.keys()):
+            return False
+        return all(daily_df[col].dtype == dtype for col, dtype in self.dtypes.items())
+
+    def append_date(self, date: pd.Timestamp, daily_df: pd.DataFrame):
+        """
+        마지막 일자 이후의 하루치 데이터를 추가한다. 
+        기존 배열은 다시 만들지 않고, 여유 공간이 없는 경우에만 두 배로 늘린다.
+        daily_df: index='종목코드', columns=self.columns
+        """
+        date = np.datetime64(pd.Timestamp(date).normalize(), 'ns')
+        if self._n and date <= self.dates[-1]:
+            raise ValueError(f"date {date} must be later than the last date.")
+        if self._start + self._n == len(self._dates):
+            self._grow()
+        symbols = daily_df.index.to_numpy(dtype=object)
+        positions = np.searchsorted(self.symbols, symbols)
+        found = positions < len(self.symbols)
+        found[found] = self.symbols[positions[found]] == symbols[found]
+        if not found.all():
+            self._add_symbols(symbols[~found])
+            positions = np.searchsorted(self.symbols, symbols)
+
+        row = self._start + self._n
+        self._dates[row] = date
+        self._mask[row] = False
+        self._mask[row, positions] = True
+        for col, arr in self._values.items():
+            arr[row] = self._fill_value(arr.dtype)
+            arr[row, positions] = daily_df[col].to_numpy(dtype=arr.dtype)
+        self._n += 1
+
+    def set_dtype(self, col: str, dtype):
+        """
+        칼럼의 dtype을 바꾼다. (예: category에 새로운 값 추가, int32 -> int64)
+        """
+        arr = self._values[col]
+        new_dtype = self._empty(dtype, (0, 0)).dtype
+        if new_dtype != arr.dtype:
+            self._values[col] = arr.astype(new_dtype)
+        self.dtypes[col] = dtype
+
+    def _grow(self):
+        # 일자 축의 여유 공간을 두 배로 늘린다.
+        self._reallocate(max(2 * self._n, 16))
+
+    def _reallocate(self, capacity: int, symbol_positions: np.ndarray = None):
+        """
+        일자 축이 capacity인 새 배열을 만들어 사용 중인 행들을 앞쪽으로 옮긴다.
+        symbol_positions: 주어지면 해당 종목(열)만 남긴다.
+        """
+        rows = self._rows
+        symbols = self.symbols if symbol_positions is None else self.symbols[symbol_positions]
+        columns = slice(None) if symbol_positions is None else symbol_positions
+        dates = np.full(capacity, np.datetime64('NaT'), dtype='datetime64[ns]')
+        dates[:self._n] = self._dates[rows]
+        mask = np.zeros((capacity, len(symbols)), dtype=bool)
+        mask[:self._n] = self._mask[rows][:, columns]
+        values = {}
+        for col, arr in self._values.items():
+            new_arr = self._empty(arr.dtype, (capacity, len(symbols)))
+            new_arr[:self._n] = arr[rows][:, columns]
+            values[col] = new_arr
+        self.symbols, self._dates, self._mask, self._values = symbols, dates, mask, values
+        self._start = 0
+
+    def _add_symbols(self, new_symbols: np.ndarray):
+        # 새로운 종목코드를 정렬된 위치에 추가한다. (새 배열을 할당)
+        symbols = np.unique(np.concatenate([self.symbols, new_symbols]).astype(object))
+        old_positions = np.searchsorted(symbols, self.symbols)
+        capacity, rows, n = len(self._dates), self._rows, self._n
+        dates = np.full(capacity, np.datetime64('NaT'), dtype='datetime64[ns]')
+        dates[:n] = self._dates[rows]
+        mask = np.zeros((capacity, len(symbols)), dtype=bool)
+        mask[:n, old_positions] = self._mask[rows]
+        values = {}
+        for col, arr in self._values.items():
+            new_arr = self._empty(arr.dtype, (capacity, len(symbols)))
+            new_arr[:n, old_positions] = arr[rows]
+            values[col] = new_arr
+        self.symbols, self._dates, self._mask, self._values = symbols, dates, mask, values
+        self._start = 0
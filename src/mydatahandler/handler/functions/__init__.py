@@ -1,4 +1,9 @@
-from mydatahandler.handler.functions.remove_unnecessary import remove_unnecessary_symbols
+from mydatahandler.handler.functions.remove_unnecessary import remove_unnecessary_symbols, necessary_symbols_mask, SymbolEligibility, symbol_eligibility
+from mydatahandler.handler.functions.date_slice import date_row_slice, recent_date_row_slice
 from mydatahandler.handler.functions.get_recent_df import get_recent_df
-from mydatahandler.handler.functions.update_upsert_df import update_df_with_another_df, upsert_df_with_similar_df
-from mydatahandler.handler.functions.crawler_krx import fetch_recent_usable_stock_prices_from_krx
\ No newline at end of file
+from mydatahandler.handler.functions.update_upsert_df import update_df_with_another_df, update_df_positional, upsert_df_with_similar_df, merge_upsert_df
+from mydatahandler.handler.functions.persistence import save_partitioned_df, load_partitioned_df, save_arrow_ipc, load_arrow_ipc
+from mydatahandler.handler.functions.compact_dtypes import compact_dtypes, compact_df, conform_dtypes
+from mydatahandler.handler.functions.trading_calendar import TradingCalendar, default_trading_calendar
+from mydatahandler.handler.functions.crawler_krx import fetch_recent_usable_stock_prices_from_krx
+from mydatahandler.handler.functions.backfill_krx import backfill_krx_daily, BackfillResult, CheckpointStore, TokenBucket
\ No newline at end of file
@@ -0,0 +1,226 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from mydatahandler.handler.functions.trading_calendar import TradingCalendar
+
+from mystockutil.logging.logging_setup import CustomAdapter, logger as original_logger
+logger = CustomAdapter(original_logger, {'prefix': 'Backfill'})
+
+"""
+KRX 일별 시세를 일자 범위로 받아오는 모듈 (backfill_krx_daily, StockDataHandler.backfill_from_krx)
+    - 거래일 달력(TradingCalendar)으로 start ~ end의 거래일만 요청한다.
+    - 여러 스레드(max_workers)로 동시에 요청하되, 전체 요청 속도는 TokenBucket(rate회/초)으로 제한한다.
+    - 실패한 요청은 retries번까지 backoff * 2^n초 후 다시 시도한다.
+    - 받은 일자는 바로 checkpoint_dir의 시장별 디렉터리에 저장한다. (CheckpointStore)
+      다시 실행하면 저장된 일자는 요청하지 않으므로, 중간에 중단된 작업을 이어서 할 수 있다.
+fetch는 fetch(date, market) -> DataFrame 형태의 함수로 바꿀 수 있다. (기본: fetch_daily_usable_stock_prices_from_krx)
+"""
+
+class TokenBucket:
+    """
+    초당 rate개의 토큰이 채워지고 최대 capacity개까지 모이는 토큰 버킷
+    capacity(기본 1)는 한 번에 몰아서 보낼 수 있는 요청 수이다.
+    acquire()는 토큰이 생길 때까지 기다린다. 여러 스레드에서 같이 사용할 수 있다.
+    """
+    def __init__(self, rate: float, capacity: float = 1.0, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class CheckpointStore:
+    """
+    일자별로 받아온 결과를 저장하는 디렉터리. 시장(market)별로 하위 디렉터리를 나눈다.
+    path/
+        ALL/
+            2024-01-02.arrow    데이터가 있는 일자 (Feather)
+            2024-01-01.empty    요청했지만 데이터가 없는 일자 (휴장일 등). 다시 요청하지 않는다.
+        KOSPI/
+            ...
+    같은 디렉터리로 다른 시장을 받아도 서로의 체크포인트를 사용하지 않는다.
+    임시 파일에 쓴 후 교체하므로, 중간에 중단되어도 저장된 파일은 항상 완전하다.
+    """
+    DATA_SUFFIX = '.arrow'
+    EMPTY_SUFFIX = '.empty'
+
+    def __init__(self, path, market: str = 'ALL'):
+        self.market = market
+        self.path = Path(path) / market
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, date: pd.Timestamp, suffix: str) -> Path:
+        return self.path / f"{pd.Timestamp(date):%Y-%m-%d}{suffix}"
+
+    def done_dates(self) -> set:
+        """
+        저장된(데이터가 없는 일자 포함) 일자
+        """
+        dates = set()
+        for file in self.path.iterdir():
+            if file.suffix in (self.DATA_SUFFIX, self.EMPTY_SUFFIX) and not file.name.startswith('.'):
+                try:
+                    dates.add(pd.Timestamp(file.stem))
+                except ValueError:
+                    continue
+        return dates
+
+    def save(self, date: pd.Timestamp, df: pd.DataFrame):
+        if df.empty:
+            self._file(date, self.EMPTY_SUFFIX).touch()
+            return
+        file = self._file(date, self.DATA_SUFFIX)
+        tmp = file.with_name('.' + file.name + '.tmp')
+        feather.write_feather(df.reset_index(drop=True), tmp)
+        os.replace(tmp, file)
+
+    def load(self, date: pd.Timestamp) -> Optional[pd.DataFrame]:
+        """
+        저장된 일자의 데이터. 데이터가 없는 일자는 빈 DataFrame, 저장되지 않은 일자는 None
+        """
+        file = self._file(date, self.DATA_SUFFIX)
+        if file.exists():
+            return self._restore_nan(feather.read_feather(file))
+        if self._file(date, self.EMPTY_SUFFIX).exists():
+            return pd.DataFrame()
+        return None
+
+    @staticmethod
+    def _restore_nan(df: pd.DataFrame) -> pd.DataFrame:
+        # Feather는 문자열 칼럼의 NaN을 None으로 읽으므로, 받아온 그대로(NaN)로 되돌린다. (예: 관리구분)
+        for col in df.columns:
+            if df[col].dtype == object:
+                values = df[col].to_numpy()
+                missing = pd.isna(values)
+                if missing.any():
+                    values = values.copy()
+                    values[missing] = np.nan
+                    df[col] = values
+        return df
+
+    def load_all(self, dates=None) -> List[pd.DataFrame]:
+        """
+        dates(기본: 저장된 모든 일자)의 데이터를 일자순으로 반환한다. 데이터가 없는 일자는 제외
+        """
+        dates = sorted(self.done_dates() if dates is None else dates)
+        dfs = (self.load(date) for date in dates)
+        return [df for df in dfs if df is not None and not df.empty]
+
+
+class BackfillResult:
+    """
+    backfill_krx_daily의 결과
+    dfs: 요청한 범위에서 데이터가 있는 일자의 DataFrame (체크포인트에 있던 일자 포함, 일자순)
+    fetched: 이번에 받아온 일자, skipped: 체크포인트에 있어서 요청하지 않은 일자
+    failed: 재시도 후에도 실패한 일자 -> 예외 (체크포인트에 저장되지 않으므로 다시 실행하면 다시 요청한다.)
+    """
+    def __init__(self, dfs: List[pd.DataFrame], fetched: List[pd.Timestamp], skipped: List[pd.Timestamp],
+                 failed: Dict[pd.Timestamp, Exception]):
+        self.dfs = dfs
+        self.fetched = fetched
+        self.skipped = skipped
+        self.failed = failed
+
+    def __repr__(self) -> str:
+        return (f"BackfillResult(days={len(self.dfs)}, fetched={len(self.fetched)}, "
+                f"skipped={len(self.skipped)}, failed={len(self.failed)})")
+
+
+def _fetch_with_retry(fetch: Callable, date: pd.Timestamp, market: str, bucket: TokenBucket,
+                      retries: int, backoff: float, sleep: Callable[[float], None]) -> pd.DataFrame:
+    for attempt in range(retries + 1):
+        bucket.acquire()
+        try:
+            return fetch(date, market)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            wait = backoff * 2 ** attempt
+            logger.warning(f"{date.date()} 요청 실패 ({e}). {wait:.1f}초 후 다시 시도합니다. ({attempt + 1}/{retries})")
+            sleep(wait)
+
+def backfill_krx_daily(
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    checkpoint_dir,
+    market: str = 'ALL',
+    fetch: Callable[[pd.Timestamp, str], pd.DataFrame] = None,
+    calendar: TradingCalendar = None,
+    max_workers: int = 4,
+    rate: float = 2.0,
+    retries: int = 3,
+    backoff: float = 1.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> BackfillResult:
+    """
+    start ~ end의 거래일 시세를 받아 checkpoint_dir/market에 저장하고, 범위 안의 모든 일자의 데이터를 반환한다.
+    fetch: fetch(date, market) -> DataFrame. 데이터가 없는 날은 빈 DataFrame (기본: fetch_daily_usable_stock_prices_from_krx)
+    calendar: 거래일 달력 (기본: TradingCalendar.for_range(start, end))
+    max_workers: 동시에 요청하는 스레드 수, rate: 초당 최대 요청 수
+    retries, backoff: 실패시 재시도 횟수, 첫 재시도 전 대기 시간(초, 재시도마다 2배)
+    """
+    if fetch is None:
+        # 체크포인트에 저장하므로 크롤러 캐시는 사용하지 않는다.
+        from mydatahandler.handler.functions.crawler_krx import fetch_daily_usable_stock_prices_from_krx
+        fetch = fetch_daily_usable_stock_prices_from_krx.uncached
+    # 기본 달력은 최근 일자만 포함하므로, 과거 범위는 start ~ end의 달력을 따로 만든다.
+    calendar = TradingCalendar.for_range(start, end) if calendar is None else calendar
+    store = CheckpointStore(checkpoint_dir, market)
+    sessions = list(calendar.sessions_between(start, end))
+    done = store.done_dates()
+    skipped = [date for date in sessions if date in done]
+    todo = [date for date in sessions if date not in done]
+    logger.info(f"{len(sessions)}개 거래일 중 {len(todo)}개를 받아옵니다. (체크포인트 {len(skipped)}개)")
+
+    bucket = TokenBucket(rate, sleep=sleep)
+    fetched, failed = [], {}
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        futures = {
+            executor.submit(_fetch_with_retry, fetch, date, market, bucket, retries, backoff, sleep): date
+            for date in todo
+        }
+        today = pd.Timestamp.today().normalize()
+        for future in as_completed(futures):
+            date = futures[future]
+            try:
+                df = future.result()
+                # 오늘 데이터가 비어 있으면 아직 개장 전일 수 있으므로, 휴장일로 저장하지 않는다.
+                if not (df.empty and date >= today):
+                    store.save(date, df)
+            except Exception as e:
+                logger.error(f"{date.date()}의 데이터를 받아오지 못했습니다. ({e})")
+                failed[date] = e
+            else:
+                fetched.append(date)
+    if failed:
+        logger.warning(f"{len(failed)}개 일자를 받아오지 못했습니다. 다시 실행하면 해당 일자만 다시 요청합니다.")
+    dfs = store.load_all(date for date in sessions if date not in failed)
+    return BackfillResult(dfs, sorted(fetched), skipped, failed)
@@ -0,0 +1,81 @@
+from typing import Dict, Tuple
+import numpy as np
+import pandas as pd
+
+"""
+주가 데이터의 메모리를 줄이기 위한 dtype 정책(compact profile)
+    문자열 칼럼(종목명, 마켓구분, 시장ID 등): category
+    변동코드는 KRX 상태 코드(문자열)이므로 숫자로 바꾸지 않고 category로 둔다.
+    가격/수량 칼럼: 값의 범위가 int32에 들어가면 int32 (거래대금, 시가총액 등 범위를 넘는 칼럼은 int64 유지)
+    변동률: float32 (선택)
+종목코드는 멀티인덱스의 레벨(유일한 값)과 codes로 이미 압축되어 있으므로 바꾸지 않는다.
+"""
+
+CATEGORY_COLUMNS = ['종목명', '표준코드', '마켓구분', '관리구분', '시장ID', '섹터구분', '변동코드']
+INT32_COLUMNS = ['종가', '전일대비', '시가', '고가', '저가', '기준가', '거래량', '상장주식수', '거래대금', '시가총액']
+FLOAT32_COLUMNS = ['변동률']
+
+_INT32 = np.iinfo(np.int32)
+
+def fits_int32(series: pd.Series) -> bool:
+    if series.empty:
+        return True
+    return _INT32.min <= series.min() and series.max() <= _INT32.max
+
+def compact_dtypes(df: pd.DataFrame, float32: bool = False) -> Dict[str, object]:
+    """
+    df에 적용할 compact dtype 매핑을 반환한다. 바꿀 필요가 없는 칼럼은 포함하지 않는다.
+    """
+    mapping = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if col in CATEGORY_COLUMNS and dtype == object:
+            mapping[col] = 'category'
+        elif col in INT32_COLUMNS and dtype.kind in 'iu' and dtype.itemsize > 4 and fits_int32(df[col]):
+            mapping[col] = 'int32'
+        elif float32 and col in FLOAT32_COLUMNS and dtype == np.float64:
+            mapping[col] = 'float32'
+    return mapping
+
+def compact_df(df: pd.DataFrame, float32: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    df를 compact dtype으로 변환한 새 DataFrame과, 칼럼별 메모리 절감 내역을 반환한다.
+    Returns: (compacted_df, report)
+        report: index=칼럼명, columns=['before_dtype', 'after_dtype', 'before_bytes', 'after_bytes', 'saved_bytes']
+    """
+    mapping = compact_dtypes(df, float32=float32)
+    compacted = df.astype(mapping) if mapping else df
+    before = df.memory_usage(index=False, deep=True)
+    after = compacted.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({
+        'before_dtype': df.dtypes.astype(str),
+        'after_dtype': compacted.dtypes.astype(str),
+        'before_bytes': before,
+        'after_bytes': after,
+    })
+    report['saved_bytes'] = report['before_bytes'] - report['after_bytes']
+    return compacted, report
+
+def conform_dtypes(df: pd.DataFrame, dtypes: Dict[str, object]) -> Tuple[pd.DataFrame, Dict[str, object]]:
+    """
+    새로 추가되는 데이터(df)를 기존 데이터의 dtype(dtypes)에 맞춘다.
+    category 칼럼에 새로운 값이 있거나 int32 범위를 넘는 값이 있으면, 기존 데이터가 바뀌어야 하므로
+    해당 칼럼의 새 dtype을 함께 반환한다.
+    Returns: (conformed_df, widened)
+        widened: {칼럼명: 기존 데이터에 적용해야 할 새 dtype}
+    """
+    mapping, widened = {}, {}
+    for col, dtype in dtypes.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        if isinstance(dtype, pd.CategoricalDtype):
+            new_values = pd.Index(df[col].dropna().unique()).difference(dtype.categories)
+            if len(new_values):
+                dtype = pd.CategoricalDtype(dtype.categories.append(new_values.sort_values()))
+                widened[col] = dtype
+        elif dtype.kind in 'iu' and df[col].dtype.kind not in 'iu':
+            continue # 결측치 등으로 정수형이 아닌 경우 그대로 둔다.
+        elif dtype == np.int32 and not fits_int32(df[col]):
+            widened[col] = dtype = np.dtype(np.int64)
+        mapping[col] = dtype
+    return (df.astype(mapping) if mapping else df), widened
@@ -1,21 +1,55 @@
+import numpy as np
 import pandas as pd
 import time
 
 from pykrx.website.krx.market.core import 전종목시세
 
+from mydatahandler.handler.functions.trading_calendar import TradingCalendar, default_trading_calendar
+from mydatahandler.utility.crawler.cache import cached_crawl, daily_session_ttl, is_non_empty
+
 from mystockutil.logging.logging_setup import CustomAdapter, logger as original_logger
 logger = CustomAdapter(logger=original_logger, extra={'prefix': 'WebKRX'})
 
-def fetch_recent_usable_stock_prices_from_krx(market:str='ALL') -> pd.DataFrame:
-    today = pd.Timestamp.today().normalize()
+# 거래일 달력을 확인할 수 없을 때(평일 기준 등) 최대로 거슬러 올라가는 거래일 수 (추석/설 연휴 + 주말 포함)
+MAX_UNCONFIRMED_SESSIONS = 10
+
+def fetch_recent_usable_stock_prices_from_krx(market:str='ALL', calendar:TradingCalendar=None, today:pd.Timestamp=None,
+                                              max_sessions:int=None) -> pd.DataFrame:
+    """
+    가장 최근 거래일의 데이터를 가져온다.
+    거래일 달력(calendar, 기본: default_trading_calendar())으로 오늘 또는 그 이전의 마지막 거래일을 바로 구하고,
+    그 날의 데이터가 아직 없으면(개장 전 등) 이전 거래일을 확인한다.
+    max_sessions: 확인할 최대 거래일 수
+        기본: 달력이 그 날짜의 실제 거래일 목록을 가지고 있으면 2 (마지막 거래일과 그 이전 거래일),
+        평일 기준이거나 범위 밖이면(휴장일이 빠져 있을 수 있음) MAX_UNCONFIRMED_SESSIONS
+    max_sessions개 거래일의 데이터가 모두 없으면 ValueError (빈 DataFrame을 반환하지 않는다.)
+    """
+    calendar = default_trading_calendar() if calendar is None else calendar
+    session = calendar.latest_session(today)
+    if max_sessions is None:
+        max_sessions = 2 if calendar.covers(session, session) else MAX_UNCONFIRMED_SESSIONS
+    tried = []
     while True:
-        df = fetch_daily_usable_stock_prices_from_krx(today, market)
+        df = fetch_daily_usable_stock_prices_from_krx(session, market)
+        tried.append(session)
         if not df.empty:
+            return df
+        if len(tried) >= max_sessions:
             break
-        today -= pd.Timedelta(days=1)
+        previous = calendar.previous_session(session)
+        logger.info(f"{session.date()}의 데이터가 없습니다. 이전 거래일 {previous.date()}의 데이터를 가져옵니다.")
         time.sleep(1)
-    return df
+        session = previous
+    raise ValueError(f"KRX에서 {tried[-1].date()} ~ {tried[0].date()}의 {len(tried)}개 거래일 데이터를 받지 못했습니다. "
+                     f"(달력: {calendar.source})")
+
+def _daily_key(date: pd.Timestamp=None, market:str='ALL'):
+    date = pd.Timestamp.today().normalize() if date is None else pd.Timestamp(date).normalize()
+    return (date.strftime('%Y%m%d'), market)
 
+# 빈 결과(휴일, 개장 전, 일시적인 오류 응답)는 캐시하지 않는다.
+@cached_crawl('krx_daily', ttl=lambda date=None, market='ALL': daily_session_ttl(date), key=_daily_key,
+              should_cache=is_non_empty)
 def fetch_daily_usable_stock_prices_from_krx(date: pd.Timestamp=None, market:str='ALL') -> pd.DataFrame:
     """
     Returns: pd.DataFrame
@@ -24,6 +58,8 @@ def fetch_daily_usable_stock_prices_from_krx(date: pd.Timestamp=None, market:str
             '시가', '고가', '저가', '거래량', '거래대금', '시가총액', '상장주식수', '시장ID', '기준가'
             ]
     휴일 또는 날짜 오류, 개장 전의 경우 빈 데이터프레임을 반환한다.
+    지난 일자의 결과는 크롤러 캐시에 계속 보관하고, 오늘 일자는 TODAY_TTL초 동안만 캐시한다. (utility.crawler.cache)
+    빈 결과는 캐시하지 않으므로, 다시 호출하면 다시 요청한다.
     """
     date = pd.Timestamp.today().normalize() if date is None else pd.Timestamp(date).normalize()
     market2mktid = {
@@ -32,56 +68,102 @@ def fetch_daily_usable_stock_prices_from_krx(date: pd.Timestamp=None, market:str
         "KOSDAQ": "KSQ",
         "KONEX": "KNX"
     }
-    df = 전종목시세().fetch(date.strftime('%Y%m%d'), market2mktid[market])
-    col_new_names = [
-        '종목코드', '표준코드', '종목명', '마켓구분', '관리구분', '종가', '변동코드', '전일대비', '변동률', 
-        '시가', '고가', '저가', '거래량', '거래대금', '시가총액', '상장주식수', '시장ID'
-    ]
-    # 칼럼 이름을 한글로 변경
-    df.columns = col_new_names
+    raw_df = 전종목시세().fetch(date.strftime('%Y%m%d'), market2mktid[market])
+    return parse_krx_daily(raw_df, date)
 
-    # NaN 값을 처리: 숫자형 칼럼은 0 또는 -1로, 문자열 칼럼은 빈 문자열로 채우기
-    df = df.fillna({'종목코드': '', '표준코드': '', '종목명': '', '마켓구분': '', '섹터구분': '', 
-                    '종가': '-1', '변동코드': '-1', '전일대비': '0', '변동률': '0', 
-                    '시가': '-1', '고가': '-1', '저가': '-1', '거래량': '-1', '거래대금': '-1', 
-                    '시가총액': '-1', '상장주식수': '-1', '시장ID': ''})
-    
-    # 모든 칼럼에서 빈칸과 쉼표 제거
-    df = df.apply(lambda x: x.str.replace('[, ]', '', regex=True) if x.dtype == "object" else x)
-    # df에서 '-' 문자를 제거한다. 
-    # 단, 전일대비와 변동률은 음수의 값을 가질 수 있다.
-    col_to_apply = [col for col in df.columns if not col in ['전일대비', '변동률']]
-    df[col_to_apply] = df[col_to_apply].apply(lambda x: x.str.replace(r'[\-]', '', regex=True) if x.dtype == "object" else x)
-    
+KRX_COLUMNS = [
+    '종목코드', '표준코드', '종목명', '마켓구분', '관리구분', '종가', '변동코드', '전일대비', '변동률', 
+    '시가', '고가', '저가', '거래량', '거래대금', '시가총액', '상장주식수', '시장ID'
+]
+# 정수로 변환하는 칼럼. 전일대비를 제외하면 음수가 없으므로 '-' 부호를 무시한다. (절대값)
+_INT_COLUMNS = ['종가', '전일대비', '시가', '고가', '저가', '거래량', '거래대금', '시가총액', '상장주식수']
+_SIGNED_COLUMNS = ['전일대비', '변동률']
+_NUMERIC_COLUMNS = _INT_COLUMNS + ['변동률']
+# 값이 없는('', '-', NaN) 경우의 값
+_NUMERIC_SENTINELS = {col: (0 if col in _SIGNED_COLUMNS else -1) for col in _NUMERIC_COLUMNS}
+# 문자열 칼럼: NaN을 채울 값. 관리구분은 채우지 않고 NaN으로 둔다.
+_STRING_FILLS = {'종목코드': '', '표준코드': '', '종목명': '', '마켓구분': '', '변동코드': '-1', '시장ID': ''}
+
+_SEP = '\x1f'
+
+def _clean(values: list, chars: str) -> list:
     """
-    1. usable한 데이터가 아닌 경우.
+    각 문자열에서 chars의 글자를 모두 제거한다.
+    값마다 처리하지 않고, 구분자로 이어 붙인 하나의 문자열에서 str.replace 후 다시 나눈다.
     """
-    if (df['전일대비']=='-').all():
-        
-        return pd.DataFrame(columns=['일자']+col_new_names)
-    
+    text = _SEP.join(values)
+    for char in chars:
+        text = text.replace(char, '')
+    return text.split(_SEP) if values else []
+
+def _parse_numeric_block(df: pd.DataFrame) -> pd.DataFrame:
     """
-    # 2. usable한 데이터인 경우. 
+    숫자 칼럼(_NUMERIC_COLUMNS)을 한 번에 변환한다.
+    모든 칼럼을 하나의 배열로 모아 쉼표/공백을 제거한 후 한 번에 float64로 변환한다.
+    변환할 수 없는 값이 있으면 pd.to_numeric(errors='coerce')로 다시 변환하여,
+    값이 없는 경우('', '-', NaN)는 _NUMERIC_SENTINELS로 채우고, 그 외에 숫자가 아닌 값이 있으면 예외를 발생시킨다.
     """
-    # 가격에 해당하는 칼럼들을 int64로 변환
-    price_columns = ['종가', '전일대비', '시가', '고가', '저가', '거래량', '거래대금', '시가총액', '상장주식수']
+    n_cols, n_rows = len(_NUMERIC_COLUMNS), len(df)
+    raw = df[_NUMERIC_COLUMNS].to_numpy(dtype=object).ravel(order='F')  # 칼럼 순서로 이어 붙임
     try:
-        for col in price_columns:
-            df[col] = df[col].astype('int64')
-        df['기준가'] = df['종가'] - df['전일대비']
-    except ValueError as e:
-        # logger.error(f"Error: {e} while converting price columns to int64") 
-        raise Exception(f"Error: {e} while converting price columns to int64")
-        # 변환 중 오류가 발생(개장하지 않는 날)하면 빈 DataFrame 반환
-        # return pd.DataFrame(columns=col_new_names)
-    
-    # 변동률 칼럼을 float로 변환하고 100으로 나누기
-    df['변동률'] = df['변동률'].astype('float64') / 100
-    # 일자는 pd.Timestamp로 통일시키기
-    df['일자'] = pd.to_datetime(date).normalize()
-    # df['일자'] = date.strftime('%Y-%m-%d')
-    res_df = df[['일자']+[col for col in df.columns if col != '일자']]
-    
+        values = np.array(_clean(raw.tolist(), ', '), dtype='float64')
+        missing = None
+    except (ValueError, TypeError, AttributeError):
+        text = pd.Series(raw, dtype=object).astype(str).str.replace(r'[, ]', '', regex=True)
+        values = pd.to_numeric(text, errors='coerce').to_numpy(dtype='float64')
+        missing = (pd.isna(raw) | text.isin(['', '-', 'nan', 'None']).to_numpy()).reshape(n_cols, n_rows)
+        invalid = np.flatnonzero(np.isnan(values) & ~missing.ravel())
+        if len(invalid):
+            col = _NUMERIC_COLUMNS[invalid[0] // n_rows] if n_rows else ''
+            raise Exception(f"Error: invalid literal {raw[invalid[0]]!r} in column {col} while converting price columns to int64")
+    values = values.reshape(n_cols, n_rows)
+    result = {}
+    for i, col in enumerate(_NUMERIC_COLUMNS):
+        column = values[i] if col in _SIGNED_COLUMNS else np.abs(values[i])
+        if missing is not None:
+            column = np.where(missing[i], _NUMERIC_SENTINELS[col], column)
+        result[col] = column if col == '변동률' else column.astype('int64')
+    return pd.DataFrame(result, index=df.index)
+
+def _parse_string_column(values: pd.Series, fill: str = None) -> np.ndarray:
+    """
+    NaN을 fill로 채우고(fill이 None이면 NaN으로 둔다) 쉼표, 공백, '-'를 제거한다.
+    """
+    if fill is not None:
+        values = values.fillna(fill)
+    if values.dtype != object:
+        return values.to_numpy()
+    result = values.to_numpy(dtype=object, copy=True)
+    present = pd.notna(result)
+    result[present] = _clean([str(value) for value in result[present]], ', -')
+    return result
+
+def parse_krx_daily(raw_df: pd.DataFrame, date: pd.Timestamp) -> pd.DataFrame:
+    """
+    전종목시세().fetch의 결과(모두 문자열)를 fetch_daily_usable_stock_prices_from_krx의 형식으로 변환한다.
+    문자열 칼럼: NaN을 채우고(관리구분은 NaN 유지) 쉼표, 공백, '-'를 제거한다. (칼럼별로 한 번)
+    숫자 칼럼: _parse_numeric_block (값이 없으면 정수 칼럼은 -1, 전일대비/변동률은 0)
+    전일대비가 모두 '-'이면(휴일, 개장 전 등) 빈 DataFrame을 반환한다.
+    """
+    df = raw_df.copy(deep=False)
+    # 칼럼 이름을 한글로 변경
+    df.columns = KRX_COLUMNS
+    if len(df) == 0 or all(value == '-' for value in _clean(df['전일대비'].fillna('').astype(str).tolist(), ', ')):
+        # usable한 데이터가 아닌 경우.
+        return pd.DataFrame(columns=['일자'] + KRX_COLUMNS)
+
+    numeric = _parse_numeric_block(df)
+    # 문자열로 만든 Timestamp는 초 단위일 수 있으므로, 이전과 같이 ns 단위로 맞춘다.
+    columns = {'일자': np.full(len(df), pd.Timestamp(date).normalize().as_unit('ns').to_datetime64())}
+    for col in KRX_COLUMNS:
+        if col in numeric:
+            columns[col] = numeric[col].to_numpy()
+        else:
+            columns[col] = _parse_string_column(df[col], _STRING_FILLS.get(col))
+    # 변동률은 % 단위
+    columns['변동률'] = columns['변동률'] / 100
+    columns['기준가'] = columns['종가'] - columns['전일대비']
+    res_df = pd.DataFrame(columns, index=df.index)
     return res_df
 
 if __name__ == '__main__':
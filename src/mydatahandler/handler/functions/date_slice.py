@@ -0,0 +1,76 @@
+import pandas as pd
+import numpy as np
+
+"""
+일자순으로 정렬된 [일자, 종목코드] 멀티인덱스에서
+날짜 구간에 해당하는 행의 범위를 이진탐색으로 구하는 함수
+행마다 마스크를 만들지 않고, 연속된 positional slice(iloc)를 반환한다.
+"""
+
+def _date_codes(index: pd.MultiIndex, level: str):
+    """
+    일자 레벨과, 레벨 순서대로 정렬된 codes를 반환한다.
+    레벨이 정렬되어 있지 않으면 (None, None)
+    """
+    level_num = index.names.index(level)
+    dates = index.levels[level_num]
+    if not dates.is_monotonic_increasing:
+        return None, None
+    return dates, np.asarray(index.codes[level_num])
+
+def date_row_slice(
+    index: pd.MultiIndex,
+    from_date: pd.Timestamp = None,
+    to_date: pd.Timestamp = None,
+    include_from: bool = True,
+    include_to: bool = True,
+    level: str = '일자',
+) -> slice:
+    """
+    from_date ~ to_date 구간의 행 slice를 반환한다.
+    index는 일자순으로 정렬되어 있어야 한다.
+    from_date, to_date가 None이면 해당 방향으로는 제한이 없다.
+    """
+    dates, codes = _date_codes(index, level)
+    if dates is None:
+        # 레벨이 정렬되어 있지 않은 경우 일자 값으로 직접 탐색
+        values = index.get_level_values(level)
+        search = values.searchsorted
+        lo_side, hi_side = ('left' if include_from else 'right'), ('right' if include_to else 'left')
+        start = 0 if from_date is None else int(search(pd.Timestamp(from_date), side=lo_side))
+        stop = len(index) if to_date is None else int(search(pd.Timestamp(to_date), side=hi_side))
+        return slice(start, max(start, stop))
+
+    start, stop = 0, len(index)
+    if from_date is not None:
+        code = dates.searchsorted(pd.Timestamp(from_date), side='left' if include_from else 'right')
+        start = _code_position(codes, code, len(dates))
+    if to_date is not None:
+        code = dates.searchsorted(pd.Timestamp(to_date), side='right' if include_to else 'left')
+        stop = _code_position(codes, code, len(dates))
+    return slice(start, max(start, stop))
+
+def _code_position(codes: np.ndarray, code: int, n_dates: int) -> int:
+    """
+    정렬된 codes에서 code가 처음 나오는(또는 들어갈) 위치
+    codes와 같은 dtype으로 찾는다. (dtype이 다르면 numpy가 codes 전체를 변환하므로 행 수에 비례함)
+    """
+    if code >= n_dates:
+        return len(codes)  # 마지막 일자 이후 (codes의 dtype으로 표현하지 못할 수 있음)
+    return int(codes.searchsorted(codes.dtype.type(code), side='left'))
+
+def recent_date_row_slice(index: pd.MultiIndex, days: int, level: str = '일자') -> slice:
+    """
+    최근 days개 일자에 해당하는 행 slice를 반환한다.
+    index는 일자순으로 정렬되어 있어야 한다.
+    뒤에서부터 일자 경계를 days번 이진탐색하므로 행 수와 무관하게 빠르다.
+    """
+    dates, codes = _date_codes(index, level)
+    if dates is None:
+        codes = index.get_level_values(level).asi8
+    start = len(codes)
+    for _ in range(days):
+        if start == 0:
+            break
+        start = int(codes.searchsorted(codes[start - 1], side='left'))
+    return slice(start, len(codes))
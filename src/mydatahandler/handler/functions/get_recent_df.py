@@ -1,5 +1,7 @@
 import pandas as pd
 
+from mydatahandler.handler.functions.date_slice import recent_date_row_slice
+
 def get_recent_df(df:pd.DataFrame, days=300) -> pd.DataFrame:
     """
     최근 n일의 데이터를 가져온다.
@@ -12,6 +14,13 @@ def get_recent_df(df:pd.DataFrame, days=300) -> pd.DataFrame:
     Returns:
         pd.DataFrame: 최근 n일의 데이터프레임
     """
+    # 일자순으로 정렬되어 있는 경우, 이진탐색으로 구간을 찾아 iloc으로 자른다.
+    if df.index.is_monotonic_increasing:
+        rows = recent_date_row_slice(df.index, days)
+        if rows.start == 0:
+            return df
+        return df.iloc[rows]
+
     # '일자'만 추출 (멀티인덱스의 첫 번째 레벨)
     dates = df.index.get_level_values('일자').unique()
     dates = pd.to_datetime(dates).sort_values()
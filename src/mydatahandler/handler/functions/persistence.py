@@ -0,0 +1,193 @@
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable, List
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from mydatahandler.handler.functions.date_slice import date_row_slice
+
+"""
+[일자, 종목코드] 멀티인덱스 DataFrame을 일자별 파티션으로 저장하고 불러오는 모듈
+path/
+    일자=2024-01-02/part-0.parquet
+    일자=2024-01-03/part-0.parquet
+    ...
+일자는 디렉터리 이름(hive 파티션)에만 저장되고, 파일에는 종목코드와 나머지 칼럼이 저장된다.
+
+또는 전체를 하나의 Arrow IPC(Feather v2) 파일로 저장하고, memory map으로 복사 없이 불러온다.
+(save_arrow_ipc / load_arrow_ipc)
+"""
+
+FORMATS = {
+    'parquet': '.parquet',
+    'feather': '.arrow',
+}
+
+def _partition_dir(path: Path, date: pd.Timestamp, date_col_name: str) -> Path:
+    return path / f"{date_col_name}={pd.Timestamp(date):%Y-%m-%d}"
+
+def _partitioning(date_col_name: str) -> ds.Partitioning:
+    return ds.partitioning(pa.schema([(date_col_name, pa.date32())]), flavor='hive')
+
+def _write_table(table: pa.Table, file_path: Path, format: str):
+    # 임시 파일에 쓴 후 교체하여, 중간에 실패해도 기존 파티션이 깨지지 않도록 한다.
+    tmp_path = file_path.with_name('.' + file_path.name + '.tmp') # '.'으로 시작하는 파일은 dataset에서 무시됨
+    if format == 'parquet':
+        pq.write_table(table, tmp_path)
+    else:
+        feather.write_feather(table, tmp_path)
+    os.replace(tmp_path, file_path)
+
+def save_partitioned_df(
+    df: pd.DataFrame,
+    path,
+    dates: Iterable[pd.Timestamp] = None,
+    format: str = 'parquet',
+    date_col_name: str = '일자',
+) -> List[pd.Timestamp]:
+    """
+    df를 일자별 파티션으로 저장한다.
+    df는 [일자, 종목코드] 멀티인덱스로 정렬되어 있어야 한다.
+    dates:
+        None이면 df의 모든 일자를 저장한다.
+        주어지면 해당 일자의 파티션만 다시 쓴다. df에 없는 일자는 파티션을 삭제한다.
+    Returns: 저장(또는 삭제)한 일자 리스트
+    """
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {list(FORMATS)}")
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    if dates is None:
+        dates = df.index.get_level_values(date_col_name).unique()
+    dates = sorted(pd.DatetimeIndex(dates).normalize().unique())
+
+    for date in dates:
+        partition_dir = _partition_dir(path, date, date_col_name)
+        daily_df = df.iloc[date_row_slice(df.index, date, date, level=date_col_name)]
+        if daily_df.empty:
+            shutil.rmtree(partition_dir, ignore_errors=True)
+            continue
+        partition_dir.mkdir(exist_ok=True)
+        daily_df = daily_df.reset_index(level=date_col_name, drop=True).reset_index()
+        table = pa.Table.from_pandas(daily_df, preserve_index=False)
+        _write_table(table, partition_dir / f"part-0{FORMATS[format]}", format)
+    return dates
+
+def load_partitioned_df(
+    path,
+    start: pd.Timestamp = None,
+    end: pd.Timestamp = None,
+    columns: List[str] = None,
+    format: str = 'parquet',
+    date_col_name: str = '일자',
+    symbol_col_name: str = '종목코드',
+) -> pd.DataFrame:
+    """
+    save_partitioned_df로 저장한 데이터를 불러온다.
+    start ~ end 일자 범위와 columns는 파일을 읽기 전에 적용되므로,
+    범위 밖의 파티션과 선택하지 않은 칼럼은 읽지 않는다.
+    Returns: pd.DataFrame (칼럼에 '일자', '종목코드' 포함, 인덱스 미설정)
+    """
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {list(FORMATS)}")
+    dataset = ds.dataset(
+        str(path),
+        format='parquet' if format == 'parquet' else 'ipc',
+        partitioning=_partitioning(date_col_name),
+    )
+    date_field = ds.field(date_col_name)
+    filter = None
+    if start is not None:
+        filter = date_field >= pd.Timestamp(start).date()
+    if end is not None:
+        end_filter = date_field <= pd.Timestamp(end).date()
+        filter = end_filter if filter is None else filter & end_filter
+    if columns is not None:
+        columns = [date_col_name, symbol_col_name] + [
+            col for col in columns if col not in (date_col_name, symbol_col_name)
+        ]
+    table = dataset.to_table(columns=columns, filter=filter)
+    df = table.to_pandas(date_as_object=False)
+    df[date_col_name] = df[date_col_name].astype('datetime64[ns]')
+    return df
+
+def save_arrow_ipc(
+    df: pd.DataFrame,
+    path,
+    date_col_name: str = '일자',
+    symbol_col_name: str = '종목코드',
+):
+    """
+    df를 하나의 Arrow IPC(Feather v2) 파일로 저장한다.
+    load_arrow_ipc에서 복사 없이 읽을 수 있도록, 압축하지 않고 하나의 record batch로 저장한다.
+    종목코드는 정렬된 dictionary로 저장하여, 불러올 때 멀티인덱스의 레벨과 codes로 그대로 사용한다.
+    df는 [일자, 종목코드] 멀티인덱스로 정렬되어 있어야 한다.
+    """
+    df = df.reset_index()
+    symbols = df[symbol_col_name].astype(object)
+    df[symbol_col_name] = pd.Categorical(symbols, categories=np.sort(symbols.unique()))
+    table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+    path = Path(path)
+    tmp_path = path.with_name('.' + path.name + '.tmp')
+    with pa.OSFile(str(tmp_path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(len(table), 1))
+    os.replace(tmp_path, path)
+
+def load_arrow_ipc(
+    path,
+    memory_map: bool = True,
+    date_col_name: str = '일자',
+    symbol_col_name: str = '종목코드',
+) -> pd.DataFrame:
+    """
+    save_arrow_ipc로 저장한 파일을 [일자, 종목코드] 멀티인덱스 DataFrame으로 불러온다.
+    memory_map=True이면 파일을 memory map으로 열어, null이 없는 숫자형 칼럼은 복사 없이 파일 버퍼를 그대로 사용한다.
+    같은 파일을 여러 프로세스가 열면 OS의 page cache를 공유한다.
+    주의: 복사 없이 불러온 칼럼은 읽기 전용이다. (값을 수정하려면 칼럼을 새로 할당해야 함)
+    """
+    source = pa.memory_map(str(path), 'r') if memory_map else pa.OSFile(str(path), 'rb')
+    table = pa.ipc.open_file(source).read_all()
+    value_columns = [col for col in table.column_names if col not in (date_col_name, symbol_col_name)]
+    if table.num_rows == 0:
+        return table.select(value_columns).to_pandas().set_index(
+            pd.MultiIndex.from_arrays([pd.DatetimeIndex([]), pd.Index([], dtype=object)], names=[date_col_name, symbol_col_name])
+        )
+
+    # 일자: 정렬되어 있으므로 값이 바뀌는 위치로 레벨과 codes를 만든다.
+    dates = table.column(date_col_name).combine_chunks().to_numpy(zero_copy_only=False)
+    dates = dates.astype('datetime64[ns]', copy=False)
+    changed = np.flatnonzero(dates[1:] != dates[:-1]) + 1
+    date_level = pd.DatetimeIndex(dates[np.concatenate([[0], changed])], name=date_col_name)
+    date_codes = np.zeros(len(dates), dtype=np.int32)
+    date_codes[changed] = 1
+    date_codes = np.cumsum(date_codes, dtype=np.int32)
+
+    # 종목코드: 정렬된 dictionary를 레벨로, indices를 codes로 사용한다.
+    symbols = table.column(symbol_col_name).combine_chunks()
+    if pa.types.is_dictionary(symbols.type):
+        symbol_level = pd.Index(symbols.dictionary.to_pylist(), name=symbol_col_name, dtype=object)
+        symbol_codes = symbols.indices.to_numpy(zero_copy_only=False)
+        if not symbol_level.is_monotonic_increasing:
+            order = symbol_level.argsort()
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            symbol_level, symbol_codes = symbol_level[order], rank[symbol_codes]
+    else:
+        symbol_codes, symbol_level = pd.factorize(symbols.to_pandas(), sort=True)
+        symbol_level = pd.Index(symbol_level, name=symbol_col_name, dtype=object)
+
+    df = table.select(value_columns).to_pandas(split_blocks=True)
+    df.index = pd.MultiIndex(
+        levels=[date_level, symbol_level],
+        codes=[date_codes, symbol_codes],
+        names=[date_col_name, symbol_col_name],
+        verify_integrity=False,
+    )
+    return df
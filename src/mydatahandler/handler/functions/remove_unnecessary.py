@@ -1,37 +1,135 @@
+import threading
+from typing import Callable, Dict, Tuple
+import numpy as np
 import pandas as pd
 
+"""
+불필요한 종목(스팩, ~호 종목, 우선주 등 종목코드가 0으로 끝나지 않는 종목, 코스피/코스닥 이외의 시장) 제외
+기준은 종목명, 종목코드, 시장ID(또는 마켓구분) 값에만 의존하므로,
+행마다 문자열 검사를 하지 않고 유일한 값별로 한 번만 검사하여 캐시한다. (SymbolEligibility)
+행 마스크는 각 값의 codes(카테고리/인덱스 레벨 codes 또는 factorize)로 캐시된 결과를 모아서 만든다.
+"""
+
+MARKET_ID_PATTERN = 'STK|KSQ'
+MARKETS = ['KOSPI', 'KOSDAQ', 'KOSDAQGLOBAL']
+
+def _name_ok(names: pd.Series) -> np.ndarray:
+    return (
+        ~names.str.contains(r'\d+호$', na=False).to_numpy(dtype=bool) &
+        ~names.str.contains('스팩', na=False).to_numpy(dtype=bool)
+    )
+def _symbol_ok(symbols: pd.Series) -> np.ndarray:
+    return symbols.str.endswith('0', na=False).to_numpy(dtype=bool)
+def _market_id_ok(market_ids: pd.Series) -> np.ndarray:
+    # 코스피, 코스닥 시장만 남김
+    return market_ids.str.contains(MARKET_ID_PATTERN, na=False).to_numpy(dtype=bool)
+def _market_ok(markets: pd.Series) -> np.ndarray:
+    return markets.isin(MARKETS).to_numpy(dtype=bool)
+
+def _codes_and_uniques(values) -> Tuple[np.ndarray, pd.Index]:
+    """
+    values의 (codes, 유일한 값)을 반환한다. 결측치의 code는 -1
+    category나 인덱스 레벨이면 이미 있는 codes를 사용하고, 아니면 factorize한다.
+    """
+    if isinstance(values, tuple):  # (codes, level)
+        return np.asarray(values[0]), values[1]
+    if isinstance(values, (pd.Series, pd.Index)) and isinstance(values.dtype, pd.CategoricalDtype):
+        categorical = pd.Categorical(values)
+        return categorical.codes, categorical.categories
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    return codes, pd.Index(uniques, dtype=object)
+
+
+class SymbolEligibility:
+    """
+    종목명/종목코드/시장 값별 검사 결과를 보관하는 캐시
+    새로운 종목코드나 종목명이 나타나면 그 값만 검사하여 추가한다. (기존 결과는 값에만 의존하므로 무효화할 필요가 없음)
+    여러 스레드에서 같이 사용해도 되도록 캐시 갱신은 잠금으로 보호한다.
+    """
+    def __init__(self):
+        self._caches: Dict[str, Dict[str, bool]] = {'name': {}, 'symbol': {}, 'market_id': {}, 'market': {}}
+        self._lock = threading.Lock()
+
+    def _lookup(self, kind: str, rule: Callable[[pd.Series], np.ndarray], values) -> np.ndarray:
+        """
+        values의 각 행에 대한 rule 결과. 유일한 값별로 캐시를 찾고, 없는 값만 rule로 검사한다.
+        """
+        codes, uniques = _codes_and_uniques(values)
+        cache = self._caches[kind]
+        # 마지막 키(None)는 결측치에 대한 결과로, code -1이 가리킨다.
+        keys = uniques.tolist() + [None]
+        ok = np.fromiter((cache.get(key, -1) for key in keys), dtype=np.int8, count=len(keys))
+        missing = np.flatnonzero(ok < 0)
+        if len(missing):
+            new_values = [keys[i] for i in missing]
+            result = rule(pd.Series(new_values, dtype=object))
+            ok[missing] = result
+            with self._lock:
+                cache.update(zip(new_values, result.tolist()))
+        return ok.astype(bool)[codes]
+
+    def mask(self, names, symbols, market_ids=None, markets=None) -> np.ndarray:
+        """
+        남길 행이면 True인 배열. necessary_symbols_mask와 같다.
+        각 인자는 배열/Series 또는 (codes, 유일한 값) 튜플
+        """
+        mask = self._lookup('name', _name_ok, names) & self._lookup('symbol', _symbol_ok, symbols)
+        if market_ids is not None:
+            mask &= self._lookup('market_id', _market_id_ok, market_ids)
+        elif markets is not None:
+            mask &= self._lookup('market', _market_ok, markets)
+        return mask
+
+    def frame_mask(self, df: pd.DataFrame, name_col: str = '종목명', symbol_col: str = '종목코드') -> np.ndarray:
+        """
+        df의 행 마스크. 종목명, 종목코드, 시장ID, 마켓구분은 인덱스(레벨)나 칼럼 어디에 있어도 된다.
+        인덱스 레벨은 레벨 값만 검사하고 codes로 모은다.
+        """
+        def get(name: str):
+            if name in df.columns:
+                return df[name]
+            if name in df.index.names:
+                if isinstance(df.index, pd.MultiIndex):
+                    level_num = df.index.names.index(name)
+                    return (df.index.codes[level_num], df.index.levels[level_num])
+                return df.index
+            return None
+        names, symbols = get(name_col), get(symbol_col)
+        if names is None or symbols is None:
+            raise KeyError(f"{name_col}, {symbol_col}가 인덱스 또는 칼럼에 있어야 합니다.")
+        market_ids = get('시장ID')
+        return self.mask(names, symbols, market_ids=market_ids, markets=None if market_ids is not None else get('마켓구분'))
+
+    def cache_size(self) -> Dict[str, int]:
+        return {kind: len(cache) for kind, cache in self._caches.items()}
+
+# 기본 캐시 (remove_unnecessary_symbols, necessary_symbols_mask, StockDataHandler.df_filtered가 공유)
+symbol_eligibility = SymbolEligibility()
+
 def remove_unnecessary_symbols(df:pd.DataFrame) -> pd.DataFrame:
     """
     불필요한 종목 제거
-    인덱스를 리셋 후, 다시 설정해 준다. 
-    인덱스와 칼럼에 중복된 항목이 없어야 한다. 
-    
+    인덱스는 그대로 두고, 남길 행만 선택한다. (SymbolEligibility로 유일한 값별로 한 번만 검사)
+    인덱스와 칼럼에 중복된 항목이 없어야 한다.
+
     df - pd.DataFrame
         Index: 본래 Index와 동일
         인덱스 또는 칼럼에 종목명, 종목코드가 반드시 포함되어 있어야 한다.
-        
+
     """
-    # 
-    if set(df.index).intersection(df.columns):
+    #
+    if set(df.index.names).intersection(df.columns):
         raise ValueError("DataFrame의 인덱스와 칼럼에 중복된 항목이 있습니다.")
-    
-    index_names = df.index.names
-    df = df.reset_index(drop=False)
-    df = df[
-    ~df['종목명'].str.contains(r'\d+호$') & 
-    ~df['종목명'].str.contains('스팩') &
-    df['종목코드'].str.endswith('0')
-    ]
-    if '시장ID' in df.columns:
-        # 코스피, 코스닥 시장만 남김
-        df = df[
-        df['시장ID'].str.contains('STK|KSQ')
-        ]
-    elif '마켓구분' in df.columns:
-        df = df[df['마켓구분'].isin(['KOSPI', 'KOSDAQ', 'KOSDAQGLOBAL'])]
-    df = df.set_index(index_names, drop=True)
-    return df
+    return df[symbol_eligibility.frame_mask(df)]
+
+def necessary_symbols_mask(names:pd.Series, symbols:pd.Series, market_ids:pd.Series=None, markets:pd.Series=None) -> np.ndarray:
+    """
+    remove_unnecessary_symbols와 같은 기준으로, 남길 행이면 True인 배열을 반환한다.
+    인덱스를 리셋하지 않고 필요한 칼럼(또는 인덱스 레벨)만 받아서 계산한다.
+    names: 종목명, symbols: 종목코드, market_ids: 시장ID (없으면 markets: 마켓구분)
+    """
+    return symbol_eligibility.mask(names, symbols, market_ids=market_ids, markets=markets)
 
 
 if __name__ == '__main__':
-    pass
\ No newline at end of file
+    pass
@@ -0,0 +1,212 @@
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+
+from mystockutil.logging.logging_setup import CustomAdapter, logger as original_logger
+logger = CustomAdapter(original_logger, {'prefix': 'TradingCalendar'})
+
+"""
+KRX(XKRX) 거래일 계산
+exchange_calendars의 XKRX 달력으로 거래일 목록을 만들고, 파일(JSON)에 캐시하여 다음 실행부터는
+exchange_calendars를 import하지 않고(오프라인) 사용한다.
+임시 휴장일은 closures로 추가한다. (생성자 인자, add_closure, 또는 캐시 파일의 'closures')
+exchange_calendars가 없거나 캐시 범위 밖의 일자는 평일(월~금)에서 closures를 뺀 날을 거래일로 본다.
+"""
+
+DEFAULT_CACHE_PATH = Path(os.environ.get(
+    'MYDATAHANDLER_XKRX_CACHE', Path.home() / '.cache' / 'mydatahandler' / 'xkrx_sessions.json'
+))
+_LOOKBACK = pd.Timedelta(days=400)
+_LOOKAHEAD = pd.Timedelta(days=365)
+
+def _normalize_dates(dates: Iterable) -> pd.DatetimeIndex:
+    index = pd.DatetimeIndex(pd.to_datetime(list(dates)))
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize().unique().sort_values()
+
+def load_xkrx_sessions(start: pd.Timestamp, end: pd.Timestamp) -> pd.DatetimeIndex:
+    """
+    exchange_calendars의 XKRX 거래일 (start ~ end). exchange_calendars가 없으면 ImportError
+    """
+    import exchange_calendars as xcals  # import가 느리므로 필요할 때만
+    calendar = xcals.get_calendar('XKRX', start=start.strftime('%Y-%m-%d'), end=end.strftime('%Y-%m-%d'))
+    return _normalize_dates(calendar.sessions)
+
+
+class TradingCalendar:
+    """
+    거래일 목록 (start ~ end 범위) + 임시 휴장일
+    예:
+        calendar = TradingCalendar.default()
+        calendar.latest_session()           # 오늘 또는 오늘 이전의 마지막 거래일
+        calendar.previous_session(date)     # date 이전의 거래일
+    """
+    def __init__(self, sessions: Iterable = None, start: pd.Timestamp = None, end: pd.Timestamp = None,
+                 closures: Iterable = (), source: str = None):
+        """
+        sessions: 거래일 목록. None이면 평일 기준
+        start, end: sessions가 유효한 범위 (기본: sessions의 처음과 끝)
+        closures: 임시 휴장일
+        source: 'xkrx', 'cache', 'sessions', 'weekday' (기본: sessions가 있으면 'sessions', 없으면 'weekday')
+            'weekday'이면 거래일 목록이 없는 것으로 본다. (covers)
+        """
+        self._sessions = _normalize_dates(sessions) if sessions is not None else pd.DatetimeIndex([])
+        self.start = pd.Timestamp(start).normalize() if start is not None else (self._sessions[0] if len(self._sessions) else None)
+        self.end = pd.Timestamp(end).normalize() if end is not None else (self._sessions[-1] if len(self._sessions) else None)
+        self.closures = set(_normalize_dates(closures))
+        self.source = source if source is not None else ('weekday' if sessions is None else 'sessions')
+
+    @classmethod
+    def default(cls, cache_path: Optional[Path] = DEFAULT_CACHE_PATH, closures: Iterable = (),
+                today: pd.Timestamp = None) -> 'TradingCalendar':
+        """
+        캐시 파일이 오늘 전후를 포함하면 캐시로, 아니면 exchange_calendars로 만들고 캐시에 저장한다.
+        exchange_calendars가 없으면 (오래된 캐시가 있으면 캐시 범위 안에서는 캐시를, 그 밖은) 평일 기준
+        """
+        today = pd.Timestamp.today().normalize() if today is None else pd.Timestamp(today).normalize()
+        cached = cls.load(cache_path) if cache_path is not None and Path(cache_path).exists() else None
+        if cached is not None and cached.start <= today - pd.Timedelta(days=30) and today + pd.Timedelta(days=30) <= cached.end:
+            cached.closures |= set(_normalize_dates(closures))
+            return cached
+        start, end = today - _LOOKBACK, today + _LOOKAHEAD
+        try:
+            calendar = cls(load_xkrx_sessions(start, end), start=start, end=end, source='xkrx')
+        except ImportError:
+            logger.warning("exchange_calendars가 없습니다. 평일 기준으로 거래일을 계산합니다.")
+            calendar = cached or cls(source='weekday')
+        else:
+            if cached is not None:
+                calendar.closures |= cached.closures
+            if cache_path is not None:
+                try:
+                    calendar.save(cache_path)
+                except OSError as e:
+                    logger.warning(f"거래일 캐시를 저장하지 못했습니다. ({e})")
+        calendar.closures |= set(_normalize_dates(closures))
+        return calendar
+
+    @classmethod
+    def for_range(cls, start: pd.Timestamp, end: pd.Timestamp, base: 'TradingCalendar' = None) -> 'TradingCalendar':
+        """
+        start ~ end 전체를 포함하는 달력 (과거 데이터를 받아올 때 사용)
+        base(기본: default_trading_calendar())가 범위를 포함하면 base를 그대로 쓰고,
+        아니면 exchange_calendars로 start ~ end의 XKRX 거래일을 만든다. (base의 closures 포함)
+        exchange_calendars가 없으면 base (범위 밖은 평일 기준)
+        """
+        base = default_trading_calendar() if base is None else base
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        if base.covers(start, end):
+            return base
+        try:
+            sessions = load_xkrx_sessions(start, end)
+        except ImportError:
+            logger.warning(f"exchange_calendars가 없어 {start.date()} ~ {end.date()} 중 달력 범위 밖은 평일 기준으로 계산합니다.")
+            return base
+        return cls(sessions, start=start, end=end, closures=base.closures, source='xkrx')
+
+    def save(self, path):
+        """
+        거래일 목록과 임시 휴장일을 JSON으로 저장한다. (load로 오프라인에서 사용)
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            'start': self.start.strftime('%Y-%m-%d') if self.start is not None else None,
+            'end': self.end.strftime('%Y-%m-%d') if self.end is not None else None,
+            'sessions': self._sessions.strftime('%Y-%m-%d').tolist(),
+            'closures': sorted(date.strftime('%Y-%m-%d') for date in self.closures),
+        }
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        tmp.write_text(json.dumps(data), encoding='utf-8')
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path) -> Optional['TradingCalendar']:
+        """
+        save로 저장한 파일을 읽는다. 읽을 수 없으면 None
+        """
+        try:
+            data = json.loads(Path(path).read_text(encoding='utf-8'))
+            return cls(data['sessions'], start=data['start'], end=data['end'],
+                       closures=data.get('closures', []), source='cache')
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"거래일 캐시를 읽지 못했습니다. ({e})")
+            return None
+
+    def add_closure(self, date: pd.Timestamp):
+        """
+        임시 휴장일을 추가한다.
+        """
+        self.closures.add(pd.Timestamp(date).normalize())
+
+    def _covers(self, date: pd.Timestamp) -> bool:
+        return self.start is not None and self.start <= date <= self.end
+
+    def covers(self, start: pd.Timestamp, end: pd.Timestamp) -> bool:
+        """
+        start ~ end 전체의 거래일 목록이 있는지 여부 (평일 기준 달력은 False)
+        """
+        if self.source == 'weekday' or self.start is None:
+            return False
+        return self.start <= pd.Timestamp(start).normalize() and pd.Timestamp(end).normalize() <= self.end
+
+    def is_session(self, date: pd.Timestamp) -> bool:
+        date = pd.Timestamp(date).normalize()
+        if date in self.closures:
+            return False
+        if self._covers(date):
+            pos = self._sessions.searchsorted(date)
+            return pos < len(self._sessions) and self._sessions[pos] == date
+        return date.weekday() < 5
+
+    def latest_session(self, date: pd.Timestamp = None) -> pd.Timestamp:
+        """
+        date(기본: 오늘) 또는 그 이전의 마지막 거래일
+        """
+        date = pd.Timestamp.today().normalize() if date is None else pd.Timestamp(date).normalize()
+        if self.is_session(date):
+            return date
+        return self.previous_session(date)
+
+    def previous_session(self, date: pd.Timestamp) -> pd.Timestamp:
+        """
+        date 이전(date 제외)의 마지막 거래일
+        """
+        date = pd.Timestamp(date).normalize()
+        while True:
+            date = self._previous_candidate(date)
+            if self.is_session(date):
+                return date
+
+    def _previous_candidate(self, date: pd.Timestamp) -> pd.Timestamp:
+        # date 이전의 거래일 (임시 휴장일 제외 전). 범위 안에서는 이진탐색, 범위 밖은 평일 기준
+        if len(self._sessions) and self.start < date <= self.end + pd.Timedelta(days=1):
+            pos = int(self._sessions.searchsorted(date)) - 1
+            if pos >= 0:
+                return self._sessions[pos]
+            date = self.start
+        return (date - pd.offsets.BDay(1)).normalize()
+
+    def sessions_between(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DatetimeIndex:
+        """
+        start ~ end (양 끝 포함)의 거래일
+        """
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        dates = pd.date_range(start, end, freq='D')
+        mask = np.fromiter((self.is_session(date) for date in dates), dtype=bool, count=len(dates))
+        return dates[mask]
+
+_default_calendar: TradingCalendar = None
+
+def default_trading_calendar() -> TradingCalendar:
+    """
+    프로세스에서 공유하는 기본 거래일 달력 (처음 호출될 때 만든다)
+    """
+    global _default_calendar
+    if _default_calendar is None:
+        _default_calendar = TradingCalendar.default()
+    return _default_calendar
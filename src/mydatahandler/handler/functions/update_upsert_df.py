@@ -1,7 +1,10 @@
 # Public imports
+from typing import Tuple
+import numpy as np
 import pandas as pd
 
 # Private imports
+from mydatahandler.handler.functions.date_slice import date_row_slice
 
 from mystockutil.logging.logging_setup import CustomAdapter, logger as original_logger
 logger = CustomAdapter(original_logger, {'prefix': 'UpdateDFWithOtherDF'})
@@ -9,9 +12,85 @@ logger = CustomAdapter(original_logger, {'prefix': 'UpdateDFWithOtherDF'})
 """
 DF를 다른 DF로 업데이트하는 모듈
 """
+def _target_positions(df: pd.DataFrame, another_df: pd.DataFrame, date_col_name: str = '일자') -> np.ndarray:
+    """
+    another_df의 각 행이 df에서 몇 번째 행인지 반환한다. (없으면 -1)
+    df가 일자순으로 정렬되어 있으면, another_df의 일자 구간만 잘라서 찾는다. (전체 이력과 무관)
+    """
+    index = df.index
+    if isinstance(index, pd.MultiIndex) and index.names[0] == date_col_name and len(another_df):
+        dates = another_df.index.get_level_values(date_col_name)
+        rows = date_row_slice(index, dates.min(), dates.max(), level=date_col_name)
+        positions = index[rows].get_indexer(another_df.index)
+        return np.where(positions >= 0, positions + rows.start, -1)
+    return index.get_indexer(another_df.index)
+
+def _column_dtype(dtype: np.dtype, values: np.ndarray) -> np.dtype:
+    # .loc와 같이, 값을 손실 없이 넣을 수 있으면 칼럼의 dtype을 유지하고 아니면 넓힌다. (예: int32 칼럼에 int64 값)
+    result = np.result_type(dtype, values.dtype)
+    if result != dtype and len(values):
+        with np.errstate(invalid='ignore', over='ignore'):
+            if np.array_equal(values.astype(dtype), values):
+                return dtype
+    return result
+
+def _write_column(column: pd.Series, positions: np.ndarray, values: np.ndarray, inplace: bool) -> pd.Series:
+    """
+    column의 positions 위치에 values를 쓴다.
+    inplace=True이고 dtype을 바꿀 필요가 없으면 column의 배열에 직접 쓰고 None을 반환한다.
+    그 외에는 칼럼을 한 번 복사하여 쓴 새 Series를 반환한다.
+    """
+    if isinstance(column.dtype, np.dtype) and isinstance(values.dtype, np.dtype):
+        arr = column.to_numpy()
+        dtype = _column_dtype(arr.dtype, values)
+        if dtype == arr.dtype and inplace and arr.flags.writeable:
+            arr[positions] = values
+            return None
+        arr = arr.astype(dtype)  # 복사
+        arr[positions] = values
+        return pd.Series(arr, index=column.index, name=column.name, copy=False)
+    column = column.copy()
+    column.iloc[positions] = values
+    return column
+
+def update_df_positional(
+    df: pd.DataFrame,
+    another_df: pd.DataFrame,
+    inplace: bool = False,
+    date_col_name: str = '일자',
+) -> pd.DataFrame:
+    """
+    update_df_with_another_df의 위치 기반 구현
+    대상 행의 위치를 (another_df의 일자 구간 안에서) get_indexer로 한 번만 구하고, 칼럼 배열에 위치로 값을 쓴다.
+    인덱스가 바뀌지 않으므로 다시 정렬하지 않는다.
+    df: 인덱스가 정렬되어 있고 중복이 없어야 한다.
+    inplace:
+        True이면 df의 칼럼 배열에 직접 쓰고 df를 반환한다.
+        False이면 갱신하는 칼럼만 새 배열로 만들고, 나머지 칼럼은 df와 공유하는 새 DataFrame을 반환한다. (df는 그대로)
+    """
+    common_columns = [col for col in df.columns if col in another_df.columns]
+    if not common_columns:
+        logger.warning("another_df와 df에 공통 칼럼이 없습니다. 업데이트하지 않습니다.")
+        return df
+    positions = _target_positions(df, another_df, date_col_name)
+    valid = positions >= 0
+    if not valid.all():
+        logger.warning(f"another_df의 일부 인덱스가 df에 존재하지 않습니다. 무시됨. count={int((~valid).sum())}")
+    if not valid.any():
+        logger.warning("another_df에 df의 index와 동일한 인덱스가 없어 업데이트하지 않습니다.")
+        return df
+    positions = positions[valid]
+    result = df if inplace else df.copy(deep=False)
+    for col in common_columns:
+        column = _write_column(df[col], positions, another_df[col].to_numpy()[valid], inplace=inplace)
+        if column is not None:
+            result[col] = column
+    return result
+
 def update_df_with_another_df(
     df: pd.DataFrame, 
     another_df: pd.DataFrame, 
+    copy: bool = True,
 ) -> pd.DataFrame:
     """
     df에 있는 칼럼들의 값을 another_df의 값으로 업데이트한다. 
@@ -26,10 +105,16 @@ def update_df_with_another_df(
         오늘 데이터프레임
         index: 구조 동일
         columns: 다양한 칼럼이 있을 수 있으며, df와 겹치는 칼럼만 업데이트
+    - copy: bool
+        False이면 갱신한 칼럼만 새로 만들고, 나머지 칼럼은 df와 메모리를 공유한다. (df는 변경되지 않음)
 
     Returns:
     - pd.DataFrame: 업데이트된 복사본
+    
+    df가 정렬되어 있고 인덱스에 중복이 없으면 update_df_positional로 처리한다.
     """
+    if df.index.is_monotonic_increasing and df.index.is_unique:
+        return update_df_positional(df.copy() if copy else df, another_df, inplace=copy)
     # 복사 및 소팅
     df = df.sort_index()
     another_df = another_df.sort_index()
@@ -60,13 +145,158 @@ def update_df_with_another_df(
     df.sort_index(inplace=True)  # 인덱스 정렬
     return df
 
+def _packed_keys(index: pd.MultiIndex, date_codes: np.ndarray, symbol_codes: np.ndarray) -> np.ndarray:
+    """
+    [일자, 종목코드] 인덱스를 (일자 번호 << 32 | 종목 번호)의 int64 키로 만든다.
+    date_codes, symbol_codes: index의 각 레벨 값이 합친 레벨에서 몇 번째인지
+    키의 대소는 (일자, 종목코드) 순서와 같다.
+    """
+    return (date_codes[index.codes[0]].astype(np.int64) << 32) | symbol_codes[index.codes[1]].astype(np.int64)
+
+def _unchanged_rows(df: pd.DataFrame, similar_df: pd.DataFrame, old_positions: np.ndarray, columns: list) -> np.ndarray:
+    # similar_df의 각 행이 df의 old_positions 행과 모든 칼럼 값이 같은지 (둘 다 결측이면 같은 것으로 본다)
+    same = np.ones(len(similar_df), dtype=bool)
+    for col in columns:
+        old = df[col].take(old_positions).to_numpy()
+        new = similar_df[col].to_numpy()
+        equal = np.asarray(old == new, dtype=bool)
+        equal |= np.asarray(pd.isna(old) & pd.isna(new), dtype=bool)
+        same &= equal
+    return same
+
+def _old_runs(insert_positions: np.ndarray, n_old: int) -> list:
+    """
+    df의 행들이 결과에서 연속으로 놓이는 구간들 [(시작, 끝, 결과 시작 위치), ...]
+    끼워 넣는 위치가 없으면 구간은 하나(전체)이다.
+    """
+    boundaries, counts = np.unique(insert_positions, return_counts=True)
+    starts = np.concatenate([[0], boundaries])
+    stops = np.concatenate([boundaries, [n_old]])
+    shifts = np.concatenate([[0], np.cumsum(counts)])
+    return [(int(a), int(b), int(a + shift)) for a, b, shift in zip(starts, stops, shifts) if b > a]
+
+def _merge_column(old: pd.Series, new: pd.Series, old_out, new_out: np.ndarray, size: int) -> pd.Series:
+    """
+    old의 값을 old_out 위치에, new의 값을 new_out 위치에 둔 길이 size의 칼럼
+    old_out: 결과 위치 배열 또는 _old_runs의 구간 목록 (구간별로 이어서 복사)
+    numpy dtype이면 결과 배열을 한 번만 만들어 위치로 쓴다.
+    """
+    def scatter(out: np.ndarray, old_values: np.ndarray, new_values: np.ndarray) -> np.ndarray:
+        if isinstance(old_out, list):
+            for start, stop, out_start in old_out:
+                out[out_start:out_start + stop - start] = old_values[start:stop]
+        else:
+            out[old_out] = old_values
+        out[new_out] = new_values
+        return out
+
+    if isinstance(old.dtype, np.dtype) and isinstance(new.dtype, np.dtype):
+        dtype = np.result_type(old.dtype, new.dtype)
+        if dtype.kind in 'OSU':
+            dtype = np.dtype(object)
+        out = scatter(np.empty(size, dtype=dtype), old.to_numpy(), new.to_numpy())
+        return pd.Series(out, name=old.name, copy=False)
+    if old.dtype == new.dtype and isinstance(old.dtype, pd.CategoricalDtype):
+        codes = scatter(np.empty(size, dtype=old.cat.codes.dtype), old.cat.codes.to_numpy(), new.cat.codes.to_numpy())
+        return pd.Series(pd.Categorical.from_codes(codes, dtype=old.dtype), name=old.name, copy=False)
+    # 그 외의 확장 dtype은 pandas의 concat 규칙을 따른다.
+    order = scatter(np.empty(size, dtype=np.int64), np.arange(len(old)), np.arange(len(new)) + len(old))
+    values = pd.concat([old.reset_index(drop=True), new.reset_index(drop=True)], ignore_index=True)
+    return values.take(order).reset_index(drop=True)
+
+def _can_merge(df: pd.DataFrame, similar_df: pd.DataFrame) -> bool:
+    # merge_upsert_df를 사용할 수 있는지 확인한다.
+    for frame in (df, similar_df):
+        if not isinstance(frame.index, pd.MultiIndex) or frame.index.nlevels != 2:
+            return False
+    if list(df.index.names) != list(similar_df.index.names) or set(df.columns) != set(similar_df.columns):
+        return False
+    return df.index.is_monotonic_increasing and df.index.is_unique
+
+def merge_upsert_df(
+    df: pd.DataFrame,
+    similar_df: pd.DataFrame,
+    skip_unchanged: bool = False,
+    date_col_name: str = '일자',
+) -> Tuple[pd.DataFrame, pd.DatetimeIndex]:
+    """
+    upsert_df_with_similar_df의 정렬 병합(sorted merge) 구현
+    df와 similar_df가 모두 [일자, 종목코드] 순으로 정렬되어 있으므로, 전체를 다시 정렬하지 않고 한 번에 병합한다.
+        1. 두 인덱스를 같은 레벨 기준의 int64 키 (일자 << 32 | 종목)로 만든다.
+        2. similar_df의 키를 df의 키에서 searchsorted로 찾아, 같은 키는 덮어쓰고(last-writer-wins) 없는 키는 끼워 넣는다.
+        3. 끼워 넣는 위치별 개수(bincount)의 누적합으로 df 각 행의 결과 위치를 구한다.
+        4. 칼럼마다 결과 배열을 한 번만 만들어 위치로 값을 쓴다. (df의 행은 끼워 넣는 위치 사이의 구간별로 이어서 복사)
+    df: 인덱스가 정렬되어 있고 중복이 없어야 한다. 칼럼 구성이 similar_df와 같아야 한다.
+    similar_df: 인덱스에 중복이 있으면 나중 행이 남는다.
+    skip_unchanged:
+        True이면 df와 모든 값이 같은 similar_df의 행은 쓰지 않는다.
+        바뀐 행이 하나도 없으면 df를 그대로 반환한다.
+    Returns: (merged_df, changed_dates)
+        changed_dates: 실제로 값이 추가/변경된 일자
+    """
+    if similar_df.index.has_duplicates:
+        similar_df = similar_df[~similar_df.index.duplicated(keep='last')]
+    if not similar_df.index.is_monotonic_increasing:
+        similar_df = similar_df.sort_index()
+    old_index, new_index = df.index, similar_df.index
+    date_level = old_index.levels[0].union(new_index.levels[0])
+    symbol_level = old_index.levels[1].union(new_index.levels[1])
+    old_keys = _packed_keys(old_index, date_level.get_indexer(old_index.levels[0]), symbol_level.get_indexer(old_index.levels[1]))
+    new_keys = _packed_keys(new_index, date_level.get_indexer(new_index.levels[0]), symbol_level.get_indexer(new_index.levels[1]))
+
+    positions = np.searchsorted(old_keys, new_keys)
+    matched = positions < len(old_keys)
+    matched[matched] = old_keys[positions[matched]] == new_keys[matched]
+    if skip_unchanged and matched.any():
+        unchanged = np.zeros(len(new_keys), dtype=bool)
+        unchanged[matched] = _unchanged_rows(df, similar_df.iloc[np.flatnonzero(matched)], positions[matched], list(df.columns))
+        if unchanged.any():
+            keep = ~unchanged
+            similar_df, new_keys, positions, matched = similar_df[keep], new_keys[keep], positions[keep], matched[keep]
+    changed_dates = pd.DatetimeIndex(similar_df.index.get_level_values(date_col_name).unique())
+    if similar_df.empty:
+        return df, changed_dates
+
+    # 결과 위치: df의 i번째 행 앞에 끼워 넣는 행의 수만큼 뒤로 밀린다.
+    inserted = ~matched
+    insert_positions = positions[inserted]
+    shift = np.cumsum(np.bincount(insert_positions, minlength=len(old_keys) + 1))
+    old_out = np.arange(len(old_keys)) + shift[:len(old_keys)]
+    new_out = np.empty(len(new_keys), dtype=np.int64)
+    new_out[matched] = old_out[positions[matched]]
+    # 같은 위치에 끼워 넣는 행들은 similar_df 순서(키 순서)대로 놓인다.
+    new_out[inserted] = insert_positions + np.arange(len(insert_positions))
+    size = len(old_keys) + len(insert_positions)
+
+    keys = np.empty(size, dtype=np.int64)
+    keys[old_out] = old_keys
+    keys[new_out] = new_keys
+    index = pd.MultiIndex(
+        levels=[date_level, symbol_level],
+        codes=[keys >> 32, keys & 0xFFFFFFFF],
+        names=old_index.names,
+        verify_integrity=False,
+    )
+    # df의 행은 끼워 넣는 위치 사이사이에서 연속이므로, 구간이 적으면 구간별로 이어서 복사한다.
+    runs = _old_runs(insert_positions, len(old_keys))
+    old_place = runs if len(runs) <= max(len(old_keys) // 1024, 1) else old_out
+    columns = {col: _merge_column(df[col], similar_df[col], old_place, new_out, size) for col in df.columns}
+    result = pd.DataFrame(columns, columns=df.columns, copy=False)
+    result.index = index
+    return result, changed_dates
+
 def upsert_df_with_similar_df(
     df: pd.DataFrame, 
     similar_df: pd.DataFrame, 
+    skip_unchanged: bool = False,
     ) -> pd.DataFrame:
     """
     df를 다른 동일한 구조의 similar_df로 업데이트 합니다. df가 비어있으면 similar_df를 그대로 반환합니다.
+    두 DataFrame이 같은 칼럼의 정렬된 [일자, 종목코드] 인덱스를 가지면 merge_upsert_df로 병합합니다.
+    skip_unchanged: True이면 값이 바뀌지 않은 행은 쓰지 않습니다. (merge_upsert_df 참고)
     """
+    if not df.empty and not similar_df.empty and _can_merge(df, similar_df):
+        return merge_upsert_df(df, similar_df, skip_unchanged=skip_unchanged)[0]
     df = df.copy()  # 원본 DataFrame을 변경하지 않도록 복사본 생성
     if df.empty:
         logger.warning("df가 비어있습니다. similar_df를 그대로 반환합니다.")
@@ -83,4 +313,4 @@ def upsert_df_with_similar_df(
         df = pd.concat([df_without_common, similar_df])
     
     # 필요에 따라 인덱스 정렬
-    return df.sort_index()
\ No newline at end of file
+    return df.sort_index()
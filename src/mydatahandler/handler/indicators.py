@@ -0,0 +1,231 @@
+from typing import TYPE_CHECKING, Dict
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from mydatahandler.handler.stock_data_handler import StockDataHandler
+
+"""
+종목별 이동평균, N일 수익률, 이동 최대/최소, 이동 합계를 벡터 연산으로 계산하는 모듈
+groupby('종목코드').rolling(window)와 같이 각 종목의 관측치(거래일) 기준으로 window를 잡는다.
+    - (일자 x 종목) 격자에서 데이터가 있는 칸만 종목별로 모은(packed) 1차원 배열에서 계산한다.
+      종목코드 codes를 stable 정렬하면 종목 안에서는 일자순이 유지된다.
+    - 각 원소가 속한 종목의 시작 위치(group start)보다 window가 앞으로 넘어가면 NaN
+      따라서 중간에 상장/상장폐지된 종목도 자기 관측치만으로 계산된다.
+    - window 안에 NaN이 있으면 NaN (pandas rolling의 min_periods=window와 동일)
+결과는 (지표, 칼럼, window, 데이터 버전)별로 캐시하고,
+하루치 데이터가 append된 경우에는 종목별 마지막 관측치 버퍼로 새 일자만 계산하여 이어 붙인다.
+"""
+
+"""
+커널: x는 종목별로 모은 값, start는 각 원소가 속한 종목의 시작 위치
+"""
+def _window_start(start: np.ndarray, n: int) -> (np.ndarray, np.ndarray):
+    # window [i-n+1, i]의 시작 위치와, 같은 종목 안에 있는지 여부
+    lo = np.arange(len(start)) - n + 1
+    return np.maximum(lo, 0), lo >= start
+
+def rolling_sum(x: np.ndarray, start: np.ndarray, n: int) -> np.ndarray:
+    lo, inside = _window_start(start, n)
+    valid = np.isfinite(x)
+    csum = np.concatenate([[0.0], np.cumsum(np.where(valid, x, 0.0))])
+    ccount = np.concatenate([[0], np.cumsum(valid)])
+    i = np.arange(len(x))
+    total = csum[i + 1] - csum[lo]
+    ok = inside & (ccount[i + 1] - ccount[lo] == n)
+    return np.where(ok, total, np.nan)
+
+def rolling_mean(x: np.ndarray, start: np.ndarray, n: int) -> np.ndarray:
+    return rolling_sum(x, start, n) / n
+
+def _rolling_extreme(x: np.ndarray, start: np.ndarray, n: int, ufunc) -> np.ndarray:
+    """
+    van Herk/Gil-Werman: 길이 n의 블록마다 앞쪽 누적값과 뒤쪽 누적값을 구해
+    window [i-n+1, i]의 값을 두 값의 비교 한 번으로 구한다. (window 크기와 무관하게 O(len(x)))
+    """
+    length = len(x)
+    if length == 0:
+        return x.astype(np.float64)
+    n_blocks = -(-length // n)
+    fill = -np.inf if ufunc is np.maximum else np.inf
+    padded = np.full(n_blocks * n, fill)
+    padded[:length] = x
+    blocks = padded.reshape(n_blocks, n)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    lo, inside = _window_start(start, n)
+    i = np.arange(length)
+    out = ufunc(suffix[lo], prefix[i])
+    return np.where(inside, out, np.nan)
+
+def rolling_max(x: np.ndarray, start: np.ndarray, n: int) -> np.ndarray:
+    return _rolling_extreme(x, start, n, np.maximum)
+
+def rolling_min(x: np.ndarray, start: np.ndarray, n: int) -> np.ndarray:
+    return _rolling_extreme(x, start, n, np.minimum)
+
+def returns(x: np.ndarray, start: np.ndarray, n: int) -> np.ndarray:
+    # n 관측치 전 대비 수익률
+    i = np.arange(len(x))
+    prev = i - n
+    ok = prev >= start
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = x / x[np.maximum(prev, 0)] - 1
+    return np.where(ok, out, np.nan)
+
+"""
+버퍼 커널: buf는 종목별 마지막 lookback개의 관측치 (부족하면 앞쪽이 NaN)
+"""
+def _buffer_sum(buf: np.ndarray, n: int) -> np.ndarray:
+    return buf[:, -n:].sum(axis=1)
+
+INDICATORS = {
+    # 이름: (전체 계산 커널, 버퍼 커널, window -> 필요한 관측치 수)
+    'sum': (rolling_sum, _buffer_sum, lambda n: n),
+    'sma': (rolling_mean, lambda buf, n: _buffer_sum(buf, n) / n, lambda n: n),
+    'max': (rolling_max, lambda buf, n: buf[:, -n:].max(axis=1), lambda n: n),
+    'min': (rolling_min, lambda buf, n: buf[:, -n:].min(axis=1), lambda n: n),
+    'returns': (returns, lambda buf, n: buf[:, -1] / buf[:, -1 - n] - 1, lambda n: n + 1),
+}
+
+class _Entry:
+    """
+    캐시된 지표 결과
+    values: self.df 행 순서의 결과
+    buf: 종목별 마지막 lookback개의 관측치 (append 시 이어서 계산하기 위함)
+    rows: 종목코드 -> buf의 행 번호
+    """
+    def __init__(self, version: int, last_date: pd.Timestamp, values: np.ndarray, buf: np.ndarray, rows: Dict[str, int]):
+        self.version = version
+        self.last_date = last_date
+        self.values = values
+        self.buf = buf
+        self.rows = rows
+
+
+class IndicatorEngine:
+    """
+    StockDataHandler.indicators로 사용한다.
+    예: dh.indicators.sma('종가', 20), dh.indicators.returns('종가', 5), dh.indicators.rolling_max('고가', 52)
+    결과는 self.df와 같은 [일자, 종목코드] 멀티인덱스의 Series이며, 캐시된 배열을 공유하므로 읽기 전용이다.
+    """
+    def __init__(self, handler: 'StockDataHandler'):
+        self._handler = handler
+        self._cache: Dict[tuple, _Entry] = {}
+        self.full_computes = 0  # 전체 계산 횟수
+        self.incremental_updates = 0  # append된 일자만 계산한 횟수
+
+    def sma(self, column: str, window: int) -> pd.Series:
+        return self.compute('sma', column, window)
+    def rolling_sum(self, column: str, window: int) -> pd.Series:
+        return self.compute('sum', column, window)
+    def rolling_max(self, column: str, window: int) -> pd.Series:
+        return self.compute('max', column, window)
+    def rolling_min(self, column: str, window: int) -> pd.Series:
+        return self.compute('min', column, window)
+    def returns(self, column: str, periods: int) -> pd.Series:
+        return self.compute('returns', column, periods)
+
+    def clear(self):
+        self._cache.clear()
+
+    def compute(self, name: str, column: str, window: int) -> pd.Series:
+        """
+        name: INDICATORS의 키 ('sum', 'sma', 'max', 'min', 'returns')
+        """
+        if name not in INDICATORS:
+            raise ValueError(f"name must be one of {list(INDICATORS)}")
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        handler = self._handler
+        key = (name, column, window)
+        entry = self._cache.get(key)
+        if entry is None or entry.version != handler._version:
+            if entry is not None and entry.last_date is not None and entry.version >= handler._base_version:
+                # 이후의 변경이 모두 append뿐이면 새 일자만 계산한다.
+                entry = self._extend(entry, name, column, window)
+                self.incremental_updates += 1
+            else:
+                entry = self._compute_full(name, column, window)
+                self.full_computes += 1
+            self._cache[key] = entry
+        return pd.Series(entry.values, index=self._index(), name=f"{column}_{name}{window}")
+
+    def _index(self) -> pd.MultiIndex:
+        handler = self._handler
+        if handler._df is None and handler._panel is not None:
+            return handler._panel.to_frame(columns=[]).index
+        return handler.df.index
+
+    def _packed(self, column: str):
+        """
+        self.df 행 순서의 값과 종목 codes, 종목 레벨을 반환한다.
+        """
+        handler = self._handler
+        if handler._df is None and handler._panel is not None:
+            panel = handler._panel
+            mask = panel.mask
+            _, codes = np.nonzero(mask)
+            x = np.asarray(panel.values[column][mask], dtype=np.float64)
+            return x, codes, panel.symbols
+        df = handler.df
+        level_num = df.index.names.index(handler.symbol_col_name)
+        codes = np.asarray(df.index.codes[level_num])
+        x = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        return x, codes, df.index.levels[level_num].to_numpy(dtype=object)
+
+    def _compute_full(self, name: str, column: str, window: int) -> _Entry:
+        handler = self._handler
+        kernel, _, lookback = INDICATORS[name]
+        x, codes, symbols = self._packed(column)
+        # 종목별로 모으기 (종목 안에서는 일자순 유지). codes가 작은 정수이므로 stable 정렬은 radix 정렬로 처리된다.
+        if len(symbols) < np.iinfo(np.int16).max:
+            codes = codes.astype(np.int16, copy=False)
+        order = np.argsort(codes, kind='stable')
+        counts = np.bincount(codes, minlength=len(symbols))
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        packed = x[order]
+        start = np.repeat(starts, counts)
+        out = np.empty(len(x), dtype=np.float64)
+        out[order] = kernel(packed, start, window)
+        out.flags.writeable = False
+
+        # 종목별 마지막 관측치 버퍼
+        size = lookback(window)
+        present = np.flatnonzero(counts)
+        idx = ends[present, None] - size + np.arange(size)
+        buf = np.where(idx >= starts[present, None], packed[np.maximum(idx, 0)], np.nan)
+        rows = {symbol: i for i, symbol in enumerate(symbols[present])}
+        last_date = handler.last_date if len(x) else None
+        return _Entry(handler._version, last_date, out, buf, rows)
+
+    def _extend(self, entry: _Entry, name: str, column: str, window: int) -> _Entry:
+        """
+        entry.last_date 이후에 append된 일자들만 버퍼로 계산하여 이어 붙인다.
+        """
+        handler = self._handler
+        _, buffer_kernel, lookback = INDICATORS[name]
+        new_df = handler.df_after(entry.last_date)
+        dates = new_df.index.get_level_values(handler.date_col_name)
+        symbols = new_df.index.get_level_values(handler.symbol_col_name)
+        x = new_df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        buf, rows = entry.buf.copy(), dict(entry.rows)
+        # 새로 상장된 종목의 버퍼 추가
+        new_symbols = [symbol for symbol in symbols.unique() if symbol not in rows]
+        if new_symbols:
+            rows.update({symbol: len(buf) + i for i, symbol in enumerate(new_symbols)})
+            buf = np.vstack([buf, np.full((len(new_symbols), buf.shape[1]), np.nan)])
+        positions = np.fromiter((rows[symbol] for symbol in symbols), dtype=np.int64, count=len(symbols))
+        out = np.empty(len(x), dtype=np.float64)
+        boundaries = np.flatnonzero(dates[1:] != dates[:-1]) + 1
+        for rng in np.split(np.arange(len(x)), boundaries):
+            if len(rng) == 0:
+                continue
+            pos = positions[rng]
+            buf[pos] = np.concatenate([buf[pos, 1:], x[rng, None]], axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                out[rng] = buffer_kernel(buf[pos], window)
+        values = np.concatenate([entry.values, out])
+        values.flags.writeable = False
+        return _Entry(handler._version, handler.last_date, values, buf, rows)
@@ -0,0 +1,147 @@
+import bisect
+import unicodedata
+from typing import Dict, Iterable, List, Set, Tuple
+
+"""
+종목명 검색 인덱스 (SingledayDataHandler.search_stocks)
+입력 중인 일부 종목명으로 종목을 찾는다. 예: '삼성', '전자', 'ㅅㅅㅈㅈ', '삼성ㅈ', 'sk하'
+    - 정규화: NFC(자모가 분리된 입력 합치기), 소문자(casefold), 공백 제거
+    - 앞부분 일치: 정렬된 종목명 배열에서 bisect
+    - 부분 일치: 2글자(bigram) 역색인의 후보 교집합을 구한 후 확인
+    - 초성: 종목명을 초성 문자열로 바꾼 인덱스. 입력이 'ㅅㅅㅈㅈ'처럼 초성만이면 초성 인덱스에서,
+      '삼성ㅈ'처럼 음절과 초성이 섞여 있으면 입력 전체를 초성으로 바꿔 후보를 찾은 후 글자별로 확인한다.
+    - 숫자만 입력하면 종목코드 앞부분 일치
+순위: 정확히 일치 > 앞부분 일치 > 부분 일치(앞쪽일수록) > 초성 일치, 같은 순위에서는 짧은 종목명 우선
+"""
+
+_CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+_CHOSEONG_SET = frozenset(_CHOSEONG)
+_SYLLABLE_FIRST, _SYLLABLE_LAST = 0xAC00, 0xD7A3
+
+def normalize_name(text: str) -> str:
+    """
+    검색용 정규화: NFC, casefold, 공백 제거
+    """
+    return ''.join(unicodedata.normalize('NFC', str(text)).casefold().split())
+
+def _choseong_of(char: str) -> str:
+    code = ord(char)
+    if _SYLLABLE_FIRST <= code <= _SYLLABLE_LAST:
+        return _CHOSEONG[(code - _SYLLABLE_FIRST) // 588]
+    return char
+
+def to_choseong(text: str) -> str:
+    """
+    한글 음절을 초성으로 바꾼다. (그 외의 글자는 그대로) 예: '삼성전자' -> 'ㅅㅅㅈㅈ'
+    """
+    return ''.join(_choseong_of(char) for char in text)
+
+def _char_matches(query_char: str, name_char: str) -> bool:
+    # 초성 자모는 그 초성으로 시작하는 음절과 일치한다.
+    return query_char == name_char or (query_char in _CHOSEONG_SET and _choseong_of(name_char) == query_char)
+
+def _find_mixed(name: str, query: str) -> int:
+    """
+    음절과 초성이 섞인 query가 name에서 처음 일치하는 위치 (없으면 -1)
+    """
+    for start in range(len(name) - len(query) + 1):
+        if all(_char_matches(q, c) for q, c in zip(query, name[start:start + len(query)])):
+            return start
+    return -1
+
+
+class _SubstringIndex:
+    """
+    문자열 목록에 대한 앞부분/부분 일치 검색
+    sorted_keys: 정렬된 (문자열, id), grams: 글자/2글자 -> id 집합
+    """
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.sorted_keys = sorted((text, i) for i, text in enumerate(texts))
+        self._sorted_texts = [text for text, _ in self.sorted_keys]
+        self.grams: Dict[str, Set[int]] = {}
+        for i, text in enumerate(texts):
+            for gram in self._grams(text):
+                self.grams.setdefault(gram, set()).add(i)
+
+    @staticmethod
+    def _grams(text: str) -> Iterable[str]:
+        yield from set(text)
+        yield from {text[j:j + 2] for j in range(len(text) - 1)}
+
+    def prefix(self, query: str) -> List[int]:
+        lo = bisect.bisect_left(self._sorted_texts, query)
+        hi = bisect.bisect_left(self._sorted_texts, query + '\U0010ffff', lo)
+        return [i for _, i in self.sorted_keys[lo:hi]]
+
+    def candidates(self, query: str) -> Set[int]:
+        """
+        query를 포함할 수 있는 id (query의 모든 글자/2글자를 가진 문자열). 확인은 호출하는 쪽에서 한다.
+        """
+        grams = [query[j:j + 2] for j in range(len(query) - 1)] if len(query) > 1 else [query]
+        postings = sorted((self.grams.get(gram, set()) for gram in set(grams)), key=len)
+        if not postings or not postings[0]:
+            return set()
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+
+class NameSearchIndex:
+    """
+    종목코드/종목명 목록으로 만드는 검색 인덱스. 만든 후에는 바뀌지 않는다.
+    """
+    def __init__(self, symbols: Iterable[str], names: Iterable[str]):
+        pairs = [(str(symbol), str(name)) for symbol, name in zip(symbols, names) if isinstance(name, str)]
+        self.symbols = [symbol for symbol, _ in pairs]
+        self.names = [name for _, name in pairs]
+        self._normalized = [normalize_name(name) for name in self.names]
+        self._names = _SubstringIndex(self._normalized)
+        self._choseong = _SubstringIndex([to_choseong(name) for name in self._normalized])
+        self._sorted_symbols = sorted((symbol, i) for i, symbol in enumerate(self.symbols))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """
+        query와 일치하는 종목을 순위순으로 최대 limit개 반환한다.
+        Returns: [(종목코드, 종목명), ...]
+        """
+        query = normalize_name(query)
+        if not query or limit <= 0:
+            return []
+        ranks: Dict[int, tuple] = {}  # id -> (순위, 일치 위치)
+        def add(ids: Iterable[int], rank: int, position=lambda i: 0):
+            for i in ids:
+                key = (rank, position(i))
+                if i not in ranks or key < ranks[i]:
+                    ranks[i] = key
+
+        if query.isdigit():
+            lo = bisect.bisect_left(self._sorted_symbols, (query,))
+            hi = bisect.bisect_left(self._sorted_symbols, (query + '\U0010ffff',), lo)
+            add((i for _, i in self._sorted_symbols[lo:hi]), 0)
+        jamo = [char in _CHOSEONG_SET for char in query]
+        if not any(jamo):
+            prefix = self._names.prefix(query)
+            add((i for i in prefix if self._normalized[i] == query), 0)
+            add(prefix, 1)
+            found = (i for i in self._names.candidates(query) if query in self._normalized[i])
+            add(found, 2, lambda i: self._normalized[i].find(query))
+        elif all(jamo):
+            add(self._choseong.prefix(query), 3)
+            found = (i for i in self._choseong.candidates(query) if query in self._choseong.texts[i])
+            add(found, 4, lambda i: self._choseong.texts[i].find(query))
+        else:
+            # 초성이 섞인 입력: 초성 인덱스에서 후보를 찾고 글자별로 확인한다.
+            for i in self._choseong.candidates(to_choseong(query)):
+                position = _find_mixed(self._normalized[i], query)
+                if position >= 0:
+                    add([i], 1 if position == 0 else 2, lambda i: position)
+
+        best = sorted(ranks, key=lambda i: (ranks[i], len(self.names[i]), self.names[i]))[:limit]
+        return [(self.symbols[i], self.names[i]) for i in best]
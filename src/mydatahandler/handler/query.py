@@ -0,0 +1,214 @@
+import operator
+from typing import TYPE_CHECKING, List
+import numpy as np
+import pandas as pd
+
+from mydatahandler.handler.functions import date_row_slice, necessary_symbols_mask
+
+if TYPE_CHECKING:
+    from mydatahandler.handler.stock_data_handler import StockDataHandler
+
+"""
+StockDataHandler에 대한 지연(lazy) 쿼리
+    dh.query().dates(a, b).symbols([...]).columns(['종가']).filtered().collect()
+메쏘드 호출은 연산을 기록만 하고, collect()에서 한 번에 실행한다.
+실행 순서는 호출 순서와 무관하게
+    1. 일자 구간 (이진탐색으로 행 구간을 구함)
+    2. 종목 (종목 인덱스로 행 위치를 구함)
+    3. where / filtered (필요한 칼럼만 읽어서 행 마스크 계산)
+    4. 칼럼 선택과 함께 결과 DataFrame을 한 번만 만든다.
+"""
+
+_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    'in': lambda values, other: values.isin(other),
+}
+
+class StockQuery:
+    def __init__(self, handler:'StockDataHandler'):
+        self._handler = handler
+        self._ops:List[tuple] = []  # 기록된 연산 (이름, 인자...)
+
+    def _add(self, *op) -> 'StockQuery':
+        query = StockQuery(self._handler)
+        query._ops = self._ops + [op]
+        return query
+
+    """
+    연산 기록. 각 메쏘드는 새 StockQuery를 반환하므로 중간 쿼리를 재사용할 수 있다.
+    """
+    def dates(self, from_date:pd.Timestamp=None, to_date:pd.Timestamp=None) -> 'StockQuery':
+        """
+        from_date ~ to_date (양 끝 포함) 구간으로 제한한다. 여러 번 호출하면 교집합
+        """
+        from_date = None if from_date is None else pd.to_datetime(from_date).normalize()
+        to_date = None if to_date is None else pd.to_datetime(to_date).normalize()
+        return self._add('dates', from_date, to_date)
+    def recent(self, days:int) -> 'StockQuery':
+        """
+        최근 days개 일자로 제한한다.
+        """
+        return self._add('recent', days)
+    def symbols(self, symbols:List[str]) -> 'StockQuery':
+        """
+        symbols 종목으로 제한한다. 없는 종목은 무시한다. 여러 번 호출하면 교집합
+        """
+        return self._add('symbols', list(symbols))
+    def columns(self, columns:List[str]) -> 'StockQuery':
+        """
+        결과에 포함할 칼럼. 여러 번 호출하면 마지막 호출 기준
+        """
+        return self._add('columns', list(columns))
+    def where(self, column:str, op:str, value) -> 'StockQuery':
+        """
+        칼럼 조건으로 행을 제한한다. op: '==', '!=', '>', '>=', '<', '<=', 'in'
+        예: .where('거래대금', '>=', 1e9)
+        """
+        if op not in _OPERATORS:
+            raise ValueError(f"op must be one of {list(_OPERATORS)}")
+        return self._add('where', column, op, value)
+    def filtered(self) -> 'StockQuery':
+        """
+        remove_unnecessary_symbols와 같은 기준으로 불필요한 종목을 제외한다.
+        """
+        return self._add('filtered')
+
+    """
+    실행 계획
+    """
+    def plan(self) -> dict:
+        """
+        기록된 연산을 실행 순서대로 정리한다.
+        """
+        plan = {'from_date': None, 'to_date': None, 'recent': None, 'symbols': None,
+                'columns': None, 'where': [], 'filtered': False}
+        for name, *args in self._ops:
+            if name == 'dates':
+                from_date, to_date = args
+                if from_date is not None:
+                    plan['from_date'] = from_date if plan['from_date'] is None else max(plan['from_date'], from_date)
+                if to_date is not None:
+                    plan['to_date'] = to_date if plan['to_date'] is None else min(plan['to_date'], to_date)
+            elif name == 'recent':
+                plan['recent'] = args[0] if plan['recent'] is None else min(plan['recent'], args[0])
+            elif name == 'symbols':
+                symbols = list(dict.fromkeys(args[0]))
+                if plan['symbols'] is not None:
+                    keep = set(plan['symbols'])
+                    symbols = [symbol for symbol in symbols if symbol in keep]
+                plan['symbols'] = symbols
+            elif name == 'columns':
+                plan['columns'] = args[0]
+            elif name == 'where':
+                plan['where'].append(tuple(args))
+            elif name == 'filtered':
+                plan['filtered'] = True
+        return plan
+
+    def _check_columns(self, columns:List[str], all_columns:List[str]):
+        missing = [col for col in columns if col not in all_columns]
+        if missing:
+            raise KeyError(missing)
+
+    def _filter_columns(self, columns:List[str]) -> List[str]:
+        # filtered()에 필요한 칼럼
+        needed = ['종목명']
+        if '시장ID' in columns:
+            needed.append('시장ID')
+        elif '마켓구분' in columns:
+            needed.append('마켓구분')
+        return needed
+
+    def _row_mask(self, plan:dict, column, symbols:pd.Index, all_columns:List[str]) -> np.ndarray:
+        """
+        where와 filtered 조건의 행 마스크. column(col)은 선택된 행의 칼럼 값을 반환한다.
+        """
+        mask = np.ones(len(symbols), dtype=bool)
+        for col, op, value in plan['where']:
+            mask &= np.asarray(_OPERATORS[op](column(col), value), dtype=bool)
+        if plan['filtered']:
+            market_ids = column('시장ID') if '시장ID' in all_columns else None
+            markets = column('마켓구분') if market_ids is None and '마켓구분' in all_columns else None
+            mask &= necessary_symbols_mask(column('종목명'), symbols, market_ids=market_ids, markets=markets)
+        return mask
+
+    def collect(self) -> pd.DataFrame:
+        """
+        쿼리를 실행하여 [일자, 종목코드] 멀티인덱스 DataFrame을 반환한다.
+        연산이 일자 구간뿐이면 self.df의 연속된 구간을 그대로 반환할 수 있으므로 값을 직접 수정하지 말 것
+        """
+        handler, plan = self._handler, self.plan()
+        if handler._panel is not None and handler._df is None:
+            return self._collect_panel(plan)
+        return self._collect_frame(plan)
+
+    def _recent_from_date(self, plan:dict, dates:pd.DatetimeIndex) -> pd.Timestamp:
+        # recent(days)를 시작 일자로 바꾸어 dates와 합친다.
+        from_date = plan['from_date']
+        if plan['recent'] is not None and len(dates):
+            recent_from = dates[max(len(dates) - plan['recent'], 0)]
+            from_date = recent_from if from_date is None else max(from_date, recent_from)
+        return from_date
+
+    def _collect_frame(self, plan:dict) -> pd.DataFrame:
+        handler = self._handler
+        df = handler.df
+        all_columns = list(df.columns)
+        out_columns = all_columns if plan['columns'] is None else plan['columns']
+        self._check_columns(out_columns, all_columns)
+        from_date = plan['from_date']
+        if plan['recent'] is not None:
+            from_date = self._recent_from_date(plan, pd.DatetimeIndex(handler.date_list))
+        # 1. 일자 구간
+        rows = date_row_slice(df.index, from_date, plan['to_date'], level=handler.date_col_name)
+        # 2. 종목
+        if plan['symbols'] is not None:
+            symbol_index = handler._get_symbol_index()
+            positions = [symbol_index.positions(symbol) for symbol in plan['symbols']]
+            positions = np.sort(np.concatenate(positions)) if positions else np.array([], dtype=np.int64)
+            rows = positions[(positions >= rows.start) & (positions < rows.stop)]
+        # 3. 행 조건: 필요한 칼럼의 선택된 행만 읽는다.
+        if plan['where'] or plan['filtered']:
+            symbols = df.index.get_level_values(handler.symbol_col_name)[rows]
+            mask = self._row_mask(plan, lambda col: df[col].iloc[rows], symbols, all_columns)
+            rows = np.arange(rows.start, rows.stop)[mask] if isinstance(rows, slice) else rows[mask]
+        # 4. 칼럼 선택과 함께 한 번만 만든다.
+        if plan['columns'] is None:
+            return df.iloc[rows]
+        return df.iloc[rows, df.columns.get_indexer(out_columns)]
+
+    def _collect_panel(self, plan:dict) -> pd.DataFrame:
+        panel = self._handler._panel
+        all_columns = panel.columns
+        out_columns = all_columns if plan['columns'] is None else plan['columns']
+        self._check_columns(out_columns, all_columns)
+        from_date = self._recent_from_date(plan, panel.date_index())
+        # 1. 일자 구간
+        rows = panel.date_slice(from_date, plan['to_date'])
+        # 2. 종목
+        symbol_positions = None
+        if plan['symbols'] is not None:
+            requested = np.asarray(plan['symbols'], dtype=object)
+            positions = np.searchsorted(panel.symbols, requested)
+            found = positions < len(panel.symbols)
+            found[found] = panel.symbols[positions[found]] == requested[found]
+            symbol_positions = np.unique(positions[found])
+        # 3. 조건에 필요한 칼럼까지만 만든 후, 4. 칼럼 선택
+        needed = list(out_columns)
+        for col, _, _ in plan['where']:
+            needed.append(col)
+        if plan['filtered']:
+            needed += self._filter_columns(all_columns)
+        needed = list(dict.fromkeys(needed))
+        df = panel.to_frame(rows, columns=needed, symbol_positions=symbol_positions)
+        if plan['where'] or plan['filtered']:
+            symbols = df.index.get_level_values(panel.symbol_col_name)
+            df = df[self._row_mask(plan, lambda col: df[col], symbols, all_columns)]
+        if needed != out_columns:
+            df = df[out_columns]
+        return df
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from mydatahandler.handler.dense_panel import DensePanel
+
+"""
+최근 capacity개 일자만 보관하는 DensePanel
+RollingWindowStockDataHandler에서 사용한다.
+일자 축에 capacity + slack개의 행을 미리 할당해 두고, 사용 중인 구간 [_start, _start + _n)을 앞으로 밀어가며 쓴다.
+    - append_date: 일자가 capacity개이면 가장 오래된 일자를 구간에서 빼고(_start += 1) 다음 행에 새 일자를 쓴다. O(종목 수)
+    - 배열의 끝에 닿으면 사용 중인 구간을 새 배열의 앞쪽으로 옮긴다. (slack번의 append마다 한 번, O(capacity x 종목 수))
+      이때 구간 안에 데이터가 없는 종목(상장폐지 등)도 정리하므로, 오래 실행해도 메모리가 늘지 않는다.
+사용 중인 구간은 항상 연속된 행이므로 dates, values, mask 등은 복사 없이 일자순으로 반환된다.
+이미 사용한 행은 다시 쓰지 않으므로(배열을 돌려 쓰지 않음), view()로 만든 스냅샷이 보는 행은 바뀌지 않는다.
+"""
+
+class RollingPanel(DensePanel):
+    def __init__(self, *args, capacity: int = 700, slack: int = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.slack = max(capacity // 4, 1) if slack is None else max(slack, 1)
+        if self._n > capacity:
+            self._start, self._n = self._n - capacity, capacity
+        if len(self._dates) != capacity + self.slack:
+            self._reallocate(capacity + self.slack)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, date_col_name: str = '일자', symbol_col_name: str = '종목코드',
+                   capacity: int = 700, slack: int = None) -> 'RollingPanel':
+        """
+        df의 최근 capacity개 일자로 RollingPanel을 만든다.
+        """
+        panel = DensePanel.from_frame(df, date_col_name, symbol_col_name)
+        return cls.from_panel(panel, capacity=capacity, slack=slack)
+
+    @classmethod
+    def from_panel(cls, panel: DensePanel, capacity: int = 700, slack: int = None) -> 'RollingPanel':
+        rows = slice(max(panel.n_dates - capacity, 0), panel.n_dates)
+        return cls(
+            dates=panel.dates[rows],
+            symbols=panel.symbols,
+            values={col: arr[rows] for col, arr in panel.values.items()},
+            mask=panel.mask[rows],
+            dtypes=dict(panel.dtypes),
+            date_col_name=panel.date_col_name,
+            symbol_col_name=panel.symbol_col_name,
+            capacity=capacity,
+            slack=slack,
+        )
+
+    def take_dates(self, rows: slice) -> 'RollingPanel':
+        return RollingPanel.from_panel(super().take_dates(rows), capacity=self.capacity, slack=self.slack)
+
+    @property
+    def full(self) -> bool:
+        # 다음 append_date에서 가장 오래된 일자가 빠지는지 여부
+        return self._n >= self.capacity
+
+    def append_date(self, date: pd.Timestamp, daily_df: pd.DataFrame):
+        """
+        DensePanel.append_date와 같고, 일자가 capacity개이면 가장 오래된 일자를 뺀다.
+        """
+        date = np.datetime64(pd.Timestamp(date).normalize(), 'ns')
+        if self._n and date <= self.dates[-1]:
+            raise ValueError(f"date {date} must be later than the last date.")
+        if self.full:
+            self._start += 1
+            self._n -= 1
+        super().append_date(date, daily_df)
+
+    def _grow(self):
+        # 배열의 끝에 닿은 경우: 사용 중인 구간과 그 안에 데이터가 있는 종목만 새 배열의 앞쪽으로 옮긴다.
+        present = np.flatnonzero(self.mask.any(axis=0))
+        self._reallocate(self.capacity + self.slack, symbol_positions=None if len(present) == len(self.symbols) else present)
@@ -0,0 +1,256 @@
+import json
+import os
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+"""
+[일자, 종목코드] 멀티인덱스 DataFrame을 multiprocessing.shared_memory에 올려 여러 프로세스가 복사 없이 읽도록 하는 모듈
+    publisher: SharedFramePublisher(name).publish(df)   # 일일 업데이트 후 다시 publish하면 버전이 올라간다.
+    reader: df, attachment = attach_shared_frame(name)  # 숫자형 칼럼, 인덱스 codes가 공유 메모리를 그대로 사용 (읽기 전용)
+
+공유 메모리 블록
+    {name}: 제어 블록. 현재 버전의 manifest(JSON)를 담는다. (seqlock으로 쓰는 도중의 값을 읽지 않도록 함)
+    {name}_v{version}: 데이터 블록. 배열들을 64바이트 단위로 정렬하여 이어 붙인다.
+문자열 칼럼은 codes + categories로 저장하므로 category dtype으로 붙는다.
+다시 publish하면 이전 데이터 블록은 unlink되지만, 이미 붙어 있는 프로세스는 그 버전의 DataFrame을 그대로 읽을 수 있고,
+DataFrame(배열)이 모두 해제되면 매핑도 해제된다.
+"""
+
+CONTROL_SIZE = 1 << 16
+_HEADER = struct.Struct('<QQ')  # seq, manifest 길이
+_ALIGN = 64
+
+def _codes_dtype(n_categories: int) -> np.dtype:
+    # pandas가 codes에 사용하는 dtype과 같게 하여, 붙일 때 다시 변환(복사)하지 않도록 한다.
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+class _AttachedMemory(shared_memory.SharedMemory):
+    """
+    붙은 데이터 블록. 배열이 버퍼를 참조하는 동안에는 close()할 수 없으므로 닫지 않는다.
+    매핑(mmap)은 배열들이 모두 해제될 때 함께 해제된다.
+    """
+    def __del__(self):
+        pass
+
+def _tracker_id():
+    """
+    이 프로세스가 사용하는 resource_tracker의 식별값 (파이프의 장치, inode). 없으면 None
+    multiprocessing으로 만든 자식 프로세스는 부모와 같은 resource_tracker(파이프)를 사용한다.
+    """
+    try:
+        fd = resource_tracker._resource_tracker._fd
+        if fd is None:
+            return None
+        stat = os.fstat(fd)
+        return [stat.st_dev, stat.st_ino]
+    except (AttributeError, OSError):
+        return None
+
+def _attach(name: str, cls=shared_memory.SharedMemory) -> shared_memory.SharedMemory:
+    # Python 3.13 이상은 resource_tracker에 등록하지 않고 붙는다. 그 이전 버전은 _untrack으로 등록을 해제한다.
+    if sys.version_info >= (3, 13):
+        return cls(name=name, track=False)
+    return cls(name=name)
+
+def _untrack(shm: shared_memory.SharedMemory, manifest: dict):
+    """
+    붙기만 한 프로세스가 종료될 때 resource_tracker가 블록을 unlink하지 않도록 등록을 해제한다. (Python < 3.13)
+    publisher와 같은 resource_tracker를 사용하면(같은 프로세스, multiprocessing 자식) 해제하지 않는다.
+    해제하면 publisher의 등록까지 지워져, unlink할 때 KeyError가 나고 publisher가 비정상 종료되면 블록이 남는다.
+    """
+    if sys.version_info >= (3, 13):
+        return
+    tracker = manifest.get('tracker')
+    if tracker is not None and tracker == _tracker_id():
+        return
+    try:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+
+def _frame_arrays(df: pd.DataFrame, date_col_name: str, symbol_col_name: str) -> Tuple[Dict[str, np.ndarray], List[dict]]:
+    """
+    df를 공유 메모리에 올릴 배열들과 칼럼 정보로 나눈다.
+    """
+    index = df.index
+    arrays, columns = {}, []
+    for name in (date_col_name, symbol_col_name):
+        level_num = index.names.index(name)
+        level = index.levels[level_num]
+        arrays[f'level/{name}'] = level.to_numpy(dtype='datetime64[ns]') if name == date_col_name else level.to_numpy().astype(str)
+        arrays[f'codes/{name}'] = np.asarray(index.codes[level_num]).astype(_codes_dtype(len(level)), copy=False)
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufmM':
+            arrays[f'values/{col}'] = series.to_numpy()
+            columns.append({'name': col, 'kind': 'numeric'})
+        else:
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes, categories = series.cat.codes.to_numpy(), series.cat.categories
+            else:
+                codes, categories = pd.factorize(series, sort=True)
+            arrays[f'values/{col}'] = codes.astype(_codes_dtype(len(categories)), copy=False)
+            arrays[f'categories/{col}'] = np.asarray(categories).astype(str)
+            columns.append({'name': col, 'kind': 'category'})
+    return arrays, columns
+
+def _read_manifest(control: shared_memory.SharedMemory, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        seq, length = _HEADER.unpack_from(control.buf, 0)
+        if seq % 2 == 0 and length:
+            raw = bytes(control.buf[_HEADER.size:_HEADER.size + length])
+            if _HEADER.unpack_from(control.buf, 0)[0] == seq:
+                return json.loads(raw)
+        if time.monotonic() > deadline:
+            raise TimeoutError("shared frame manifest is not available.")
+        time.sleep(0.001)
+
+
+class SharedFramePublisher:
+    """
+    df를 공유 메모리에 올리고, 다시 publish할 때마다 버전을 올린다.
+    close()를 호출하면 모든 블록을 unlink한다.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.version = 0
+        self._control: shared_memory.SharedMemory = None
+        self._block: shared_memory.SharedMemory = None
+
+    def publish(self, df: pd.DataFrame, date_col_name: str = '일자', symbol_col_name: str = '종목코드') -> int:
+        """
+        df를 새 데이터 블록에 쓰고 제어 블록의 manifest를 교체한다.
+        Returns: 새 버전
+        """
+        arrays, columns = _frame_arrays(df, date_col_name, symbol_col_name)
+        layout, offset = {}, 0
+        for key, arr in arrays.items():
+            layout[key] = [arr.dtype.str, list(arr.shape), offset]
+            offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+        version = self.version + 1
+        block = shared_memory.SharedMemory(name=f"{self.name}_v{version}", create=True, size=max(offset, 1))
+        for key, arr in arrays.items():
+            dtype, shape, start = layout[key]
+            np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=start)[...] = arr
+        manifest = json.dumps({
+            'version': version,
+            'block': block.name,
+            'arrays': layout,
+            'columns': columns,
+            'date_col_name': date_col_name,
+            'symbol_col_name': symbol_col_name,
+            'tracker': _tracker_id(),  # 붙는 쪽이 같은 resource_tracker인지 확인하기 위함 (_untrack)
+        }).encode()
+        if _HEADER.size + len(manifest) > CONTROL_SIZE:
+            block.close()
+            block.unlink()
+            raise ValueError("manifest is too large for the control block.")
+
+        if self._control is None:
+            self._control = shared_memory.SharedMemory(name=self.name, create=True, size=CONTROL_SIZE)
+            _HEADER.pack_into(self._control.buf, 0, 0, 0)
+        seq, _ = _HEADER.unpack_from(self._control.buf, 0)
+        _HEADER.pack_into(self._control.buf, 0, seq + 1, 0)  # 쓰는 중 (홀수)
+        self._control.buf[_HEADER.size:_HEADER.size + len(manifest)] = manifest
+        _HEADER.pack_into(self._control.buf, 0, seq + 2, len(manifest))
+
+        # 이전 버전은 이름만 제거한다. 이미 붙어 있는 프로세스는 닫을 때까지 읽을 수 있다.
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+        self._block, self.version = block, version
+        return version
+
+    def close(self):
+        for shm in (self._block, self._control):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self._block = self._control = None
+
+
+class SharedFrameAttachment:
+    """
+    attach_shared_frame으로 붙은 버전 정보
+    """
+    def __init__(self, name: str, version: int):
+        self.name = name
+        self.version = version
+
+    def latest_version(self) -> int:
+        """
+        publisher가 마지막으로 publish한 버전
+        """
+        control = _attach(self.name)
+        manifest = {}
+        try:
+            manifest = _read_manifest(control)
+            return manifest['version']
+        finally:
+            _untrack(control, manifest)
+            control.close()
+
+
+def attach_shared_frame(name: str) -> Tuple[pd.DataFrame, SharedFrameAttachment]:
+    """
+    publisher가 올린 최신 버전에 붙어서, 공유 메모리를 그대로 사용하는 DataFrame을 반환한다.
+    숫자형 칼럼과 인덱스 codes는 복사하지 않으며 읽기 전용이다. 문자열 칼럼은 category로 붙는다.
+    Returns: (df, attachment)
+    """
+    control = _attach(name)
+    manifest = {}
+    try:
+        for _ in range(10):
+            manifest = _read_manifest(control)
+            try:
+                block = _attach(manifest['block'], _AttachedMemory)
+                break
+            except FileNotFoundError:
+                # manifest를 읽은 직후에 새 버전이 publish되어 이전 블록이 제거된 경우
+                continue
+        else:
+            raise FileNotFoundError(f"shared frame {name} is being republished too frequently.")
+    finally:
+        _untrack(control, manifest)
+        control.close()
+    _untrack(block, manifest)
+
+    def array(key: str) -> np.ndarray:
+        dtype, shape, offset = manifest['arrays'][key]
+        arr = np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)
+        arr.flags.writeable = False
+        return arr
+
+    date_col_name, symbol_col_name = manifest['date_col_name'], manifest['symbol_col_name']
+    index = pd.MultiIndex(
+        levels=[
+            pd.DatetimeIndex(array(f'level/{date_col_name}'), name=date_col_name),
+            pd.Index(array(f'level/{symbol_col_name}').astype(object), name=symbol_col_name),
+        ],
+        codes=[array(f'codes/{date_col_name}'), array(f'codes/{symbol_col_name}')],
+        names=[date_col_name, symbol_col_name],
+        verify_integrity=False,
+    )
+    data = {}
+    for column in manifest['columns']:
+        col = column['name']
+        if column['kind'] == 'numeric':
+            data[col] = array(f'values/{col}')
+        else:
+            categories = array(f'categories/{col}').astype(object)
+            data[col] = pd.Categorical.from_codes(array(f'values/{col}'), categories=categories, validate=False)
+    df = pd.DataFrame(data, index=index, columns=[column['name'] for column in manifest['columns']], copy=False)
+    if getattr(block, '_fd', -1) >= 0:
+        # 매핑이 끝났으므로 파일 디스크립터는 필요 없다.
+        os.close(block._fd)
+        block._fd = -1
+    return df, SharedFrameAttachment(name, manifest['version'])
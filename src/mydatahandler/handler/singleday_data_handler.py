@@ -1,5 +1,6 @@
+import numpy as np
 import pandas as pd
-from typing import List
+from typing import Dict, List, Tuple
 
 """
 하루짜리 데이터를 처리하는 핸들러입니다.
@@ -10,6 +11,7 @@ from typing import List
 
 # essential imports
 from mydatahandler.handler.functions import fetch_recent_usable_stock_prices_from_krx
+from mydatahandler.handler.name_search import NameSearchIndex
 
 class _SDH:
     """
@@ -21,6 +23,8 @@ class _SDH:
     def __init__(self):
         self._df = pd.DataFrame()  # 종목코드는 index에만 존재
         self.date: pd.Timestamp = None # self.df의 유일한(동일한) 날짜. 존재하지 않을 수도 있다. 
+        self._lookup: '_NameSymbolLookup' = None # 종목코드 <-> 종목명. df가 바뀌면 처음 필요할 때 다시 만든다.
+        self._search_index: NameSearchIndex = None # 종목명 검색 인덱스. _lookup과 같음
 
     @property
     def df(self) -> pd.DataFrame:
@@ -36,6 +40,8 @@ class _SDH:
         self._df를 value로 설정합니다.
         """
         self._df = self._set_data(value)
+        self._lookup = None
+        self._search_index = None
     
     def set_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -77,10 +83,39 @@ class _SDH:
     
     def load_renect_data_from_krx(self):
         # pykrx를 통해서 금일 기본 정보를 받아온다.
+        # 데이터를 받지 못하면 ValueError가 발생하고, 기존 데이터는 그대로 둔다. (빈 데이터로 바꾸지 않음)
         self.df = fetch_recent_usable_stock_prices_from_krx()
         print(f"One Day Data Handler: Loaded data with {len(self.df)} stocks.")
 
 
+class _NameSymbolLookup:
+    """
+    종목코드 <-> 종목명 매핑
+    한 건은 dict로, 여러 건은 Index.get_indexer로 한 번에 찾는다.
+    같은 종목명이 여러 종목코드에 있으면 (정렬된) 첫 번째 종목코드를 사용한다.
+    """
+    def __init__(self, df: pd.DataFrame):
+        names = df['종목명'] if '종목명' in df.columns else pd.Series(dtype=object)
+        self.symbols = pd.Index(names.index, dtype=object)
+        self.names = names.to_numpy(dtype=object)
+        first = ~names.duplicated(keep='first').to_numpy(dtype=bool) & names.notna().to_numpy(dtype=bool)
+        self.unique_names = pd.Index(self.names[first], dtype=object)
+        self.symbols_of_names = self.symbols.to_numpy()[first]
+        self.name_by_symbol: Dict[str, str] = dict(zip(self.symbols, self.names))
+        self.symbol_by_name: Dict[str, str] = dict(zip(self.unique_names, self.symbols_of_names))
+
+    @staticmethod
+    def take(index: pd.Index, values: np.ndarray, keys: List[str], raise_on_missing: bool, kind: str) -> List[str]:
+        keys = list(keys)
+        positions = index.get_indexer(pd.Index(keys, dtype=object))
+        missing = positions < 0
+        if missing.any() and raise_on_missing:
+            raise ValueError(f"Stock {kind} {keys[int(np.argmax(missing))]} not found in the database.")
+        result = np.full(len(keys), np.nan, dtype=object)
+        result[~missing] = values[positions[~missing]]
+        return result.tolist()
+
+
 class SDH_get(_SDH):
     @property
     def stock_symbols(self) -> List[str]:
@@ -94,27 +129,51 @@ class SDH_get(_SDH):
         종목명 리스트를 반환합니다.
         """
         return self.df['종목명'].tolist()
+    def _get_lookup(self) -> _NameSymbolLookup:
+        lookup = self._lookup
+        if lookup is None:
+            lookup = self._lookup = _NameSymbolLookup(self.df)
+        return lookup
     def get_stock_name(self, stock_symbol: str) -> str:
         try:
-            return self.df.loc[[stock_symbol], '종목명'].iloc[0]
-        except KeyError:
+            return self._get_lookup().name_by_symbol[stock_symbol]
+        except (KeyError, TypeError):
             raise ValueError(f"Stock symbol {stock_symbol} not found in the database.")
     
-    def get_stock_names(self, stock_symbols: List[str]) -> List[str]:
-        return [self.get_stock_name(symbol) for symbol in stock_symbols]
+    def get_stock_names(self, stock_symbols: List[str], raise_on_missing: bool = True) -> List[str]:
+        """
+        종목코드 리스트를 통해 종목명 리스트를 한 번에 반환합니다.
+        raise_on_missing: False이면 없는 종목코드는 예외 대신 NaN으로 반환합니다.
+        """
+        lookup = self._get_lookup()
+        return lookup.take(lookup.symbols, lookup.names, stock_symbols, raise_on_missing, 'symbol')
     def get_stock_symbol(self, stock_name: str) -> str:
         """
         종목명을 통해 종목코드를 반환합니다.
         """
         try:
-            return self.df[self.df['종목명'] == stock_name].index[0]
-        except IndexError:
+            return self._get_lookup().symbol_by_name[stock_name]
+        except (KeyError, TypeError):
             raise ValueError(f"Stock name {stock_name} not found in the database.")
-    def get_stock_symbols(self, stock_names: List[str]) -> List[str]:
+    def get_stock_symbols(self, stock_names: List[str], raise_on_missing: bool = True) -> List[str]:
+        """
+        종목명 리스트를 통해 종목코드 리스트를 한 번에 반환합니다.
+        raise_on_missing: False이면 없는 종목명은 예외 대신 NaN으로 반환합니다.
+        """
+        lookup = self._get_lookup()
+        return lookup.take(lookup.unique_names, lookup.symbols_of_names, stock_names, raise_on_missing, 'name')
+    def search_stocks(self, query: str, limit: int = 10) -> List[Tuple[str, str]]:
         """
-        종목명 리스트를 통해 종목코드 리스트를 반환합니다.
+        일부 종목명(또는 초성, 종목코드 앞부분)으로 종목을 찾아 순위순으로 반환합니다.
+        예: '삼성', '전자', 'ㅅㅅㅈㅈ', '0059'
+        Returns: [(종목코드, 종목명), ...] 최대 limit개
         """
-        return [self.get_stock_symbol(name) for name in stock_names]
+        index = self._search_index
+        if index is None:
+            df = self.df
+            names = df['종목명'] if '종목명' in df.columns else []
+            index = self._search_index = NameSearchIndex(df.index, names)
+        return index.search(query, limit=limit)
 
 
 class SingledayDataHandler(SDH_get):
@@ -1,4 +1,9 @@
-from typing import List
+import copy
+import threading
+import weakref
+from pathlib import Path
+from typing import Iterable, List
+import numpy as np
 import pandas as pd
 from functools import wraps
 
@@ -9,15 +14,102 @@ logger = CustomAdapter(original_logger, {'prefix': 'SDH'})
 주식 데이터를 다루는 기본 클래스
 """
 
-from mydatahandler.handler.functions import remove_unnecessary_symbols, get_recent_df, update_df_with_another_df, upsert_df_with_similar_df
+from mydatahandler.handler.functions import remove_unnecessary_symbols, get_recent_df, update_df_positional, upsert_df_with_similar_df, merge_upsert_df
+from mydatahandler.handler.functions import date_row_slice, recent_date_row_slice
+from mydatahandler.handler.functions import save_partitioned_df, load_partitioned_df, save_arrow_ipc, load_arrow_ipc
+from mydatahandler.handler.functions import compact_df, conform_dtypes
+from mydatahandler.handler.functions import backfill_krx_daily, BackfillResult
 from mydatahandler.handler.singleday_data_handler import SingledayDataHandler
+from mydatahandler.handler.dense_panel import DensePanel
+from mydatahandler.handler.rolling_panel import RollingPanel
+from mydatahandler.handler.symbol_row_index import SymbolRowIndex
+from mydatahandler.handler.query import StockQuery
+from mydatahandler.handler.indicators import IndicatorEngine
+from mydatahandler.handler.shared_frame import SharedFramePublisher, SharedFrameAttachment, attach_shared_frame
+
+def cached_view(func):
+    """
+    데이터 버전(self._version)별로 결과를 캐시하는 데코레이터
+    데이터를 변경하는 모든 작업은 버전을 올리고 캐시를 비운다. (_bump_version)
+    DataFrame은 얕은 복사본, list는 복사본을 반환하므로 칼럼 추가 등은 캐시에 영향을 주지 않는다. 
+    단, 반환된 DataFrame의 값을 직접 수정해서는 안 된다.
+    """
+    @wraps(func)
+    def wrapper(self, *args):
+        key = (func.__name__,) + args
+        cache, version = self._cache, self._version
+        try:
+            value = cache[key]
+            self.cache_hits += 1
+        except KeyError:
+            self.cache_misses += 1
+            value = func(self, *args)
+            if self._version == version: # 계산 중에 데이터가 바뀌었으면 캐시하지 않는다.
+                cache[key] = value
+        if isinstance(value, pd.DataFrame):
+            return value.copy(deep=False)
+        if isinstance(value, list):
+            return list(value)
+        return value
+    return wrapper
+
+def writer(func):
+    """
+    데이터를 변경하는 메쏘드에 붙이는 데코레이터
+    쓰기는 self._write_lock으로 직렬화하고, 가장 바깥쪽 쓰기가 성공하면 새 스냅샷을 발행한다. (_publish)
+    읽는 쪽(snapshot())은 잠그지 않는다.
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            self._write_depth += 1
+            try:
+                result = func(self, *args, **kwargs)
+            finally:
+                self._write_depth -= 1
+            if self._write_depth == 0:
+                self._publish()
+            return result
+    return wrapper
 
 class _StockDataHandler:
-    def __init__(self, df:pd.DataFrame=None):
+    def __init__(self, df:pd.DataFrame=None, engine:str='frame'):
+        """
+        engine: 'frame' 또는 'panel'
+            'frame': [일자, 종목코드] 멀티인덱스 DataFrame으로 보관
+            'panel': 칼럼별 (일자 x 종목코드) 2차원 배열(DensePanel)로 보관하고, 
+                     .df는 요청될 때만 다시 만든다.
+        """
+        if engine not in ('frame', 'panel'):
+            raise ValueError("engine must be 'frame' or 'panel'.")
+        self.engine = engine
         self.date_col_name = '일자'
         self.symbol_col_name = '종목코드'
         self.primary_keys = [self.date_col_name, self.symbol_col_name]
         self.sdh:SingledayDataHandler = SingledayDataHandler()
+        self._panel:DensePanel = None  # engine='panel'인 경우에만 사용
+        self._segments:List[pd.DataFrame] = []  # 마지막 일자 이후로 추가된(append) 하루치 데이터. .df 요청 시 합쳐진다.
+        self._symbol_index:SymbolRowIndex = None  # engine='frame'에서 종목코드 -> 행 위치. 처음 필요할 때 만든다.
+        # save()를 위한 변경 추적. 마지막 저장 이후 변경된 일자만 다시 저장한다.
+        self._dirty_all:bool = True
+        self._dirty_dates:set = set()
+        self._storage:dict = None  # 마지막으로 저장하거나 불러온 경로 정보
+        self._dtype_policy:dict = None  # compact() 이후 새로 추가되는 데이터에 적용할 칼럼별 dtype
+        # 공유 메모리 (publish_shared / attach_shared)
+        self._shared_publisher:SharedFramePublisher = None
+        self._shared_attachment:SharedFrameAttachment = None
+        # 데이터 버전 및 파생 데이터 캐시 (cached_view)
+        self._version:int = 0
+        self._base_version:int = 0  # append가 아닌 변경이 마지막으로 일어난 버전 (이후로는 append만 있었음)
+        self._cache:dict = {}
+        self.cache_hits:int = 0
+        self.cache_misses:int = 0
+        self._indicators:IndicatorEngine = None
+        # 스냅샷 (snapshot()). 쓰기는 잠금으로 직렬화하고, 끝날 때마다 새 스냅샷을 발행한다.
+        self._write_lock = threading.RLock()
+        self._write_depth:int = 0
+        self._snapshot:'StockDataSnapshot' = None
+        self._live_snapshots = weakref.WeakSet()
         self._df:pd.DataFrame = pd.DataFrame(
             columns=['일자', '종목코드']
             ).set_index(pd.MultiIndex.from_tuples([], names=['일자', '종목코드']))  # 초기화 시 빈 DataFrame으로 설정
@@ -30,40 +122,98 @@ class _StockDataHandler:
         self._df를 반환합니다.
         index = ['일자', '종목코드']
         columns = ['종가', '전일대비', '변동률', '시가', '고가', '저가', '거래량', '거래대금', ...] 등의 여러가지가 있을 수 있음
+        engine='panel'인 경우, 처음 요청될 때 panel로부터 만든다.
+        append된 하루치 데이터(self._segments)가 있으면 정렬 없이 이어 붙인다. (일자가 모두 뒤쪽이므로 정렬이 유지됨)
         """
+        if (self._df is None and self._panel is not None) or self._segments:
+            with self._write_lock: # append와 동시에 합치면 segment를 잃을 수 있으므로
+                if self._df is None and self._panel is not None:
+                    self._df = self._panel.to_frame()
+                    self._segments = []
+                if self._segments:
+                    self._df = pd.concat([self._df] + self._segments)
+                    self._segments = []
         return self._df
     @df.setter
     def df(self, value: pd.DataFrame):
         """
         self._df를 value로 설정합니다.
         """
-        if not isinstance(value, pd.DataFrame):
-            raise ValueError("value must be a pandas DataFrame.")
-        self._df = self._set_data(value)
-    def set_data(self, df:pd.DataFrame) -> pd.DataFrame:
+        self._assign_df(value)
+    def set_data(self, df:pd.DataFrame, assume_canonical:bool=False) -> pd.DataFrame:
         """
         df로 데이터를 설정합니다. 
         자동으로 인덱스를 설정합니다. 
+        assume_canonical:bool
+            True이면 df가 이미 [일자, 종목코드] 멀티인덱스로 정렬되어 있다고 보고, 
+            복사/일자 변환/정렬 없이 그대로 저장한다. (이후 df를 수정해서는 안 된다.)
+            False이면 df가 이미 정렬된 형태인지 확인하여, 그런 경우 한 번만 복사한다.
         """
-        self.df = df # self._set_data() 호출
+        self._assign_df(df, assume_canonical=assume_canonical)
         return df
-    def _set_data(self, df:pd.DataFrame) -> pd.DataFrame:
+    @writer
+    def _assign_df(self, df:pd.DataFrame, assume_canonical:bool=False, symbol_index:SymbolRowIndex=None, changed_dates=None):
+        # df setter와 set_data의 공통 처리
+        # symbol_index: 호출하는 쪽에서 새 df에 맞게 갱신한 종목 인덱스가 있으면 그대로 사용한다.
+        # changed_dates: 변경된 일자. None이면 전체가 변경된 것으로 본다.
+        if not isinstance(df, pd.DataFrame):
+            raise ValueError("value must be a pandas DataFrame.")
+        self._segments = []
+        self._df = self._set_data(df, assume_canonical=assume_canonical)
+        self._symbol_index = symbol_index
+        self._mark_dirty(changed_dates)
+        self._bump_version()
+    def _set_data(self, df:pd.DataFrame, assume_canonical:bool=False) -> pd.DataFrame:
         """
         서버나 feather에서 가져온 df를 index를 설정하고 정렬하여 초기화 후, 
         self.df에 저장한다.
         """
-        df = df.copy()  # 원본 DataFrame을 변경하지 않도록 복사본 생성
-        df = self._convert_index_to_primary_keys(df)
-        df = df.sort_index()  # 인덱스 정렬
+        if assume_canonical:
+            pass
+        elif self._is_canonical(df):
+            df = df.copy()  # 원본 DataFrame을 변경하지 않도록 복사본 생성
+        else:
+            df = self._convert_index_to_primary_keys(df) # 복사본 생성
+            df = df.sort_index()  # 인덱스 정렬
         try:
-            last_date = df.index.get_level_values(self.date_col_name).unique()[-1]  
+            last_date = df.index[-1][0] # 정렬되어 있으므로 마지막 행의 일자가 마지막 날짜
             # SingledayDataHandler에 오늘 데이터 설정
             self.sdh.set_data(df=df.loc[last_date,:])
         except IndexError:
             last_date = None
+        if self.engine == 'panel':
+            # panel에 저장하고, DataFrame은 요청될 때 다시 만든다.
+            self._panel = self._make_panel(df)
+            return None
         return df
+    def _make_panel(self, df:pd.DataFrame) -> DensePanel:
+        return DensePanel.from_frame(df, self.date_col_name, self.symbol_col_name)
     
+    def _is_canonical(self, df:pd.DataFrame) -> bool:
+        """
+        df가 이미 정리된 형태인지 값싸게 확인한다.
+        [일자, 종목코드] 멀티인덱스, 시간 정보가 없는 datetime64 일자, 인덱스 정렬, 칼럼에 인덱스명 없음
+        """
+        index = df.index
+        if not isinstance(index, pd.MultiIndex) or list(index.names) != self.primary_keys:
+            return False
+        dates = index.levels[0]
+        if not isinstance(dates, pd.DatetimeIndex) or dates.tz is not None:
+            return False
+        if set(self.primary_keys).intersection(df.columns):
+            return False
+        # 레벨 값(유일한 일자들)만 확인하므로 행 수와 무관하다.
+        if not (dates == dates.normalize()).all():
+            return False
+        return index.is_monotonic_increasing
+
     def _convert_index_to_primary_keys(self, df:pd.DataFrame, drop:bool=True) -> pd.DataFrame:
+        """
+        df의 인덱스를 [일자, 종목코드]로 설정한 복사본을 반환한다.
+        이미 정리된 형태(_is_canonical)인 경우, 복사하지 않고 그대로 반환한다.
+        """
+        if self._is_canonical(df):
+            return df
         df = df.copy()  # 원본 DataFrame을 변경하지 않도록 복사본 생성
         # 현재 인덱스를 리셋
         if set(self.primary_keys) == set(df.index.names):
@@ -86,10 +236,70 @@ class _StockDataHandler:
         df.set_index(self.primary_keys, inplace=True, drop=drop)
         return df
     
+    def _is_empty(self) -> bool:
+        # self.df를 합치거나 다시 만들지 않고 비어있는지 확인한다.
+        if self._segments:
+            return False
+        if self._df is None and self._panel is not None:
+            return self._panel.empty
+        return self._df.empty
+    def _get_symbol_index(self) -> SymbolRowIndex:
+        """
+        종목코드 -> 행 위치 인덱스를 반환한다. 없으면 self._df와 segment들로부터 만든다.
+        append가 누적되어 chunk가 많아지면 합쳐진 df로 다시 만든다.
+        """
+        if self._symbol_index is not None and self._symbol_index.n_chunks > 32 and not self._segments:
+            self._symbol_index = None
+        if self._symbol_index is None:
+            self._symbol_index = SymbolRowIndex.from_index(self._df.index, self.symbol_col_name)
+            for segment in self._segments:
+                self._symbol_index.append(segment.index)
+        return self._symbol_index
+    def _symbol_rows(self, symbol:str) -> pd.DataFrame:
+        # symbol의 행들을 [일자, 종목코드] 멀티인덱스 그대로 반환한다.
+        positions = self._get_symbol_index().positions(symbol)
+        if len(positions) == 0:
+            raise KeyError(symbol)
+        return self.df.iloc[positions]
+
+    def _mark_dirty(self, dates=None):
+        """
+        저장 이후 변경된 일자를 기록한다. dates가 None이면 전체가 변경된 것으로 본다.
+        """
+        if dates is None:
+            self._dirty_all = True
+        else:
+            self._dirty_dates.update(pd.DatetimeIndex(dates).normalize())
+
+    def _bump_version(self, append:bool=False):
+        """
+        데이터가 변경되었음을 표시한다. 버전을 올리고 캐시를 비운다.
+        append: 마지막 일자 이후에 하루치 데이터를 이어 붙인 경우 True (지표를 이어서 계산할 수 있음)
+        """
+        self._version += 1
+        if not append:
+            self._base_version = self._version
+        self._cache = {} # 이전 버전의 캐시를 사용 중인 읽기에 영향을 주지 않도록 새로 만든다.
+    def cache_info(self) -> dict:
+        """
+        캐시 적중/실패 횟수와 현재 데이터 버전을 반환한다.
+        """
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'version': self._version,
+            'size': len(self._cache),
+        }
+
+    @writer
     def _sort_df(self):
         # df를 정렬한다. 일자, 종목코드 순으로 정렬한다.
+        if self._df is None and self._panel is not None:
+            return # panel로부터 만든 df는 항상 정렬되어 있음
         if self.df is not None:
-            self.df.sort_index(level=['일자', '종목코드'], inplace=True, ascending=[True, True])
+            # 스냅샷이 같은 DataFrame을 공유할 수 있으므로 제자리(inplace)에서 정렬하지 않는다.
+            df = self.df.sort_index(level=['일자', '종목코드'], ascending=[True, True])
+            self._assign_df(df, assume_canonical=True, changed_dates=[])
         else:
             logger.error("DataFrame is not set.")
             # raise ValueError("DataFrame is not set.")
@@ -104,28 +314,44 @@ class StockDataHandler_sdh(_StockDataHandler):
         종목코드에 해당하는 종목명을 반환합니다.
         """
         return self.sdh.get_stock_name(stock_symbol=symbol)
-    def get_stock_names(self, symbols:list) -> list:
+    def get_stock_names(self, symbols:list, raise_on_missing:bool=True) -> list:
         """
         종목코드 리스트에 해당하는 종목명을 반환합니다.
+        raise_on_missing: False이면 없는 종목코드는 예외 대신 NaN으로 반환합니다.
         """
-        return self.sdh.get_stock_names(stock_symbols=symbols)
+        return self.sdh.get_stock_names(stock_symbols=symbols, raise_on_missing=raise_on_missing)
     def get_stock_symbol(self, stock_name:str) -> str:
         """
         종목명에 해당하는 종목코드를 반환합니다.
         """
         return self.sdh.get_stock_symbol(stock_name=stock_name)
-    def get_stock_symbols(self, stock_names:list) -> list:
+    def get_stock_symbols(self, stock_names:list, raise_on_missing:bool=True) -> list:
         """
         종목명 리스트에 해당하는 종목코드를 반환합니다.
+        raise_on_missing: False이면 없는 종목명은 예외 대신 NaN으로 반환합니다.
         """
-        return self.sdh.get_stock_symbols(stock_names=stock_names)
+        return self.sdh.get_stock_symbols(stock_names=stock_names, raise_on_missing=raise_on_missing)
+    def search_stocks(self, query:str, limit:int=10) -> list:
+        """
+        일부 종목명(또는 초성, 종목코드 앞부분)으로 오늘 종목을 찾아 [(종목코드, 종목명), ...]을 순위순으로 반환합니다.
+        """
+        return self.sdh.search_stocks(query=query, limit=limit)
 
 
 class StockDataHandler_property(StockDataHandler_sdh):
+    """
+    engine='panel'인 경우, DensePanel의 배열을 직접 잘라서 반환한다. 
+    df_after, df_before, df_from_to는 일자 경계를 이진탐색하여 연속된 구간을 잘라 반환한다. (self.df와 메모리를 공유할 수 있으므로 값을 직접 수정하지 말 것)
+    @cached_view가 붙은 항목은 데이터가 변경될 때까지 캐시된 값을 반환한다.
+    """
     def sdf(self, symbol:str)->pd.DataFrame:
-        return self.df.xs(key=symbol, level='종목코드')
+        if self._panel is not None:
+            return self._panel.symbol_frame(symbol)
+        return self._symbol_rows(symbol).droplevel('종목코드')
     def by_symbol(self, symbol:str)->pd.DataFrame:
-        return self.df.xs(key=symbol, level='종목코드', drop_level=False)
+        if self._panel is not None:
+            return self._panel.symbol_frame(symbol, drop_level=False)
+        return self._symbol_rows(symbol)
     def today_by_symbol(self, symbol:str)->pd.DataFrame:
         """
         오늘 날짜에 해당하는 종목의 데이터를 반환합니다.
@@ -134,8 +360,9 @@ class StockDataHandler_property(StockDataHandler_sdh):
         return self.df.loc[idx[pd.Timestamp.today().normalize(), symbol], :]
 
     def by_symbols(self, symbols:List[str])->pd.DataFrame:
-        idx = pd.IndexSlice
-        return self.df.loc[idx[:, pd.Index(symbols)], :]
+        if self._panel is not None:
+            return self._panel.symbols_frame(symbols)
+        return self.df.iloc[self._get_symbol_index().positions_many(symbols)]
     def today_by_symbols(self, symbols:List[str])->pd.DataFrame:
         """
         오늘 날짜에 해당하는 종목들의 데이터를 반환합니다.
@@ -144,37 +371,65 @@ class StockDataHandler_property(StockDataHandler_sdh):
         return self.df.loc[idx[pd.Timestamp.today().normalize(), pd.Index(symbols)], :]
 
     @property
+    @cached_view
     def symbols(self)->list:
         """
         전 일자에 걸친 모든 종목 코드 리스트를 반환합니다.
         """
+        if self._panel is not None:
+            return self._panel.all_symbols()
         return self.df.index.get_level_values('종목코드').unique().tolist()
     @property
+    @cached_view
     def today_symbols(self)->list:
         """
         데이터의 제일 마지막 날짜에 해당하는 일자의 종목 코드 리스트를 반환한다.
         """
+        if self._panel is not None:
+            return self._panel.symbols_of_date(-1)
         return self.df_today.index.get_level_values('종목코드').unique().tolist()
     @property
+    @cached_view
     def date_list(self)->list:
+        if self._panel is not None:
+            return self._panel.date_index().tolist()
         return self.df.index.get_level_values('일자').unique().tolist()
     @property
+    @cached_view
     def last_date(self)->pd.Timestamp:
-        return self.df.index.get_level_values('일자').unique()[-1]
+        if self._panel is not None:
+            return self._panel.date_index()[-1]
+        # df는 항상 일자순으로 정렬되어 있으므로 마지막 행의 일자가 마지막 날짜이다.
+        if self._segments:
+            return self._segments[-1].index[-1][0]
+        return self.df.index[-1][0]
     @property
+    @cached_view
     def tdf(self)->pd.DataFrame: # 오늘일자의 df, 일자 칼럼은 삭제 / 
+        if self._panel is not None:
+            return self._panel.date_frame(-1)
+        if self._segments:
+            return self._segments[-1].xs(self.last_date)
         return self.df.xs(self.df.index.get_level_values('일자').unique()[-1])
     @property
+    @cached_view
     def ydf(self)->pd.DataFrame: # 어제일자의 df, 일자 칼럼은 삭제
+        if self._panel is not None:
+            return self._panel.date_frame(-2)
         return self.df.xs(self.df.index.get_level_values('일자').unique()[-2])
     def pdf(self, n:int)-> pd.DataFrame: # n일전의 df, 일자 칼럼은 삭제
+        if self._panel is not None:
+            return self._panel.date_frame(-n)
         return self.df.xs(self.df.index.get_level_values('일자').unique()[-n])
     def date_df(self, date:pd.Timestamp)->pd.DataFrame: # 특정일자의 df, 일자 칼럼은 삭제
         date = pd.to_datetime(date).normalize()  # 날짜를 정규화
         if date not in self.date_list:
             raise ValueError(f"날짜 {date}에 해당하는 데이터가 없습니다.")
+        if self._panel is not None:
+            return self._panel.date_frame(self._panel.date_loc(date))
         return self.df.xs(key=date, level='일자')
     @property
+    @cached_view
     def df_filtered(self): # filtered df
         df = remove_unnecessary_symbols(self.df)
         return df
@@ -186,15 +441,27 @@ class StockDataHandler_property(StockDataHandler_sdh):
         return df
         
     @property
+    @cached_view
     def df_today(self): # 오늘일자의 df, 일자 칼럼 포함
+        if self._panel is not None:
+            return self._panel.date_frame(-1, drop_level=False)
+        if self._segments:
+            return self._segments[-1].xs(self.last_date, drop_level=False)
         return self.df.xs(self.df.index.get_level_values('일자').unique()[-1], drop_level=False)
     @property
+    @cached_view
     def df_yesterday(self):
+        if self._panel is not None:
+            return self._panel.date_frame(-2, drop_level=False)
         return self.df.xs(self.df.index.get_level_values('일자').unique()[-2], drop_level=False)
     def df_previous(self, n):
+        if self._panel is not None:
+            return self._panel.date_frame(-n, drop_level=False)
         return self.df.xs(self.df.index.get_level_values('일자').unique()[-n], drop_level=False)
     def by_date(self, date:pd.Timestamp):
         date = pd.to_datetime(date).normalize()  # 날짜를 정규화
+        if self._panel is not None:
+            return self._panel.date_frame(self._panel.date_loc(date), drop_level=False)
         return self.df.xs(key=date, level='일자', drop_level=False)
     def df_after(self, date:pd.Timestamp, include_date:bool=False) -> pd.DataFrame:
         """
@@ -202,20 +469,18 @@ class StockDataHandler_property(StockDataHandler_sdh):
         date는 pd.Timestamp 형식이어야 한다.
         """
         date = pd.to_datetime(date).normalize()
-        if include_date:
-            return self.df.loc[self.df.index.get_level_values('일자') >= date, :]
-        else:
-            return self.df.loc[self.df.index.get_level_values('일자') > date, :]
+        if self._panel is not None:
+            return self._panel.to_frame(self._panel.date_slice(from_date=date, include_from=include_date))
+        return self.df.iloc[date_row_slice(self.df.index, from_date=date, include_from=include_date)]
     def df_before(self, date:pd.Timestamp, include_date:bool=False) -> pd.DataFrame:
         """
         특정 날짜 이전의 데이터를 반환한다.
         date는 pd.Timestamp 형식이어야 한다.
         """
         date = pd.to_datetime(date).normalize()
-        if include_date:
-            return self.df.loc[self.df.index.get_level_values('일자') <= date, :]
-        else:
-            return self.df.loc[self.df.index.get_level_values('일자') < date, :]
+        if self._panel is not None:
+            return self._panel.to_frame(self._panel.date_slice(to_date=date, include_to=include_date))
+        return self.df.iloc[date_row_slice(self.df.index, to_date=date, include_to=include_date)]
     def df_from_to(self, from_date:pd.Timestamp, to_date:pd.Timestamp) -> pd.DataFrame:
         """
         특정 날짜 범위의 데이터를 반환한다.
@@ -223,11 +488,32 @@ class StockDataHandler_property(StockDataHandler_sdh):
         """
         from_date = pd.to_datetime(from_date).normalize()
         to_date = pd.to_datetime(to_date).normalize()
-        return self.df.loc[(self.df.index.get_level_values('일자') >= from_date) & 
-                            (self.df.index.get_level_values('일자') <= to_date), :]
+        if self._panel is not None:
+            return self._panel.to_frame(self._panel.date_slice(from_date, to_date))
+        return self.df.iloc[date_row_slice(self.df.index, from_date, to_date)]
+
+    def query(self) -> StockQuery:
+        """
+        지연 쿼리를 시작한다. collect()를 호출할 때 한 번에 실행된다.
+        예: dh.query().dates(a, b).columns(['종가', '거래대금']).filtered().collect()
+        remove_unnecessary_symbols(dh.df_from_to(a, b))[cols]와 결과가 같지만, 
+        일자 구간과 칼럼을 먼저 적용하므로 전체 구간/칼럼을 복사하지 않는다.
+        """
+        return StockQuery(self)
+    @property
+    def indicators(self) -> IndicatorEngine:
+        """
+        종목별 이동평균, N일 수익률, 이동 최대/최소, 이동 합계 (handler/indicators.py 참고)
+        예: dh.indicators.sma('종가', 20)
+        결과는 데이터 버전별로 캐시되고, add_single_daily_df로 append된 일자는 이어서 계산한다.
+        """
+        if self._indicators is None:
+            self._indicators = IndicatorEngine(self)
+        return self._indicators
 
 
 class _StockDataHandler_manage(StockDataHandler_property):
+    @writer
     def _change_data_type_with_mapping(self, dtype_mapping:dict):
         """ df의 type을 변경 """
         
@@ -236,7 +522,58 @@ class _StockDataHandler_manage(StockDataHandler_property):
 
         # astype() 적용
         print(f"Changing data type of df...")
-        self.set_data(df=self.df.astype(existing_columns))
+        self.set_data(df=self.df.astype(existing_columns), assume_canonical=True)
+
+    @writer
+    def compact(self, float32:bool=False) -> pd.DataFrame:
+        """
+        메모리를 줄이는 dtype으로 변환한다. (functions/compact_dtypes.py 참고)
+            문자열 칼럼(종목명, 시장ID 등) -> category
+            가격/수량 칼럼 -> 값의 범위가 허용하면 int32
+            float32=True이면 변동률 -> float32 (정밀도 손실이 있으므로 선택)
+        이후 add_single_daily_df 등으로 추가되는 데이터도 같은 dtype으로 맞춘다.
+        (새로운 종목명이 들어오거나 int32 범위를 넘으면 기존 데이터의 dtype을 넓힌다.)
+        Returns: 칼럼별 메모리 절감 내역 (before_dtype, after_dtype, before_bytes, after_bytes, saved_bytes)
+        """
+        df, report = compact_df(self.df, float32=float32)
+        changed = report.index[report['before_dtype'] != report['after_dtype']]
+        self._dtype_policy = dict(self._dtype_policy or {}, **{col: df.dtypes[col] for col in changed})
+        # 값과 인덱스는 그대로이므로 종목 인덱스를 유지하고, 저장할 일자도 없다.
+        self._assign_df(df, assume_canonical=True, symbol_index=self._symbol_index, changed_dates=[])
+        logger.info(
+            f"compact: {report['before_bytes'].sum() / 2**20:.1f}MB -> {report['after_bytes'].sum() / 2**20:.1f}MB "
+            f"({report['saved_bytes'].sum() / 2**20:.1f}MB saved)"
+        )
+        return report
+
+    def _apply_dtype_policy(self, df:pd.DataFrame) -> pd.DataFrame:
+        """
+        새로 추가되는 데이터를 compact()로 정한 dtype에 맞춘다.
+        기존 데이터의 dtype을 넓혀야 하는 경우(새로운 category 값, int32 범위 초과) 함께 변경한다.
+        """
+        if not self._dtype_policy:
+            return df
+        df, widened = conform_dtypes(df, self._dtype_policy)
+        if widened:
+            self._widen_dtypes(widened)
+        return df
+
+    def _widen_dtypes(self, dtypes:dict):
+        # 해당 칼럼만 새로 만들고, 나머지 칼럼은 그대로 공유한다.
+        def widen(df:pd.DataFrame) -> pd.DataFrame:
+            df = df.copy(deep=False)
+            for col, dtype in dtypes.items():
+                if col in df.columns:
+                    df[col] = df[col].astype(dtype)
+            return df
+        self._dtype_policy.update(dtypes)
+        if self._panel is not None:
+            for col, dtype in dtypes.items():
+                self._panel.set_dtype(col, dtype)
+        if self._df is not None:
+            self._df = widen(self._df)
+        self._segments = [widen(segment) for segment in self._segments]
+        self._bump_version()
 
 
 class _StockDataHandler_recent(_StockDataHandler_manage):
@@ -245,23 +582,47 @@ class _StockDataHandler_recent(_StockDataHandler_manage):
         최근 n일의 데이터를 가져온다.
         기본값은 300일로 설정되어 있다.
         """
-        if self.df.empty:
+        if self._is_empty():
             logger.warning("DataFrame is empty. Returning an empty DataFrame.")
             raise ValueError("DataFrame is empty. Please set data first.")
         # 최근 n일의 데이터를 가져온다.
+        if self._panel is not None:
+            n_dates = self._panel.n_dates
+            return self._panel.to_frame(slice(max(n_dates - days, 0), n_dates))
         recent_df = get_recent_df(df=self.df, days=days)
         return recent_df
+    @writer
     def set_as_recent_df(self, days:int=700):
         """
         현재 df를 최근 n일의 데이터로 설정한다.
         기본값은 700일로 설정되어 있다.
+        앞쪽 구간만 잘라내므로 다시 정렬하거나 인덱스를 만들지 않는다.
         """
-        if self.df.empty:
+        if self._is_empty():
             logger.warning("DataFrame is empty. Cannot set as recent DataFrame.")
             raise ValueError("DataFrame is empty. Please set data first.")
-        self.set_data(get_recent_df(df=self.df, days=days))
+        if self._panel is not None:
+            n_dates = self._panel.n_dates
+            if n_dates <= days:
+                return
+            self._panel = self._panel.take_dates(slice(n_dates - days, n_dates))
+            self._df = None
+            self._segments = []
+            self._symbol_index = None
+            self._bump_version()
+            return
+        rows = recent_date_row_slice(self.df.index, days)
+        if rows.start == 0:
+            return
+        symbol_index = None
+        if self._symbol_index is not None:
+            symbol_index = self._get_symbol_index()
+            symbol_index.delete_rows(0, rows.start)
+        # 잘라낸 구간만 복사하여 이전 데이터의 메모리를 해제한다.
+        self._assign_df(self.df.iloc[rows].copy(), assume_canonical=True, symbol_index=symbol_index, changed_dates=[])
         
 class _StockDataHandler_add_del(_StockDataHandler_recent):
+    @writer
     def add_single_daily_df(self, daily_df:pd.DataFrame):
         """
         특정일의 주식 데이터를 추가한다.
@@ -269,21 +630,88 @@ class _StockDataHandler_add_del(_StockDataHandler_recent):
         인덱스가 중복되는 경우, 기존 데이터를 덮어쓰고 추가한다.
         daily_df는 [일자, 종목코드]를 인덱스로 가지는 멀티인덱스 DataFrame이거나, 
         칼럼에 '일자'와 '종목코드'가 있는 DataFrame이어야 한다.
+        마지막 일자 이후의 날짜인 경우, 기존 데이터를 다시 정렬하지 않고 뒤에 이어 붙인다.
         """
         # 현재 아무런 데이터도 없는 경우.
-        if self.df.empty:
+        if self._is_empty():
             # 하루짜리 날자를 가지는 DataFrame으로 설정한다. 
-            self.set_data(daily_df)
+            self.set_data(self._apply_dtype_policy(daily_df))
         # self.sdh.df가 비어있지 않은 경우.
         else:
-            # 기존 데이터와 중복되는 날짜가 있다면, 해당 날짜의 데이터를 제거하고 추가한다.
             # daily_df의 인덱스를 설정
-            # daily_df = self._convert_index_to_date_symbol(daily_df)
             daily_df = self._convert_index_to_primary_keys(daily_df)
-            overlap_idx = self.df.index.intersection(daily_df.index)
-            self.df = pd.concat([self.df.drop(overlap_idx), daily_df])
-        self._sort_df()
+            daily_df = self._apply_dtype_policy(daily_df)
+            if self._can_append(daily_df):
+                self._append_daily_df(daily_df)
+            else:
+                # 기존 데이터와 중복되는 날짜가 있다면, 해당 날짜의 데이터를 제거하고 추가한다.
+                overlap_idx = self.df.index.intersection(daily_df.index)
+                df = pd.concat([self.df.drop(overlap_idx), daily_df]).sort_index()
+                self._assign_df(df, assume_canonical=True, changed_dates=daily_df.index.get_level_values(self.date_col_name).unique())
+
+    @writer
+    def add_daily_dfs(self, daily_dfs:Iterable[pd.DataFrame]):
+        """
+        여러 날짜의 주식 데이터를 한 번에 추가한다. (예: KRX 크롤러의 generator)
+        add_single_daily_df를 순서대로 호출한 것과 결과가 같다. 
+        즉, 인덱스가 중복되는 경우 나중에 주어진 데이터로 덮어쓴다.
+        전체 데이터의 합치기/정렬 및 self.sdh 갱신은 마지막에 한 번만 수행한다.
+        """
+        daily_dfs = [self._convert_index_to_primary_keys(daily_df) for daily_df in daily_dfs if not daily_df.empty]
+        if not daily_dfs:
+            logger.warning("추가할 데이터가 없습니다.")
+            return
+        new_df = self._apply_dtype_policy(pd.concat(daily_dfs))
+        # 같은 인덱스는 나중에 주어진 데이터를 남긴다.
+        new_df = new_df[~new_df.index.duplicated(keep='last')].sort_index()
+        if self._is_empty():
+            self.set_data(new_df, assume_canonical=True)
+            return
+        if new_df.index[0][0] > self.last_date:
+            # 모두 마지막 일자 이후의 데이터인 경우, 기존 데이터는 다시 정렬하지 않는다.
+            df = pd.concat([self.df, new_df])
+        else:
+            overlap_idx = self.df.index.intersection(new_df.index)
+            df = pd.concat([self.df.drop(overlap_idx), new_df]).sort_index()
+        self._assign_df(df, assume_canonical=True, changed_dates=new_df.index.get_level_values(self.date_col_name).unique())
+
+    def _can_append(self, daily_df:pd.DataFrame) -> bool:
+        """
+        daily_df가 마지막 일자 이후의 하루치 데이터이고, 칼럼 구성이 기존과 같은지 확인한다.
+        """
+        dates = daily_df.index.get_level_values(self.date_col_name)
+        if daily_df.empty or dates[0] != dates[-1] or dates.nunique() != 1:
+            return False
+        if dates[0] <= self.last_date:
+            return False
+        if daily_df.index.has_duplicates:
+            return False
+        if self._panel is not None:
+            return self._panel.can_append(daily_df)
+        columns = self._segments[-1].columns if self._segments else self._df.columns
+        return set(daily_df.columns) == set(columns)
+    def _append_daily_df(self, daily_df:pd.DataFrame):
+        """
+        마지막 일자 이후의 하루치 데이터를 정렬된 segment로 추가한다. 
+        기존 데이터는 다시 복사하거나 정렬하지 않는다.
+        """
+        date = daily_df.index[0][0]
+        daily_df = daily_df.sort_index()
+        if self._panel is not None:
+            self._panel.append_date(date, daily_df.xs(date))
+            if self._df is not None:
+                self._segments.append(daily_df[self._panel.columns])
+        else:
+            columns = self._segments[-1].columns if self._segments else self._df.columns
+            if self._symbol_index is not None:
+                self._symbol_index.append(daily_df.index)
+            self._segments.append(daily_df[columns])
+        # SingledayDataHandler에 오늘 데이터 설정
+        self.sdh.set_data(df=daily_df.loc[date,:])
+        self._mark_dirty([date])
+        self._bump_version(append=True)
 
+    @writer
     def del_date(self, date:pd.Timestamp):
         """
         특정 날짜의 데이터를 삭제한다.
@@ -293,8 +721,15 @@ class _StockDataHandler_add_del(_StockDataHandler_recent):
         if date not in self.date_list:
             logger.warning(f"날짜 {date}에 해당하는 데이터가 없습니다. 삭제하지 않습니다.")
             return
-        df = self.df[self.df.index.get_level_values('일자') != date]
-        self.set_data(df)
+        keep = self.df.index.get_level_values('일자') != date
+        df = self.df[keep]
+        symbol_index = None
+        if self._symbol_index is not None:
+            # 정렬되어 있으므로 삭제되는 행은 연속된 구간이다.
+            removed = np.flatnonzero(~keep)
+            symbol_index = self._get_symbol_index()
+            symbol_index.delete_rows(int(removed[0]), int(removed[-1]) + 1)
+        self._assign_df(df, assume_canonical=True, symbol_index=symbol_index, changed_dates=[date])
         print(f"날짜 {date}에 해당하는 데이터를 삭제했습니다.")
         
     # def _convert_index_to_date_symbol(self, daily_df:pd.DataFrame, drop:bool=True) -> pd.DataFrame:
@@ -320,7 +755,8 @@ class StockDataHandler_update_sert(_StockDataHandler_add_del):
     """
     오늘(제일 마지막일)의 데이터를 다루는 핸들러 클래스
     """
-    def update_df_with_another_df(self, another_df:pd.DataFrame, save:bool=True) -> pd.DataFrame:
+    @writer
+    def update_df_with_another_df(self, another_df:pd.DataFrame, save:bool=True, inplace:bool=False) -> pd.DataFrame:
         """
         self.df에 있는 칼럼들의 값을 rdf_today의 값으로 수정한 후, 리턴한다.
         Params:
@@ -329,22 +765,30 @@ class StockDataHandler_update_sert(_StockDataHandler_add_del):
             columns: 여러가지 칼럼이 모두 가능. self.df와 겹치는 칼럼에 대해서만 업데이트
         save:bool
             True이면 self.df에 저장하고, False이면 저장하지 않는다.
+        inplace:bool
+            False(기본)이면 갱신하는 칼럼만 새 배열로 만든다. 스냅샷이나 이전에 받은 df, tdf 등은 바뀌지 않는다.
+            True이면 self.df의 배열에 직접 써서, 갱신 비용이 전체 이력 길이와 무관하다. (engine='frame', save=True인 경우만)
+            이 경우 스냅샷과 이전에 받은 df, tdf 등도 값이 바뀔 수 있으므로, 이를 참조하는 곳이 없을 때만 사용한다.
         참고:
         self.df:
             index: ['일자', '종목코드']
             columns: ['종가', '전일대비', '변동률', '시가', '고가', '저가', '거래량', '거래대금', ...] 등의 여러가지가 있을 수 있음
+        반환된 df는 갱신하지 않은 칼럼을 self.df와 공유하므로 값을 직접 수정하지 말 것
         """
         # another_df의 인덱스를 self.primary_keys로 설정하고, 정렬한다.
         another_df = self._convert_index_to_primary_keys(another_df)
-        df = update_df_with_another_df(
-            df=self.df, 
-            another_df=another_df
-        )
-        if save:
-            self.set_data(df)
+        # self.df는 정렬되어 있고 중복이 없으므로, another_df의 일자 구간에서 행 위치를 구해 위치로 값을 쓴다.
+        # 기본으로는 갱신하는 칼럼만 새 배열로 만들고(스냅샷이 보는 배열에는 쓰지 않음), 인덱스는 그대로이므로 다시 정렬하지 않는다.
+        current = self.df
+        inplace = inplace and save and self.engine == 'frame'
+        df = update_df_positional(df=current, another_df=another_df, inplace=inplace, date_col_name=self.date_col_name)
+        if save and (inplace or df is not current):
+            changed_dates = another_df.index.get_level_values(self.date_col_name).unique()
+            self._assign_df(df, assume_canonical=True, symbol_index=self._symbol_index, changed_dates=changed_dates)
         return df
     
-    def upsert_df_with_similar_df(self, similar_df:pd.DataFrame, save:bool=True) -> pd.DataFrame:
+    @writer
+    def upsert_df_with_similar_df(self, similar_df:pd.DataFrame, save:bool=True, skip_unchanged:bool=False) -> pd.DataFrame:
         """
         self.df에 another_df의 값을 업데이트한다. 
         another_df가 비어있으면 self.df를 그대로 반환한다.
@@ -353,21 +797,231 @@ class StockDataHandler_update_sert(_StockDataHandler_add_del):
                 index 또는 칼럼에 '일자', '종목코드'가 있어야 한다.
             save:bool
                 True이면 self.df에 저장하고, False이면 저장하지 않는다.
+            skip_unchanged:bool
+                True이면 기존 값과 모두 같은 행은 쓰지 않는다. 
+                바뀐 행이 없으면 저장하지 않으며(버전, 캐시, 스냅샷 유지), 변경 일자에도 바뀐 일자만 기록한다.
         """
         if similar_df.empty:
             logger.warning("another_df가 비어있습니다. self.df를 그대로 반환합니다.")
             return self.df
         # similar_df의 인덱스를 self.primary_keys로 설정하고, 정렬한다.
-        similar_df = self._convert_index_to_primary_keys(similar_df)
-        df = upsert_df_with_similar_df(
-            df=self.df, 
-            similar_df=similar_df
-        )
-        if save:
-            self.set_data(df)
+        similar_df = self._apply_dtype_policy(self._convert_index_to_primary_keys(similar_df))
+        current = self.df
+        if not current.empty and set(similar_df.columns) == set(current.columns):
+            # 둘 다 정렬되어 있으므로 전체를 다시 정렬하지 않고 병합한다.
+            df, changed_dates = merge_upsert_df(
+                df=current,
+                similar_df=similar_df,
+                skip_unchanged=skip_unchanged,
+                date_col_name=self.date_col_name,
+            )
+        else:
+            df = upsert_df_with_similar_df(df=current, similar_df=similar_df)
+            changed_dates = similar_df.index.get_level_values(self.date_col_name).unique()
+        if save and df is not current:
+            self._assign_df(df, assume_canonical=True, changed_dates=changed_dates) # 정렬된 새 DataFrame
         return df
 
-class StockDataHandler(StockDataHandler_update_sert):
+class _StockDataHandler_storage(StockDataHandler_update_sert):
+    """
+    일자별 파티션(parquet/feather)으로 저장하고 불러오는 메쏘드
+    """
+    @writer
+    def save(self, path, format:str='parquet'):
+        """
+        self.df를 path에 일자별 파티션으로 저장한다.
+        같은 경로에 이미 저장(또는 로드)한 적이 있으면, 그 이후 변경된 일자의 파티션만 다시 쓴다.
+        (add_single_daily_df 후 save하면 해당 일자만 저장됨)
+        del_date로 삭제한 일자는 파티션도 삭제한다.
+        """
+        storage = {'path': str(Path(path).resolve()), 'format': format}
+        same_storage = self._storage is not None and \
+            {k: self._storage[k] for k in storage} == storage and Path(path).exists()
+        if same_storage and not self._storage['all_columns']:
+            raise ValueError("일부 칼럼만 불러온 데이터는 같은 경로에 저장할 수 없습니다.")
+        if same_storage and not self._dirty_all:
+            dates = sorted(self._dirty_dates)
+        else:
+            # 전체 저장. 삭제된 일자의 파티션도 정리한다.
+            dates = sorted(set(self.date_list) | self._dirty_dates)
+        save_partitioned_df(self.df, path, dates=dates, format=format, date_col_name=self.date_col_name)
+        logger.info(f"{len(dates)}개 일자를 저장했습니다. ({path})")
+        self._dirty_all = False
+        self._dirty_dates = set()
+        self._storage = dict(storage, all_columns=True)
+
+    @writer
+    def load(self, path, start:pd.Timestamp=None, end:pd.Timestamp=None, columns:List[str]=None, format:str='parquet'):
+        """
+        save()로 저장한 데이터를 불러와 self.df로 설정한다.
+        start ~ end 일자 범위와 columns는 파일을 읽기 전에 적용되므로, 필요한 부분만 읽는다.
+        예: dh.load(path, start=dh_today - 300일, columns=['종가', '거래대금'])
+        """
+        df = load_partitioned_df(
+            path, start=start, end=end, columns=columns, format=format,
+            date_col_name=self.date_col_name, symbol_col_name=self.symbol_col_name,
+        )
+        self.set_data(df)
+        self._dirty_all = False
+        self._dirty_dates = set()
+        self._storage = {'path': str(Path(path).resolve()), 'format': format, 'all_columns': columns is None}
+        return self
+
+    @writer
+    def save_arrow(self, path):
+        """
+        self.df를 하나의 Arrow IPC(Feather v2) 파일로 저장한다. (load_arrow로 빠르게 시작하기 위한 용도)
+        """
+        save_arrow_ipc(self.df, path, date_col_name=self.date_col_name, symbol_col_name=self.symbol_col_name)
+
+    @writer
+    def load_arrow(self, path, memory_map:bool=True):
+        """
+        save_arrow로 저장한 파일을 memory map으로 열어 self.df로 설정한다.
+        null이 없는 숫자형 칼럼은 복사 없이 파일 버퍼를 그대로 사용하므로, 
+        같은 파일을 여는 여러 워커 프로세스가 page cache를 공유한다. (해당 칼럼은 읽기 전용)
+        """
+        df = load_arrow_ipc(path, memory_map=memory_map, date_col_name=self.date_col_name, symbol_col_name=self.symbol_col_name)
+        self.set_data(df, assume_canonical=True)
+        return self
+
+class _StockDataHandler_shared(_StockDataHandler_storage):
+    """
+    여러 프로세스(waitress 워커, multiprocessing pool 등)가 하나의 데이터를 공유 메모리로 읽는 메쏘드
+        publisher: dh.publish_shared('krx_prices') / 일일 업데이트 후 dh.publish_shared()
+        worker: dh = StockDataHandler.attach_shared('krx_prices') / 주기적으로 dh.refresh_shared()
+    """
+    @writer
+    def publish_shared(self, name:str=None) -> int:
+        """
+        현재 df를 공유 메모리에 올린다. 처음에는 name이 필요하다.
+        다시 호출하면 같은 이름으로 버전을 올려 publish하고, 이전 버전의 블록은 제거한다.
+        (이미 붙어 있는 프로세스는 refresh_shared() 전까지 이전 버전을 그대로 읽는다.)
+        Returns: publish한 버전
+        """
+        if self._shared_publisher is None:
+            if name is None:
+                raise ValueError("name is required for the first publish.")
+            self._shared_publisher = SharedFramePublisher(name)
+        elif name is not None and name != self._shared_publisher.name:
+            raise ValueError(f"already publishing as {self._shared_publisher.name}.")
+        version = self._shared_publisher.publish(self.df, date_col_name=self.date_col_name, symbol_col_name=self.symbol_col_name)
+        logger.info(f"공유 메모리에 publish했습니다. ({self._shared_publisher.name} v{version})")
+        return version
+
+    def close_shared(self):
+        """
+        publish한 공유 메모리 블록을 모두 제거한다. (publisher 프로세스 종료 전에 호출)
+        """
+        if self._shared_publisher is not None:
+            self._shared_publisher.close()
+            self._shared_publisher = None
+
+    @classmethod
+    def attach_shared(cls, name:str) -> 'StockDataHandler':
+        """
+        publish_shared로 올린 최신 버전에 붙은 핸들러를 반환한다.
+        숫자형 칼럼과 인덱스는 공유 메모리를 복사 없이 사용한다. (읽기 전용, 문자열 칼럼은 category)
+        """
+        dh = cls()
+        dh._attach_shared(name)
+        return dh
+
+    @writer
+    def _attach_shared(self, name:str):
+        df, attachment = attach_shared_frame(name)
+        self.set_data(df, assume_canonical=True)
+        self._shared_attachment = attachment
+
+    def refresh_shared(self) -> bool:
+        """
+        publisher가 새 버전을 publish했으면 다시 붙는다.
+        Returns: 다시 붙었으면 True
+        """
+        if self._shared_attachment is None:
+            raise ValueError("not attached to a shared frame.")
+        if self._shared_attachment.latest_version() == self._shared_attachment.version:
+            return False
+        self._attach_shared(self._shared_attachment.name)
+        return True
+
+
+class StockDataSnapshot(StockDataHandler_property):
+    """
+    특정 버전의 데이터를 보는 읽기 전용 핸들 (StockDataHandler.snapshot())
+    tdf, sdf, df_from_to, query() 등 읽기 메쏘드는 StockDataHandler와 같다.
+    데이터 객체(DataFrame, panel 배열)는 핸들러와 공유하며, 핸들러의 쓰기는 항상 새 객체를 만들어 교체하므로
+    스냅샷이 보는 데이터는 바뀌지 않는다. 스냅샷을 참조하는 곳이 없어지면 이전 버전의 데이터도 해제된다.
+    """
+    def __init__(self, handler:'StockDataHandler'):
+        self.engine = handler.engine
+        self.date_col_name = handler.date_col_name
+        self.symbol_col_name = handler.symbol_col_name
+        self.primary_keys = handler.primary_keys
+        self.sdh = copy.copy(handler.sdh)  # sdh.set_data는 내부 DataFrame을 교체하므로 얕은 복사로 충분
+        self._panel = handler._panel.view() if handler._panel is not None else None
+        self._df = handler._df
+        self._segments = list(handler._segments)
+        self._symbol_index = handler._symbol_index.copy() if handler._symbol_index is not None else None
+        self._version = handler._version
+        self._base_version = handler._base_version
+        self._cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._indicators = None
+        self._write_lock = threading.RLock()  # 같은 스냅샷의 segment를 합칠 때만 사용
+
+    @property
+    def version(self) -> int:
+        return self._version
+    @property
+    def df(self) -> pd.DataFrame:
+        return super().df
+    @df.setter
+    def df(self, value:pd.DataFrame):
+        raise TypeError("StockDataSnapshot is read-only.")
+    def set_data(self, df:pd.DataFrame, assume_canonical:bool=False):
+        raise TypeError("StockDataSnapshot is read-only.")
+    def _assign_df(self, *args, **kwargs):
+        raise TypeError("StockDataSnapshot is read-only.")
+    def _sort_df(self):
+        raise TypeError("StockDataSnapshot is read-only.")
+
+
+class _StockDataHandler_snapshot(_StockDataHandler_shared):
+    """
+    동시에 읽는 쪽을 위한 스냅샷
+    예: (스케줄러가 add_single_daily_df, update_df_with_another_df를 호출하는 동안 요청 처리)
+        snap = dh.snapshot()
+        snap.tdf, snap.sdf('005930')  # 같은 버전의 데이터
+    """
+    def _publish(self):
+        # 쓰기가 끝난 상태로 새 스냅샷을 만들어 한 번에 교체한다.
+        snapshot = StockDataSnapshot(self)
+        self._live_snapshots.add(snapshot)
+        self._snapshot = snapshot
+
+    def snapshot(self) -> StockDataSnapshot:
+        """
+        마지막으로 완료된 쓰기 시점의 읽기 전용 스냅샷을 반환한다. 잠그지 않으므로 비용이 거의 없다.
+        쓰기 도중에 호출해도 쓰기 이전의 스냅샷을 반환한다.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._write_lock:
+                if self._snapshot is None:
+                    self._publish()
+                snapshot = self._snapshot
+        return snapshot
+
+    def live_snapshots(self) -> List[int]:
+        """
+        아직 참조되고 있는(해제되지 않은) 스냅샷의 버전 리스트
+        """
+        return sorted(snapshot.version for snapshot in list(self._live_snapshots))
+
+
+class StockDataHandler(_StockDataHandler_snapshot):
     """
     생성시 df 패러메터를 주면서 호출하거나, 
     set_data 메서드를 통해서 df를 설정할 수 있다.
@@ -375,16 +1029,33 @@ class StockDataHandler(StockDataHandler_update_sert):
     sdf, tdf 등의 xdf의 경우 멀티 인덱스를 제거하고 싱글인덱스
     df_xxx의 경우에는 멀티인덱스를 그대로 유지
     today(금일)의 기준은 df의 인덱스의 마지막 날짜이다. 
+    engine='panel'로 생성하면 칼럼별 (일자 x 종목코드) 2차원 배열로 보관하여 tdf, sdf 등을 빠르게 반환한다.
+    save(path), load(path, start, end, columns)로 일자별 파티션 파일에 저장하고 불러올 수 있다.
+    여러 스레드에서 읽는 경우 snapshot()으로 받은 읽기 전용 스냅샷을 사용한다. (쓰기는 내부 잠금으로 직렬화됨)
+    여러 프로세스에서 읽는 경우 publish_shared(name) / StockDataHandler.attach_shared(name)으로 공유 메모리를 사용한다.
     """
     """df= pd.DataFrame, primary_keys=['일자', '종목코드']"""
-    def __init__(self, df:pd.DataFrame=None):
-        super().__init__(df=df)
+    def __init__(self, df:pd.DataFrame=None, engine:str='frame'):
+        super().__init__(df=df, engine=engine)
+    @writer
     def ready(self):
         """
         초기화하지 않아도 됨.
         self.sdh.ready() > KRX의 최신 데이터를 로드합니다.
         """
         self.sdh.ready()
+    def backfill_from_krx(self, start:pd.Timestamp, end:pd.Timestamp, checkpoint_dir, **kwargs) -> BackfillResult:
+        """
+        start ~ end의 KRX 일별 시세를 받아(backfill_krx_daily) add_daily_dfs로 한 번에 합친다.
+        받아오는 동안에는 쓰기 잠금을 잡지 않는다. 받은 일자는 checkpoint_dir에 저장되므로,
+        중간에 중단되었거나 실패한 일자가 있으면 같은 인자로 다시 호출하여 나머지만 받을 수 있다.
+        kwargs: market, fetch, calendar, max_workers, rate, retries, backoff (backfill_krx_daily 참고)
+        """
+        result = backfill_krx_daily(start, end, checkpoint_dir, **kwargs)
+        if result.dfs:
+            self.add_daily_dfs(result.dfs)
+        return result
+    @writer
     def clear(self):
         """
         현재 데이터를 비웁니다.
@@ -393,6 +1064,46 @@ class StockDataHandler(StockDataHandler_update_sert):
         self.sdh.clear()
         print("Data cleared.")
 
+class RollingWindowStockDataHandler(StockDataHandler):
+    """
+    최근 days개 일자만 보관하는 핸들러 (실시간 프로세스용)
+    set_as_recent_df(days)를 주기적으로 호출하는 대신, 일자 축이 고정된 RollingPanel(engine='panel')에 보관한다.
+    add_single_daily_df로 마지막 일자 이후의 하루치를 추가하면 가장 오래된 일자가 빠지며, 
+    배열을 다시 만들거나 정렬하지 않는다. (종목 수에 비례)
+    set_data, load 등으로 더 긴 데이터를 설정해도 최근 days개 일자만 남는다.
+    tdf, sdf, df 등의 접근자는 StockDataHandler와 같이 일자순으로 반환한다.
+    """
+    def __init__(self, df:pd.DataFrame=None, days:int=700):
+        if days < 1:
+            raise ValueError("days must be >= 1")
+        self.days = days
+        super().__init__(df=df, engine='panel')
+    def _make_panel(self, df:pd.DataFrame) -> RollingPanel:
+        return RollingPanel.from_frame(df, self.date_col_name, self.symbol_col_name, capacity=self.days)
+    def _append_daily_df(self, daily_df:pd.DataFrame):
+        evicting = self._panel.full
+        super()._append_daily_df(daily_df)
+        if evicting:
+            # 가장 오래된 일자가 빠졌으므로, 합쳐 둔 DataFrame은 버리고 append가 아닌 변경으로 기록한다. (지표는 다시 계산)
+            self._df = None
+            self._segments = []
+            self._symbol_index = None
+            self._base_version = self._version
+    @writer
+    def set_as_recent_df(self, days:int=700):
+        """
+        보관하는 일자 수(self.days)를 days로 바꾼다. 
+        """
+        if self._is_empty():
+            logger.warning("DataFrame is empty. Cannot set as recent DataFrame.")
+            raise ValueError("DataFrame is empty. Please set data first.")
+        self.days = days
+        self._panel = RollingPanel.from_panel(self._panel, capacity=days)
+        self._df = None
+        self._segments = []
+        self._symbol_index = None
+        self._bump_version()
+
 if __name__ == "__main__":
     dh = StockDataHandler()
     dh.ready()
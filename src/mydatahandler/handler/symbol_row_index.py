@@ -0,0 +1,114 @@
+from typing import List
+import numpy as np
+import pandas as pd
+
+"""
+종목코드 -> 행 위치(iloc) 인덱스
+StockDataHandler(engine='frame')의 sdf, by_symbol, by_symbols에서 사용한다.
+[일자, 종목코드] 멀티인덱스의 종목코드 codes를 CSR 형식(offsets, order)으로 묶어 두고,
+하루치 데이터가 append될 때마다 chunk를 추가한다.
+df가 일자순으로 정렬되어 있으므로, 각 종목의 행 위치도 일자순이다.
+"""
+
+class _Chunk:
+    """
+    level: 종목코드 레벨 (codes가 가리키는 값)
+    offsets: 종목(code)별 order의 시작 위치. len(level) + 1
+    order: 종목별로 모은 행 위치 (df 전체 기준의 iloc)
+    """
+    def __init__(self, level: pd.Index, offsets: np.ndarray, order: np.ndarray):
+        self.level = level
+        self.offsets = offsets
+        self.order = order
+
+    @classmethod
+    def from_index(cls, index: pd.MultiIndex, level_name: str, row_offset: int) -> '_Chunk':
+        level_num = index.names.index(level_name)
+        codes = np.asarray(index.codes[level_num])
+        level = index.levels[level_num]
+        counts = np.bincount(codes, minlength=len(level))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        order = np.argsort(codes, kind='stable').astype(np.int64) + row_offset
+        return cls(level, offsets, order)
+
+    def positions(self, symbol: str) -> np.ndarray:
+        code = self.level.get_indexer([symbol])[0]
+        if code < 0:
+            return self.order[:0]
+        return self.order[self.offsets[code]:self.offsets[code + 1]]
+
+    def delete_rows(self, start: int, stop: int):
+        # [start, stop) 행을 삭제하고, 뒤쪽 행의 위치를 당긴다.
+        removed = (self.order >= start) & (self.order < stop)
+        if removed.any():
+            counts = np.diff(self.offsets)
+            code_of_order = np.repeat(np.arange(len(counts)), counts)
+            counts = counts - np.bincount(code_of_order[removed], minlength=len(counts))
+            self.offsets = np.concatenate([[0], np.cumsum(counts)])
+            self.order = self.order[~removed]
+        self.order = np.where(self.order >= stop, self.order - (stop - start), self.order)
+
+
+class SymbolRowIndex:
+    def __init__(self, level_name: str = '종목코드'):
+        self.level_name = level_name
+        self._chunks: List[_Chunk] = []
+        self.n_rows = 0  # 인덱스에 포함된 전체 행 수
+
+    @classmethod
+    def from_index(cls, index: pd.MultiIndex, level_name: str = '종목코드') -> 'SymbolRowIndex':
+        symbol_index = cls(level_name)
+        symbol_index.append(index)
+        return symbol_index
+
+    def copy(self) -> 'SymbolRowIndex':
+        """
+        chunk 객체만 새로 만든 복사본. (배열은 공유하며, append/delete_rows는 배열을 제자리에서 바꾸지 않는다.)
+        """
+        symbol_index = SymbolRowIndex(self.level_name)
+        symbol_index._chunks = [_Chunk(chunk.level, chunk.offsets, chunk.order) for chunk in self._chunks]
+        symbol_index.n_rows = self.n_rows
+        return symbol_index
+
+    @property
+    def n_chunks(self) -> int:
+        return len(self._chunks)
+
+    def append(self, index: pd.MultiIndex):
+        """
+        df 뒤에 이어 붙여진 행들(index)을 추가한다.
+        """
+        if len(index) == 0:
+            return
+        self._chunks.append(_Chunk.from_index(index, self.level_name, self.n_rows))
+        self.n_rows += len(index)
+
+    def delete_rows(self, start: int, stop: int):
+        """
+        [start, stop) 범위의 행이 삭제되었음을 반영한다. (예: 특정 일자 삭제)
+        """
+        for chunk in self._chunks:
+            chunk.delete_rows(start, stop)
+        self.n_rows -= stop - start
+
+    def positions(self, symbol: str) -> np.ndarray:
+        """
+        symbol의 행 위치를 일자순으로 반환한다. 없으면 빈 배열
+        """
+        found = [chunk.positions(symbol) for chunk in self._chunks]
+        if len(found) == 1:
+            return found[0]
+        return np.concatenate(found) if found else np.array([], dtype=np.int64)
+
+    def positions_many(self, symbols: List[str]) -> np.ndarray:
+        """
+        symbols의 행 위치를 종목 순서대로(종목 안에서는 일자순) 반환한다.
+        존재하지 않는 종목이 있으면 KeyError
+        """
+        found = []
+        for symbol in dict.fromkeys(symbols):
+            positions = self.positions(symbol)
+            if len(positions) == 0:
+                raise KeyError(symbol)
+            found.append(positions)
+        return np.concatenate(found) if found else np.array([], dtype=np.int64)
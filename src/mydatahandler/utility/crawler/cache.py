@@ -0,0 +1,306 @@
+import hashlib
+import inspect
+import os
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+import pandas as pd
+
+"""
+크롤러 응답을 디스크에 캐시하는 모듈 (KRX, NXT, 네이버 크롤러가 공유)
+path/
+    <namespace>/forever/<키 해시>.pkl   만료되지 않는 항목 (지난 거래일의 일별 시세 등)
+    <namespace>/ttl/<키 해시>.pkl       ttl초 후 만료되는 항목 (장중 시세 등). 전체 개수/크기를 LRU로 제한한다.
+각 파일에는 (키, 만료 시각, 값)을 pickle로 저장한다. 임시 파일에 쓴 후 교체하므로 여러 프로세스가 같이 써도 된다.
+값은 매번 파일에서 읽으므로, 반환된 DataFrame/dict를 수정해도 캐시에는 영향이 없다.
+
+함수에는 @cached_crawl(namespace, ttl=...)을 붙여서 사용한다. (함수의 인자와 반환값은 그대로)
+    ttl: 초, FOREVER(만료 없음), NO_CACHE(캐시하지 않음) 또는 인자를 받아 이 중 하나를 반환하는 함수
+    func.uncached: 캐시를 사용하지 않는 원래 함수
+    func.invalidate(*args, **kwargs): 해당 인자의 캐시 삭제
+캐시 위치는 MYDATAHANDLER_CRAWLER_CACHE 환경변수 (기본: ~/.cache/mydatahandler/crawler)
+캐시 끄기:
+    환경변수 MYDATAHANDLER_CRAWLER_CACHE_ENABLED=0 (또는 false, off, no). 호출할 때마다 확인한다.
+    또는 코드에서 set_crawler_cache(None)
+캐시 파일은 pickle이므로, 다른 사용자가 쓸 수 있는 위치를 캐시 경로로 사용해서는 안 된다.
+(파일을 쓸 수 있으면 이 프로세스에서 임의의 코드를 실행시킬 수 있다.) 기본 경로의 디렉터리는 소유자만 접근하도록 만든다.
+"""
+
+FOREVER = float('inf')
+NO_CACHE = 0
+DEFAULT_CACHE_DIR = Path(os.environ.get(
+    'MYDATAHANDLER_CRAWLER_CACHE', Path.home() / '.cache' / 'mydatahandler' / 'crawler'
+))
+ENABLED_ENV = 'MYDATAHANDLER_CRAWLER_CACHE_ENABLED'
+TODAY_TTL = 60.0  # 오늘 일자의 일별 시세 (장중에는 계속 바뀜)
+_EVENTS = ('hits', 'misses', 'writes', 'expired', 'evictions')
+
+def daily_session_ttl(date: pd.Timestamp = None, today_ttl: float = TODAY_TTL) -> float:
+    """
+    일별 시세 요청의 ttl: 지난 일자는 FOREVER, 오늘은 today_ttl, 미래 일자는 NO_CACHE
+    """
+    today = pd.Timestamp.today().normalize()
+    date = today if date is None else pd.Timestamp(date).normalize()
+    if date < today:
+        return FOREVER
+    return today_ttl if date == today else NO_CACHE
+
+def is_non_empty(value) -> bool:
+    """
+    None이나 빈 DataFrame/dict가 아니면 True (실패 응답을 캐시하지 않기 위한 should_cache)
+    """
+    if value is None:
+        return False
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return not value.empty
+    if isinstance(value, dict):
+        return bool(value)
+    return True
+
+
+class CrawlerCache:
+    """
+    디스크 캐시
+    max_entries, max_bytes: ttl 항목의 최대 개수와 전체 크기. 넘으면 가장 오래 사용하지 않은 항목부터 삭제한다.
+        (FOREVER 항목은 제한하지 않는다. 필요하면 invalidate로 지운다.)
+    stats(): namespace별 hits, misses, writes, expired, evictions
+    """
+    def __init__(self, path=DEFAULT_CACHE_DIR, max_entries: int = 1024, max_bytes: int = 256 * 2**20,
+                 clock: Callable[[], float] = time.time):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._lru: 'OrderedDict[Path, int]' = None  # ttl 항목 파일 -> 크기 (오래 사용하지 않은 순). 처음 필요할 때 만든다.
+        self._counts = Counter()
+
+    @staticmethod
+    def _hash(key) -> str:
+        return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+    def _file(self, namespace: str, key, forever: bool) -> Path:
+        return self.path / namespace / ('forever' if forever else 'ttl') / f"{self._hash(key)}.pkl"
+
+    def _load_lru(self) -> 'OrderedDict[Path, int]':
+        # 디스크의 ttl 항목을 마지막 사용 시각(mtime) 순으로 읽는다.
+        if self._lru is None:
+            entries = []
+            for file in self.path.glob('*/ttl/*.pkl'):
+                try:
+                    stat = file.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, file, stat.st_size))
+            self._lru = OrderedDict((file, size) for _, file, size in sorted(entries))
+        return self._lru
+
+    def _count(self, namespace: str, event: str):
+        with self._lock:
+            self._counts[namespace, event] += 1
+
+    def _read(self, file: Path):
+        try:
+            with open(file, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            self._remove(file)
+            return None
+
+    def _remove(self, file: Path):
+        try:
+            file.unlink()
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            if self._lru is not None:
+                self._lru.pop(file, None)
+
+    def get(self, namespace: str, key, default=None):
+        """
+        캐시된 값. 없거나 만료되었으면 default
+        """
+        for forever in (True, False):
+            file = self._file(namespace, key, forever)
+            entry = self._read(file)
+            if entry is None:
+                continue
+            stored_key, expires, value = entry
+            if stored_key != repr(key):  # 해시 충돌
+                continue
+            if expires < self._clock():
+                self._remove(file)
+                self._count(namespace, 'expired')
+                continue
+            if not forever:
+                try:
+                    os.utime(file)  # 재시작 후에도 LRU 순서를 유지하기 위함
+                except OSError:
+                    pass
+                with self._lock:
+                    lru = self._load_lru()
+                    if file in lru:
+                        lru.move_to_end(file)
+            self._count(namespace, 'hits')
+            return value
+        self._count(namespace, 'misses')
+        return default
+
+    def set(self, namespace: str, key, value, ttl: float = FOREVER):
+        """
+        value를 ttl초 동안 캐시한다. (ttl=FOREVER이면 만료 없음, NO_CACHE(0) 이하면 저장하지 않음)
+        """
+        if ttl <= 0:
+            return
+        forever = ttl == FOREVER
+        file = self._file(namespace, key, forever)
+        self.path.mkdir(parents=True, exist_ok=True, mode=0o700)
+        file.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        data = pickle.dumps((repr(key), FOREVER if forever else self._clock() + ttl, value), protocol=pickle.HIGHEST_PROTOCOL)
+        tmp = file.with_name(f".{file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, file)
+        self._count(namespace, 'writes')
+        if forever:
+            # 같은 키의 ttl 항목이 남아 있으면 지운다.
+            self._remove(self._file(namespace, key, False))
+            return
+        with self._lock:
+            lru = self._load_lru()
+            lru[file] = len(data)
+            lru.move_to_end(file)
+            evicted = []
+            total = sum(lru.values())
+            while lru and (len(lru) > self.max_entries or total > self.max_bytes):
+                old_file, size = lru.popitem(last=False)
+                total -= size
+                evicted.append(old_file)
+        for old_file in evicted:
+            try:
+                old_file.unlink()
+            except FileNotFoundError:
+                pass
+            self._count(old_file.parent.parent.name, 'evictions')
+
+    def invalidate(self, namespace: str = None, key=None) -> int:
+        """
+        캐시 삭제. key가 주어지면 해당 항목만, namespace만 주어지면 namespace 전체, 둘 다 없으면 전체
+        Returns: 삭제한 파일 수
+        """
+        if key is not None:
+            if namespace is None:
+                raise ValueError("key를 지정하려면 namespace도 지정해야 합니다.")
+            files = [self._file(namespace, key, forever) for forever in (True, False)]
+        else:
+            pattern = f"{namespace}/*/*.pkl" if namespace is not None else '*/*/*.pkl'
+            files = list(self.path.glob(pattern))
+        removed = 0
+        for file in files:
+            if file.exists():
+                self._remove(file)
+                removed += 1
+        return removed
+
+    def stats(self, namespace: str = None) -> Dict[str, Dict[str, int]]:
+        """
+        {namespace: {'hits', 'misses', 'writes', 'expired', 'evictions'}} (namespace를 주면 해당 dict만)
+        """
+        result: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            counts = list(self._counts.items())
+        for (ns, event), count in counts:
+            result.setdefault(ns, dict.fromkeys(_EVENTS, 0))[event] = count
+        if namespace is not None:
+            return result.get(namespace, dict.fromkeys(_EVENTS, 0))
+        return result
+
+    def reset_stats(self):
+        with self._lock:
+            self._counts.clear()
+
+_crawler_cache: Optional[CrawlerCache] = None
+_crawler_cache_set = False
+
+def crawler_cache_enabled() -> bool:
+    """
+    환경변수 MYDATAHANDLER_CRAWLER_CACHE_ENABLED가 0, false, off, no이면 False (기본: True)
+    """
+    return os.environ.get(ENABLED_ENV, '1').strip().lower() not in ('0', 'false', 'off', 'no')
+
+def get_crawler_cache() -> Optional[CrawlerCache]:
+    """
+    크롤러 함수들이 사용하는 캐시 (처음 호출될 때 기본 경로로 만든다.)
+    set_crawler_cache(None)이거나 환경변수로 캐시를 끈 경우(crawler_cache_enabled) None
+    """
+    global _crawler_cache, _crawler_cache_set
+    if not crawler_cache_enabled():
+        return None
+    if not _crawler_cache_set:
+        _crawler_cache, _crawler_cache_set = CrawlerCache(), True
+    return _crawler_cache
+
+def set_crawler_cache(cache: Optional[CrawlerCache]):
+    """
+    크롤러 함수들이 사용할 캐시를 바꾼다. None이면 캐시를 사용하지 않는다.
+    """
+    global _crawler_cache, _crawler_cache_set
+    _crawler_cache, _crawler_cache_set = cache, True
+
+_MISSING = object()
+
+def cached_crawl(namespace: str, ttl: Union[float, Callable[..., float]] = FOREVER,
+                 key: Callable[..., Any] = None, should_cache: Callable[[Any], bool] = lambda value: value is not None,
+                 use_cache: Callable[..., bool] = None):
+    """
+    크롤러 함수의 결과를 get_crawler_cache()에 캐시하는 데코레이터
+    ttl, key, use_cache가 함수이면, 호출 인자를 함수의 시그니처에 맞춰(기본값 포함) 키워드 인자로 전달한다.
+    (위치 인자로 호출해도 같은 값을 받는다.)
+    ttl: 초, FOREVER, NO_CACHE 또는 인자를 받아 ttl을 반환하는 함수
+    key: 인자를 받아 캐시 키를 반환하는 함수 (기본: 기본값을 채운 인자 전체)
+    should_cache: 결과를 캐시할지 여부 (기본: None이 아니면 캐시)
+    use_cache: 인자를 받아 캐시를 사용할지 여부를 반환하는 함수 (예: 테스트용 url이면 False)
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        def bind(args, kwargs) -> Dict[str, Any]:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return dict(bound.arguments)
+        def make_key(arguments: Dict[str, Any]):
+            return key(**arguments) if key is not None else tuple(arguments.items())
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_crawler_cache()
+            if cache is None:
+                return func(*args, **kwargs)
+            arguments = bind(args, kwargs)
+            if use_cache is not None and not use_cache(**arguments):
+                return func(*args, **kwargs)
+            seconds = ttl(**arguments) if callable(ttl) else ttl
+            if seconds <= 0:
+                return func(*args, **kwargs)
+            cache_key = make_key(arguments)
+            value = cache.get(namespace, cache_key, _MISSING)
+            if value is not _MISSING:
+                return value
+            value = func(*args, **kwargs)
+            if should_cache(value):
+                cache.set(namespace, cache_key, value, seconds)
+            return value
+
+        def invalidate(*args, **kwargs) -> int:
+            cache = get_crawler_cache()
+            return cache.invalidate(namespace, make_key(bind(args, kwargs))) if cache is not None else 0
+
+        wrapper.uncached = func
+        wrapper.invalidate = invalidate
+        wrapper.cache_namespace = namespace
+        return wrapper
+    return decorator
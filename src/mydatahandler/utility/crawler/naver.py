@@ -6,6 +6,11 @@ import requests
 from bs4 import BeautifulSoup
 import re
 
+from mydatahandler.utility.crawler.cache import cached_crawl, is_non_empty
+
+REALTIME_TTL = 10.0  # 현재가 등 장중 시세의 캐시 시간(초)
+INTRADAY_CHART_TTL = 30.0
+
 def convert_market_cap(value: str) -> int:
     """
     시가총액 문자열을 정수형 숫자로 변환합니다.
@@ -31,6 +36,7 @@ def convert_number(value: str) -> int:
     return int(value.replace(',', ''))
 
 # 네이버 금융에서 주식 종목 정보를 가져오는 함수    
+@cached_crawl('naver_stock_info', ttl=REALTIME_TTL, should_cache=is_non_empty)
 def fetch_acc_stock_info_from_naver_as_dict(stock_symbol)->Optional[Dict]:
     """
     columns = [
@@ -172,6 +178,7 @@ def fetch_trading_value_from_naver(symbol:str)->int:
     info = fetch_acc_stock_info_from_naver_as_dict(symbol)
     return info['거래대금']
 
+@cached_crawl('naver_intraday_chart', ttl=INTRADAY_CHART_TTL, should_cache=is_non_empty)
 def get_intraday_chart_from_naver(stock_code, minute=1)->pd.DataFrame:
     """ 
     Index(['종가', '시가', '고가', '저가', '거래량', '평균가', '추정거래대금', '누적거래대금'], dtype='object')
@@ -204,6 +211,7 @@ def chunks(lst, n):
     for i in range(0, len(lst), n):
         yield lst[i:i + n]
 
+@cached_crawl('naver_current_ohlcv', ttl=REALTIME_TTL, key=lambda symbols: tuple(symbols), should_cache=is_non_empty)
 def get_multiple_current_ohlcv_from_naver(symbols:List[str])->pd.DataFrame:
     """
     columns = [
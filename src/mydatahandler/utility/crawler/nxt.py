@@ -1,77 +1,146 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
 import pandas as pd
 import requests
-import time
+from requests.adapters import HTTPAdapter
+
+from mydatahandler.utility.crawler.cache import cached_crawl, daily_session_ttl, is_non_empty
+
+NXT_URL = "https://nextrade.co.kr/brdinfoTime/brdinfoTimeListAll.do"
+PAGE_UNIT = 1000  # 한 번에 요청하는 종목 수. 서버가 더 적게 주면 받은 개수를 페이지 크기로 사용한다.
+MAX_WORKERS = 4
+
+COLUMNS_MAPPING = {
+    'isuSrdCd': '종목코드',
+    'isuCd': '표준코드',
+    'isuAbwdNm': '종목명',
+    'mktNm': '마켓구분',
+    'curPrc': '종가',
+    'contrastPrc': '전일대비',
+    'upDownRate': '변동률',
+    'oppr': '시가',
+    'hgpr': '고가',
+    'lwpr': '저가',
+    'accTdQty': '거래량',
+    'accTrval': '거래대금',
+    'mktId': '시장ID',
+}
+
+HEADERS = {
+    "Accept": "application/json, text/javascript, */*; q=0.01",
+    "Content-Type": "application/x-www-form-urlencoded",
+    "Origin": "https://nextrade.co.kr",
+    "Referer": "https://nextrade.co.kr/menu/transactionStatusMain/menuList.do",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
+    "X-Requested-With": "XMLHttpRequest",
+}
+
+def _make_session(max_workers: int) -> requests.Session:
+    # 페이지를 동시에 요청하므로 연결을 스레드 수만큼 유지한다.
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(max_workers, 1))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(HEADERS)
+    return session
+
+def _fetch_page(session: requests.Session, url: str, str_date: str, page_index: int, page_unit: int) -> dict:
+    """
+    jqGrid 형식의 한 페이지: {'rows': [...], 'records': 전체 종목 수, 'total': 전체 페이지 수, 'page': 페이지}
+    """
+    payload = {
+        "pageUnit": str(page_unit),
+        "scAggDd": str_date,
+        "scMktId": "",
+        "searchKeyword": "",
+        "_search": "false",
+        "nd": str(int(time.time() * 1000)),
+        "pageIndex": str(page_index),
+        "sidx": "",
+        "sord": "asc"
+    }
+    response = session.post(url, data=payload)
+    if not response.ok:
+        raise Exception(f"요청 실패: {response.status_code} (pageIndex={page_index})")
+    return response.json()
+
+def _page_count(first: dict, page_unit: int) -> Tuple[int, int]:
+    """
+    첫 페이지로 (실제 페이지 크기, 전체 페이지 수)를 구한다.
+    서버가 요청한 pageUnit보다 적게 주면(최대 크기 제한) 받은 개수를 페이지 크기로 본다.
+    records(전체 종목 수)가 없으면 total(전체 페이지 수)을 사용한다.
+    """
+    rows = first.get("rows", [])
+    records = int(first.get("records") or 0)
+    total = int(first.get("total") or 0)
+    if not records:
+        return max(len(rows), 1), (max(total, 1) if rows else 1)
+    if records <= len(rows):
+        return len(rows), 1
+    unit = len(rows) if 0 < len(rows) < page_unit else page_unit
+    return unit, math.ceil(records / unit)
+
+def fetch_nxt_rows(date: pd.Timestamp, page_unit: int = PAGE_UNIT, max_workers: int = MAX_WORKERS,
+                   url: str = NXT_URL, session: requests.Session = None) -> List[dict]:
+    """
+    넥스트레이드 종목별 시세의 모든 페이지를 받아 행(dict) 리스트로 반환한다.
+    첫 페이지에서 전체 종목 수를 확인하고, 나머지 페이지는 max_workers개의 스레드로 동시에 요청한다.
+    """
+    str_date = pd.to_datetime(date).strftime('%Y%m%d')
+    own_session = session is None
+    session = _make_session(max_workers) if own_session else session
+    try:
+        first = _fetch_page(session, url, str_date, 1, page_unit)
+        unit, pages = _page_count(first, page_unit)
+        rows = list(first.get("rows", []))
+        if pages > 1:
+            with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+                results = executor.map(lambda page: _fetch_page(session, url, str_date, page, unit), range(2, pages + 1))
+                for result in results:
+                    rows.extend(result.get("rows", []))
+    finally:
+        if own_session:
+            session.close()
+    return rows
 
 # Fixme: 장 시잔 전에 불렀을 때 어떠한지 확인하기
-def fetch_daily_stock_prices_from_nxt(date: pd.Timestamp) -> pd.DataFrame:
+# 기본 주소와 세션으로 요청한 경우에만 캐시한다. (다른 url/session의 결과가 실제 일자의 캐시에 들어가지 않도록)
+# 빈 결과(일시적인 오류 응답일 수 있음)는 캐시하지 않는다.
+@cached_crawl('nxt_daily', ttl=lambda date, **kwargs: daily_session_ttl(date),
+              key=lambda date, **kwargs: pd.to_datetime(date).strftime('%Y%m%d'),
+              use_cache=lambda url, session, **kwargs: url == NXT_URL and session is None,
+              should_cache=is_non_empty)
+def fetch_daily_stock_prices_from_nxt(date: pd.Timestamp, page_unit: int = PAGE_UNIT, max_workers: int = MAX_WORKERS,
+                                      url: str = NXT_URL, session: requests.Session = None) -> pd.DataFrame:
     """
     columns = ['일자', '종목코드', '표준코드', '종목명', '마켓구분', '종가', '전일대비', '변동률', 
         '시가', '고가', '저가', '거래량', '거래대금', '시장ID']
     
     넥스트레이드에서 지정한 날짜의 주식 데이터를 크롤링하여 DataFrame으로 반환.
+    모든 페이지를 받아서 합친다. (fetch_nxt_rows)
     
     Parameters:
         date (str): 조회할 날짜 (예: "20250304") > YYYYMMDD 형식으로 입력. 
             참고로 넥스트레이드 최초 거래일은 20250304이다. 
+        page_unit: 한 페이지의 종목 수 (서버가 허용하는 만큼 크게 요청)
+        max_workers: 나머지 페이지를 동시에 요청하는 스레드 수
+        url, session: 요청할 주소와 requests.Session (테스트용)
     
     Returns:
         pd.DataFrame: 한글 컬럼명이 적용된 데이터프레임
     """
     date = pd.to_datetime(date).normalize()  # 날짜를 정규화하여 시간 부분 제거
-    str_date = pd.to_datetime(date).strftime('%Y%m%d')  # 날짜 형식 변환
-    
-    columns_mapping = {
-        'isuSrdCd': '종목코드',
-        'isuCd': '표준코드',
-        'isuAbwdNm': '종목명',
-        'mktNm': '마켓구분',
-        'curPrc': '종가',
-        'contrastPrc': '전일대비',
-        'upDownRate': '변동률',
-        'oppr': '시가',
-        'hgpr': '고가',
-        'lwpr': '저가',
-        'accTdQty': '거래량',
-        'accTrval': '거래대금',
-        'mktId': '시장ID',
-    }
-    
-    url = "https://nextrade.co.kr/brdinfoTime/brdinfoTimeListAll.do"
-    
-    headers = {
-        "Accept": "application/json, text/javascript, */*; q=0.01",
-        "Content-Type": "application/x-www-form-urlencoded",
-        "Origin": "https://nextrade.co.kr",
-        "Referer": "https://nextrade.co.kr/menu/transactionStatusMain/menuList.do",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
-        "X-Requested-With": "XMLHttpRequest",
-    }
-    
-    
-    payload = {
-        "pageUnit": "20",
-        "scAggDd": str_date,
-        "scMktId": "",
-        "searchKeyword": "",
-        "_search": "false",
-        "nd": str(int(time.time() * 1000)),
-        "pageIndex": "1",
-        "sidx": "",
-        "sord": "asc"
-    }
-
-    response = requests.post(url, headers=headers, data=payload)
-
-    if not response.ok:
-        raise Exception(f"요청 실패: {response.status_code}")
-    
-    data = response.json().get("rows", [])
+    data = fetch_nxt_rows(date, page_unit=page_unit, max_workers=max_workers, url=url, session=session)
     
     if not data:
         # raise Exception("데이터 없음")
-        return pd.DataFrame(columns=columns_mapping.values())  # 빈 데이터프레임 반환
+        return pd.DataFrame(columns=['일자'] + list(COLUMNS_MAPPING.values()))  # 빈 데이터프레임 반환
     df = pd.DataFrame(data)
-    df_selected = df[list(columns_mapping.keys())].rename(columns=columns_mapping)
+    df_selected = df[list(COLUMNS_MAPPING.keys())].rename(columns=COLUMNS_MAPPING)
+    # 페이지를 나누어 받는 동안 순서가 바뀌면 같은 종목이 두 번 들어올 수 있다.
+    df_selected = df_selected.drop_duplicates(subset='종목코드', keep='first').reset_index(drop=True)
 
     # 종목코드: 앞 'A' 제거하고 6자리로 보정
     df_selected['종목코드'] = df_selected['종목코드'].apply(
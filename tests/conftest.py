@@ -0,0 +1,27 @@
+import pytest
+
+from mydatahandler.utility.crawler import cache as crawler_cache
+from krx_raw import Fake전종목시세
+
+
+@pytest.fixture(autouse=True)
+def isolated_crawler_cache(tmp_path, monkeypatch):
+    """
+    테스트마다 빈 임시 디렉터리의 크롤러 캐시를 사용한다. (~/.cache를 읽거나 쓰지 않음)
+    """
+    cache = crawler_cache.CrawlerCache(tmp_path / 'crawler_cache')
+    monkeypatch.setattr(crawler_cache, '_crawler_cache', cache)
+    monkeypatch.setattr(crawler_cache, '_crawler_cache_set', True)
+    monkeypatch.delenv(crawler_cache.ENABLED_ENV, raising=False)
+    return cache
+
+
+@pytest.fixture
+def fake_krx(monkeypatch):
+    """
+    crawler_krx.전종목시세를 가짜 응답(krx_raw.Fake전종목시세)으로 바꾼다. fake_krx.payloads에 일자별 응답을 넣는다.
+    """
+    from mydatahandler.handler.functions import crawler_krx
+    fake = Fake전종목시세()
+    monkeypatch.setattr(crawler_krx, '전종목시세', fake)
+    return fake
@@ -0,0 +1,46 @@
+"""
+KRX 전종목시세().fetch 형식의 가짜 응답 (test_crawler_krx, test_backfill에서 사용)
+"""
+import pandas as pd
+
+RAW_COLUMNS = [
+    'ISU_SRT_CD', 'ISU_CD', 'ISU_ABBRV', 'MKT_NM', 'SECT_TP_NM', 'TDD_CLSPRC', 'FLUC_TP_CD', 'CMPPREVDD_PRC', 'FLUC_RT',
+    'TDD_OPNPRC', 'TDD_HGPRC', 'TDD_LWPRC', 'ACC_TRDVOL', 'ACC_TRDVAL', 'MKTCAP', 'LIST_SHRS', 'MKT_ID',
+]
+
+
+def raw_row(symbol, close='78,000', change='-500', rate='-0.64', sector='-', **overrides):
+    row = dict(zip(RAW_COLUMNS, [
+        symbol, f'KR7{symbol}003', f'종목 {symbol}', 'KOSPI', sector, close, '2', change, rate,
+        '78,500', '79,000', '77,500', '10,000,000', '780,000,000,000', '465,000,000,000,000', '5,969,782,550', 'STK',
+    ]))
+    row.update(overrides)
+    return row
+
+
+def make_raw(*rows):
+    return pd.DataFrame(list(rows), columns=RAW_COLUMNS)
+
+
+def holiday_raw():
+    return make_raw(*(raw_row(symbol, close='-', change='-', rate='-') for symbol in ['005930', '000660']))
+
+
+class Fake전종목시세:
+    """
+    전종목시세 대신 사용하는 가짜. payloads: {'YYYYMMDD': raw DataFrame 또는 raw DataFrame 리스트(호출마다 하나씩)}
+    없는 일자는 휴일 응답을 준다.
+    """
+    def __init__(self, payloads=None):
+        self.payloads = dict(payloads or {})
+        self.calls = []
+
+    def __call__(self):
+        return self
+
+    def fetch(self, date, market):
+        self.calls.append((date, market))
+        payload = self.payloads.get(date, holiday_raw())
+        if isinstance(payload, list):
+            payload = payload.pop(0) if len(payload) > 1 else payload[0]
+        return payload.copy()
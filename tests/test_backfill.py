@@ -0,0 +1,222 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from mydatahandler.handler.functions import backfill_krx_daily, CheckpointStore, TradingCalendar
+from mydatahandler.handler.functions.crawler_krx import parse_krx_daily, KRX_COLUMNS
+from krx_raw import make_raw, raw_row
+
+START, END = '2024-01-01', '2024-01-31'
+
+
+@pytest.fixture
+def calendar():
+    return TradingCalendar(pd.bdate_range(START, END), start=START, end=END, source='xkrx')
+
+
+class FakeFetch:
+    """
+    fetch(date, market) 대신 사용하는 가짜 KRX 요청
+    fail_times: 일자 -> 실패할 횟수 (float('inf')이면 계속 실패)
+    """
+    def __init__(self, fail_times=None, empty_dates=()):
+        self.fail_times = dict(fail_times or {})
+        self.empty_dates = {pd.Timestamp(date) for date in empty_dates}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, date, market):
+        with self._lock:
+            self.calls.append((date, market))
+            if self.fail_times.get(date, 0) > 0:
+                self.fail_times[date] -= 1
+                raise ConnectionError(f"{date.date()} failed")
+        if date in self.empty_dates:
+            return pd.DataFrame()
+        return pd.DataFrame({
+            '일자': date,
+            '종목코드': ['005930', '000660'],
+            '종가': [70000 + date.day, 120000 + date.day],
+            '시장': market,
+        })
+
+    def dates(self):
+        return sorted(date for date, _ in self.calls)
+
+
+def _backfill(checkpoint_dir, calendar, fetch, start=START, end=END, **kwargs):
+    kwargs = dict(dict(max_workers=3, rate=1000, retries=2, backoff=0.01, sleep=lambda s: None), **kwargs)
+    return backfill_krx_daily(start, end, checkpoint_dir, fetch=fetch, calendar=calendar, **kwargs)
+
+
+def test_markets_do_not_share_checkpoints(tmp_path, calendar):
+    kospi = FakeFetch()
+    result = _backfill(tmp_path, calendar, kospi, end='2024-01-05', market='KOSPI')
+    assert len(result.fetched) == 5
+
+    kosdaq = FakeFetch()
+    result = _backfill(tmp_path, calendar, kosdaq, end='2024-01-05', market='KOSDAQ')
+    assert len(kosdaq.calls) == 5 and not result.skipped
+    assert {df['시장'].iloc[0] for df in result.dfs} == {'KOSDAQ'}
+    assert CheckpointStore(tmp_path, 'KOSPI').done_dates() == CheckpointStore(tmp_path, 'KOSDAQ').done_dates()
+
+
+def test_default_calendar_covers_the_backfill_range(tmp_path, monkeypatch):
+    from mydatahandler.handler.functions import trading_calendar
+    # 기본 달력은 최근 범위만 포함한다.
+    recent = TradingCalendar(pd.bdate_range('2025-01-01', '2025-12-31'), start='2025-01-01', end='2025-12-31', source='cache')
+    monkeypatch.setattr(trading_calendar, '_default_calendar', recent)
+    loaded = []
+    def fake_sessions(start, end):
+        loaded.append((start, end))
+        return pd.bdate_range(start, end).difference(pd.to_datetime(['2019-01-01', '2019-02-04', '2019-02-05', '2019-02-06']))
+    monkeypatch.setattr(trading_calendar, 'load_xkrx_sessions', fake_sessions)
+
+    fetch = FakeFetch()
+    result = backfill_krx_daily('2019-01-01', '2019-02-08', tmp_path, fetch=fetch, rate=1000, sleep=lambda s: None)
+    assert loaded == [(pd.Timestamp('2019-01-01'), pd.Timestamp('2019-02-08'))]
+    holidays = pd.to_datetime(['2019-01-01', '2019-02-04', '2019-02-05', '2019-02-06'])
+    assert not set(fetch.dates()) & set(holidays)
+    assert len(fetch.calls) == len(pd.bdate_range('2019-01-01', '2019-02-08')) - 4
+    assert not list((tmp_path / 'ALL').glob('*.empty'))
+    assert len(result.dfs) == len(fetch.calls)
+
+    # 기본 달력이 범위를 포함하면 exchange_calendars를 다시 읽지 않는다.
+    loaded.clear()
+    assert TradingCalendar.for_range('2025-03-01', '2025-03-31') is recent and not loaded
+
+
+def test_range_calendar_falls_back_without_exchange_calendars(monkeypatch):
+    from mydatahandler.handler.functions import trading_calendar
+    base = TradingCalendar(pd.bdate_range('2025-01-01', '2025-12-31'), start='2025-01-01', end='2025-12-31',
+                           closures=['2019-01-02'], source='cache')
+    def no_xcals(start, end):
+        raise ImportError
+    monkeypatch.setattr(trading_calendar, 'load_xkrx_sessions', no_xcals)
+    calendar = TradingCalendar.for_range('2019-01-01', '2019-01-04', base=base)
+    assert calendar is base
+    assert list(calendar.sessions_between('2019-01-01', '2019-01-04')) == list(pd.to_datetime(['2019-01-01', '2019-01-03', '2019-01-04']))
+
+
+class Interrupted(BaseException):
+    """
+    실행 중단 (KeyboardInterrupt처럼 backfill의 예외 처리에 잡히지 않음)
+    """
+
+
+def test_interrupted_run_resumes_only_missing_dates(tmp_path, calendar):
+    sessions = list(calendar.sessions_between(START, END))
+    stop_after = 7
+    class StoppingFetch(FakeFetch):
+        def __call__(self, date, market):
+            if len(self.calls) >= stop_after:
+                raise Interrupted()
+            return super().__call__(date, market)
+    with pytest.raises(Interrupted):
+        _backfill(tmp_path, calendar, StoppingFetch(), max_workers=1)
+    done = CheckpointStore(tmp_path).done_dates()
+    assert len(done) == stop_after
+
+    fetch = FakeFetch()
+    result = _backfill(tmp_path, calendar, fetch)
+    assert fetch.dates() == sorted(set(sessions) - done)
+    assert sorted(result.skipped) == sorted(done)
+    assert not result.failed
+    assert [df['일자'].iloc[0] for df in result.dfs] == sessions
+
+    # 모두 저장된 후에는 요청하지 않는다.
+    fetch = FakeFetch()
+    result = _backfill(tmp_path, calendar, fetch)
+    assert not fetch.calls and len(result.dfs) == len(sessions)
+
+
+def test_transient_failures_are_retried(tmp_path, calendar):
+    flaky = pd.Timestamp('2024-01-10')
+    fetch = FakeFetch(fail_times={flaky: 2})
+    sleeps = []
+    result = _backfill(tmp_path, calendar, fetch, end='2024-01-12', retries=2, backoff=0.5, sleep=sleeps.append)
+    assert fetch.dates().count(flaky) == 3
+    assert flaky in result.fetched and not result.failed
+    assert 0.5 in sleeps and 1.0 in sleeps  # backoff * 2^n
+    assert CheckpointStore(tmp_path).load(flaky)['종가'].tolist() == [70010, 120010]
+
+
+def test_persistent_failures_are_reported(tmp_path, calendar):
+    broken = pd.Timestamp('2024-01-09')
+    fetch = FakeFetch(fail_times={broken: float('inf')}, empty_dates=['2024-01-08'])
+    result = _backfill(tmp_path, calendar, fetch, end='2024-01-12', retries=2)
+    assert list(result.failed) == [broken]
+    assert isinstance(result.failed[broken], ConnectionError)
+    assert fetch.dates().count(broken) == 3
+    assert broken not in CheckpointStore(tmp_path).done_dates()
+    # 데이터가 없는 일자는 .empty로 저장되고 결과에서 빠진다.
+    assert (tmp_path / 'ALL' / '2024-01-08.empty').exists()
+    assert [df['일자'].iloc[0] for df in result.dfs] == list(pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04',
+                                                                           '2024-01-05', '2024-01-10', '2024-01-11', '2024-01-12']))
+
+    # 다시 실행하면 실패한 일자만 요청한다.
+    fetch = FakeFetch()
+    result = _backfill(tmp_path, calendar, fetch, end='2024-01-12')
+    assert fetch.dates() == [broken] and not result.failed
+
+
+def test_handler_merges_backfill_once(tmp_path, calendar, monkeypatch):
+    from mydatahandler import StockDataHandler
+    dh = StockDataHandler()
+    merges = []
+    original = StockDataHandler.add_daily_dfs
+    def counting_add_daily_dfs(self, daily_dfs):
+        merges.append(len(daily_dfs))
+        return original(self, daily_dfs)
+    monkeypatch.setattr(StockDataHandler, 'add_daily_dfs', counting_add_daily_dfs)
+    result = dh.backfill_from_krx('2024-01-01', '2024-01-12', tmp_path, fetch=FakeFetch(), calendar=calendar,
+                                  rate=1000, sleep=lambda s: None)
+    assert merges == [10] and len(result.fetched) == 10
+    assert len(dh.date_list) == 10
+    assert dh.df.loc[(pd.Timestamp('2024-01-12'), '005930'), '종가'] == 70012
+
+
+def krx_payload(day):
+    # 2024-01-0{day}의 응답. 관리구분이 없는 종목과 거래정지(시가 '-') 종목을 포함한다.
+    return make_raw(
+        raw_row('005930', close=f'{78000 + day * 100:,}'),
+        raw_row('000660', close=f'{140000 + day * 100:,}', sector=float('nan')),
+        raw_row('000020', TDD_OPNPRC='-', change='-', rate='-'),
+    )
+
+
+def test_default_fetch_parses_and_checkpoints_krx_payloads(tmp_path, calendar, fake_krx, isolated_crawler_cache):
+    # 2024-01-01(신정)은 달력에 거래일로 들어 있지만 KRX는 휴일 응답을 준다.
+    fake_krx.payloads.update({f'2024010{day}': krx_payload(day) for day in range(2, 6)})
+    result = _backfill(tmp_path, calendar, None, end='2024-01-05')
+    assert sorted(fake_krx.calls) == [(f'2024010{day}', 'ALL') for day in range(1, 6)]
+    assert result.fetched == list(pd.bdate_range('2024-01-01', '2024-01-05')) and not result.failed
+    assert (tmp_path / 'ALL' / '2024-01-01.empty').exists()
+    # 받은 DataFrame과 체크포인트(Feather)에서 읽은 DataFrame이 parse_krx_daily의 결과와 같다. (칼럼, dtype, NaN)
+    assert len(result.dfs) == 4
+    for day, df in zip(range(2, 6), result.dfs):
+        date = pd.Timestamp(f'2024-01-0{day}')
+        expected = parse_krx_daily(krx_payload(day), date).reset_index(drop=True)
+        assert list(df.columns) == ['일자'] + KRX_COLUMNS + ['기준가']
+        pd.testing.assert_frame_equal(df, expected)
+        pd.testing.assert_frame_equal(CheckpointStore(tmp_path).load(date), expected)
+    assert pd.isna(result.dfs[0]['관리구분'].iloc[1]) and result.dfs[0]['시가'].iloc[2] == -1
+    # 체크포인트를 사용하므로 크롤러 캐시에는 쓰지 않는다.
+    assert isolated_crawler_cache.stats('krx_daily')['writes'] == 0
+
+    fake_krx.calls.clear()
+    result = _backfill(tmp_path, calendar, None, end='2024-01-05')
+    assert not fake_krx.calls and len(result.skipped) == 5 and len(result.dfs) == 4
+
+
+def test_handler_backfill_with_default_fetch(tmp_path, calendar, fake_krx):
+    from mydatahandler import StockDataHandler
+    fake_krx.payloads.update({f'2024010{day}': krx_payload(day) for day in range(2, 6)})
+    dh = StockDataHandler()
+    dh.backfill_from_krx('2024-01-01', '2024-01-05', tmp_path, market='KOSPI', calendar=calendar,
+                         rate=1000, sleep=lambda s: None)
+    assert {market for _, market in fake_krx.calls} == {'STK'}
+    assert list(dh.date_list) == list(pd.bdate_range('2024-01-02', '2024-01-05'))
+    assert dh.df.loc[(pd.Timestamp('2024-01-05'), '005930'), '종가'] == 78500
+    assert dh.df['종가'].dtype.kind == 'i'
@@ -0,0 +1,206 @@
+import pandas as pd
+import pytest
+
+from mydatahandler.utility.crawler import cache as crawler_cache
+from mydatahandler.utility.crawler.cache import CrawlerCache, FOREVER, NO_CACHE, cached_crawl, is_non_empty
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return CrawlerCache(tmp_path / 'cache', clock=clock)
+
+
+def test_get_returns_default_when_missing(cache):
+    assert cache.get('ns', 'a', 'default') == 'default'
+    assert cache.stats('ns')['misses'] == 1
+
+
+def test_values_are_copies(cache):
+    cache.set('ns', 'df', pd.DataFrame({'a': [1, 2]}))
+    df = cache.get('ns', 'df')
+    df.loc[0, 'a'] = 100
+    assert cache.get('ns', 'df')['a'].tolist() == [1, 2]
+
+
+def test_ttl_expiry(cache, clock):
+    cache.set('ns', 'a', 1, ttl=60)
+    clock.now += 59
+    assert cache.get('ns', 'a') == 1
+    clock.now += 2
+    assert cache.get('ns', 'a') is None
+    assert not list((cache.path / 'ns' / 'ttl').glob('*.pkl'))
+    assert cache.stats('ns') == {'hits': 1, 'misses': 1, 'writes': 1, 'expired': 1, 'evictions': 0}
+
+
+def test_forever_and_no_cache(cache, clock):
+    cache.set('ns', 'forever', 1, ttl=FOREVER)
+    cache.set('ns', 'never', 2, ttl=NO_CACHE)
+    clock.now += 10 ** 9
+    assert cache.get('ns', 'forever') == 1
+    assert cache.get('ns', 'never') is None
+    assert cache.stats('ns')['writes'] == 1
+
+
+def test_forever_replaces_ttl_entry(cache):
+    cache.set('ns', 'a', 1, ttl=60)
+    cache.set('ns', 'a', 2, ttl=FOREVER)
+    assert cache.get('ns', 'a') == 2
+    assert not list((cache.path / 'ns' / 'ttl').glob('*.pkl'))
+
+
+def test_lru_eviction_by_entries(tmp_path, clock):
+    cache = CrawlerCache(tmp_path, max_entries=2, clock=clock)
+    cache.set('ns', 'a', 1, ttl=60)
+    cache.set('ns', 'b', 2, ttl=60)
+    assert cache.get('ns', 'a') == 1  # b가 가장 오래 사용하지 않은 항목이 된다.
+    cache.set('ns', 'c', 3, ttl=60)
+    assert cache.get('ns', 'b') is None
+    assert (cache.get('ns', 'a'), cache.get('ns', 'c')) == (1, 3)
+    assert cache.stats('ns')['evictions'] == 1
+
+
+def test_lru_eviction_by_bytes(tmp_path, clock):
+    payload = b'x' * 1000
+    cache = CrawlerCache(tmp_path, max_bytes=2500, clock=clock)
+    for key in 'abc':
+        cache.set('ns', key, payload, ttl=60)
+    assert cache.get('ns', 'a') is None
+    assert cache.get('ns', 'b') == cache.get('ns', 'c') == payload
+    assert cache.stats('ns')['evictions'] == 1
+
+
+def test_forever_entries_are_not_evicted(tmp_path, clock):
+    cache = CrawlerCache(tmp_path, max_entries=1, clock=clock)
+    cache.set('ns', 'a', 1)
+    cache.set('ns', 'b', 2)
+    cache.set('ns', 'c', 3, ttl=60)
+    assert [cache.get('ns', key) for key in 'abc'] == [1, 2, 3]
+
+
+def test_lru_order_is_restored_from_disk(tmp_path, clock):
+    import os
+    cache = CrawlerCache(tmp_path, max_entries=2, clock=clock)
+    cache.set('ns', 'a', 1, ttl=60)
+    cache.set('ns', 'b', 2, ttl=60)
+    # 다시 시작한 프로세스: 파일의 수정 시각으로 순서를 읽는다.
+    os.utime(cache._file('ns', 'a', False), (1, 1))
+    restarted = CrawlerCache(tmp_path, max_entries=2, clock=clock)
+    restarted.set('ns', 'c', 3, ttl=60)
+    assert restarted.get('ns', 'a') is None
+    assert restarted.get('ns', 'b') == 2
+
+
+def test_invalidate(cache):
+    cache.set('ns', 'a', 1)
+    cache.set('ns', 'b', 2, ttl=60)
+    cache.set('other', 'a', 3)
+    with pytest.raises(ValueError):
+        cache.invalidate(key='a')
+    assert cache.invalidate('ns', 'a') == 1
+    assert cache.get('ns', 'a') is None and cache.get('ns', 'b') == 2
+    assert cache.invalidate('ns') == 1
+    assert cache.get('other', 'a') == 3
+    assert cache.invalidate() == 1
+    assert cache.get('other', 'a') is None
+
+
+def test_stats_by_namespace(cache):
+    cache.set('ns', 'a', 1)
+    cache.get('ns', 'a')
+    cache.get('other', 'a')
+    assert cache.stats() == {
+        'ns': {'hits': 1, 'misses': 0, 'writes': 1, 'expired': 0, 'evictions': 0},
+        'other': {'hits': 0, 'misses': 1, 'writes': 0, 'expired': 0, 'evictions': 0},
+    }
+    assert cache.stats('unknown') == {'hits': 0, 'misses': 0, 'writes': 0, 'expired': 0, 'evictions': 0}
+    cache.reset_stats()
+    assert cache.stats() == {}
+
+
+def test_corrupted_file_is_removed(cache):
+    cache.set('ns', 'a', 1)
+    file = cache._file('ns', 'a', True)
+    file.write_bytes(b'not a pickle')
+    assert cache.get('ns', 'a') is None
+    assert not file.exists()
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, False), (pd.DataFrame(), False), ({}, False), (pd.DataFrame({'a': [1]}), True), ({'a': 1}, True), (0, True),
+])
+def test_is_non_empty(value, expected):
+    assert is_non_empty(value) is expected
+
+
+def make_counted(**kwargs):
+    calls = []
+    @cached_crawl('counted', **kwargs)
+    def fetch(date, market='ALL'):
+        calls.append((date, market))
+        return {'date': date, 'market': market}
+    return fetch, calls
+
+
+def test_cached_crawl_caches_by_bound_arguments(isolated_crawler_cache):
+    fetch, calls = make_counted()
+    assert fetch('20240502') == fetch(date='20240502', market='ALL') == {'date': '20240502', 'market': 'ALL'}
+    fetch('20240502', 'KOSPI')
+    assert len(calls) == 2
+    assert fetch.invalidate('20240502') == 1
+    fetch('20240502')
+    assert len(calls) == 3
+    assert fetch.uncached('20240502') == {'date': '20240502', 'market': 'ALL'} and len(calls) == 4
+
+
+def test_cached_crawl_skips_values_rejected_by_should_cache(isolated_crawler_cache):
+    results = [{}, {}, {'a': 1}]
+    calls = []
+    @cached_crawl('flaky', should_cache=is_non_empty)
+    def fetch(date):
+        calls.append(date)
+        return results[len(calls) - 1]
+    assert [fetch('20240502') for _ in range(4)] == [{}, {}, {'a': 1}, {'a': 1}]
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize('value', ['0', 'false', 'OFF', ' no '])
+def test_env_switch_disables_cache(monkeypatch, isolated_crawler_cache, value):
+    monkeypatch.setenv(crawler_cache.ENABLED_ENV, value)
+    assert not crawler_cache.crawler_cache_enabled()
+    assert crawler_cache.get_crawler_cache() is None
+    fetch, calls = make_counted()
+    fetch('20240502')
+    fetch('20240502')
+    assert len(calls) == 2 and fetch.invalidate('20240502') == 0
+    assert isolated_crawler_cache.stats() == {}
+
+
+@pytest.mark.parametrize('value', ['1', 'true', 'yes', ''])
+def test_env_switch_keeps_cache_enabled(monkeypatch, isolated_crawler_cache, value):
+    monkeypatch.setenv(crawler_cache.ENABLED_ENV, value)
+    assert crawler_cache.get_crawler_cache() is isolated_crawler_cache
+    fetch, calls = make_counted()
+    fetch('20240502')
+    fetch('20240502')
+    assert len(calls) == 1
+
+
+def test_set_crawler_cache_none_disables_cache(monkeypatch):
+    monkeypatch.setattr(crawler_cache, '_crawler_cache', None)
+    fetch, calls = make_counted()
+    fetch('20240502')
+    fetch('20240502')
+    assert len(calls) == 2
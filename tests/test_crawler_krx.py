@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mydatahandler.handler.functions import crawler_krx
+from mydatahandler.handler.functions.crawler_krx import parse_krx_daily, KRX_COLUMNS
+from krx_raw import holiday_raw, make_raw, raw_row
+
+DATE = pd.Timestamp('2024-05-02')
+
+
+def test_parse_converts_numbers_and_strings():
+    df = parse_krx_daily(make_raw(raw_row('005930'), raw_row('000660', sector='관리종목(소속부없음)')), DATE)
+    assert list(df.columns) == ['일자'] + KRX_COLUMNS + ['기준가']
+    row = df.iloc[0]
+    assert row['일자'] == DATE and row['종목코드'] == '005930'
+    assert df['일자'].dtype == 'datetime64[ns]'
+    assert parse_krx_daily(make_raw(raw_row('005930')), pd.Timestamp('20240502'))['일자'].dtype == 'datetime64[ns]'
+    assert row['종가'] == 78000 and row['전일대비'] == -500 and row['기준가'] == 78500
+    assert np.isclose(row['변동률'], -0.0064)
+    assert df['상장주식수'].dtype == np.int64
+    assert df['관리구분'].tolist() == ['', '관리종목(소속부없음)']
+
+
+def test_parse_keeps_missing_management_code_as_nan():
+    df = parse_krx_daily(make_raw(raw_row('005930', sector=np.nan), raw_row('000660', sector='관리종목')), DATE)
+    assert pd.isna(df['관리구분'].iloc[0])
+    assert df['관리구분'].iloc[1] == '관리종목'
+
+
+def test_parse_fills_missing_numbers_with_sentinels():
+    halted = raw_row('000020', TDD_OPNPRC='-', TDD_HGPRC='', ACC_TRDVAL=np.nan, change='-', rate='-')
+    df = parse_krx_daily(make_raw(raw_row('005930'), halted), DATE)
+    row = df.iloc[1]
+    assert (row['시가'], row['고가'], row['거래대금']) == (-1, -1, -1)
+    assert (row['전일대비'], row['변동률']) == (0, 0)
+
+
+def test_parse_returns_empty_frame_on_holiday():
+    df = parse_krx_daily(holiday_raw(), DATE)
+    assert df.empty and list(df.columns) == ['일자'] + KRX_COLUMNS
+
+
+def test_daily_fetch_caches_past_dates(fake_krx, isolated_crawler_cache):
+    fake_krx.payloads['20240502'] = make_raw(raw_row('005930'))
+    first = crawler_krx.fetch_daily_usable_stock_prices_from_krx(pd.Timestamp('2024-05-02'))
+    second = crawler_krx.fetch_daily_usable_stock_prices_from_krx('2024-05-02', 'ALL')
+    pd.testing.assert_frame_equal(first, second)
+    assert fake_krx.calls == [('20240502', 'ALL')]
+    crawler_krx.fetch_daily_usable_stock_prices_from_krx('2024-05-02', 'KOSPI')
+    assert fake_krx.calls[-1] == ('20240502', 'STK')
+
+
+def test_daily_fetch_does_not_cache_empty_results(fake_krx, isolated_crawler_cache):
+    fake_krx.payloads['20240502'] = [holiday_raw(), holiday_raw(), make_raw(raw_row('005930'))]
+    results = [crawler_krx.fetch_daily_usable_stock_prices_from_krx('2024-05-02') for _ in range(4)]
+    assert [len(df) for df in results] == [0, 0, 1, 1]
+    assert len(fake_krx.calls) == 3
+    assert isolated_crawler_cache.stats('krx_daily')['writes'] == 1
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(crawler_krx.time, 'sleep', lambda seconds: None)
+
+
+def xkrx_calendar(*closures):
+    from mydatahandler.handler.functions.trading_calendar import TradingCalendar
+    sessions = [date for date in pd.bdate_range('2024-09-01', '2024-09-30') if date not in pd.to_datetime(list(closures))]
+    return TradingCalendar(sessions, start='2024-09-01', end='2024-09-30', source='xkrx')
+
+
+def weekday_calendar():
+    from mydatahandler.handler.functions.trading_calendar import TradingCalendar
+    return TradingCalendar(source='weekday')
+
+
+CHUSEOK = ['2024-09-16', '2024-09-17', '2024-09-18']
+
+
+def test_recent_fetch_falls_back_to_previous_session(fake_krx, no_sleep):
+    fake_krx.payloads['20240913'] = make_raw(raw_row('005930'))
+    df = crawler_krx.fetch_recent_usable_stock_prices_from_krx(calendar=xkrx_calendar(*CHUSEOK), today='2024-09-19')
+    assert df['일자'].iloc[0] == pd.Timestamp('2024-09-13')
+    assert [date for date, _ in fake_krx.calls] == ['20240919', '20240913']
+
+
+def test_recent_fetch_raises_when_confirmed_sessions_are_empty(fake_krx, no_sleep):
+    with pytest.raises(ValueError):
+        crawler_krx.fetch_recent_usable_stock_prices_from_krx(calendar=xkrx_calendar(), today='2024-09-19')
+    assert [date for date, _ in fake_krx.calls] == ['20240919', '20240918']
+
+
+def test_recent_fetch_walks_back_over_unlisted_holidays(fake_krx, no_sleep):
+    # 평일 기준 달력에는 추석 연휴가 없으므로, 데이터가 있는 거래일까지 거슬러 올라간다.
+    fake_krx.payloads['20240913'] = make_raw(raw_row('005930'))
+    df = crawler_krx.fetch_recent_usable_stock_prices_from_krx(calendar=weekday_calendar(), today='2024-09-18')
+    assert df['일자'].iloc[0] == pd.Timestamp('2024-09-13')
+    assert [date for date, _ in fake_krx.calls] == ['20240918', '20240917', '20240916', '20240913']
+
+
+def test_recent_fetch_gives_up_after_max_sessions(fake_krx, no_sleep):
+    with pytest.raises(ValueError):
+        crawler_krx.fetch_recent_usable_stock_prices_from_krx(calendar=weekday_calendar(), today='2024-09-18')
+    assert len(fake_krx.calls) == crawler_krx.MAX_UNCONFIRMED_SESSIONS
+    fake_krx.calls.clear()
+    with pytest.raises(ValueError):
+        crawler_krx.fetch_recent_usable_stock_prices_from_krx(calendar=weekday_calendar(), today='2024-09-18', max_sessions=3)
+    assert len(fake_krx.calls) == 3
+
+
+def test_singleday_handler_keeps_data_when_krx_is_empty(fake_krx, no_sleep, monkeypatch):
+    from mydatahandler.handler import singleday_data_handler
+    from mydatahandler.handler.singleday_data_handler import SingledayDataHandler
+    monkeypatch.setattr(singleday_data_handler, 'fetch_recent_usable_stock_prices_from_krx',
+                        lambda: crawler_krx.fetch_recent_usable_stock_prices_from_krx(calendar=weekday_calendar(), today='2024-09-18'))
+    sdh = SingledayDataHandler()
+    sdh.df = parse_krx_daily(make_raw(raw_row('005930')), DATE)
+    with pytest.raises(ValueError):
+        sdh.load_renect_data_from_krx()
+    assert sdh.df.index.tolist() == ['005930']
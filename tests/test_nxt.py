@@ -0,0 +1,167 @@
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pandas as pd
+import pytest
+
+from mydatahandler.utility.crawler import nxt
+
+
+def _rows(n_records):
+    return [
+        {'isuSrdCd': f"A{i:06d}", 'isuCd': f"KR7{i:06d}003", 'isuAbwdNm': f"종목{i}", 'mktNm': 'KOSPI',
+         'curPrc': 1000 + i, 'contrastPrc': i % 7 - 3, 'upDownRate': 0.5, 'oppr': 1000, 'hgpr': 1100 + i,
+         'lwpr': 900, 'accTdQty': i * 10, 'accTrval': i * 10000, 'mktId': 'STK'}
+        for i in range(n_records)
+    ]
+
+
+class StubServer:
+    """
+    jqGrid 형식으로 응답하는 로컬 서버. pageUnit은 max_page_unit까지만 허용한다.
+    with_records=False이면 records 없이 total(페이지 수)만 준다.
+    """
+    def __init__(self, n_records, max_page_unit, delay=0.0, with_records=True):
+        rows = _rows(n_records)
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                form = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode())
+                unit = min(int(form['pageUnit'][0]), max_page_unit)
+                page = int(form['pageIndex'][0])
+                with lock:
+                    stub.requests.append((page, unit, form['scAggDd'][0]))
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                time.sleep(delay)
+                data = {'rows': rows[(page - 1) * unit: page * unit], 'total': math.ceil(n_records / unit), 'page': page}
+                if with_records:
+                    data['records'] = n_records
+                body = json.dumps(data).encode()
+                with lock:
+                    stub.active -= 1
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/brdinfoTime/brdinfoTimeListAll.do"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    servers = []
+    def start(*args, **kwargs):
+        server = StubServer(*args, **kwargs)
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.close()
+
+
+def _expected_symbols(n_records):
+    return [f"{i:06d}" for i in range(n_records)]
+
+
+@pytest.mark.parametrize('n_records, max_page_unit, page_unit, n_pages', [
+    (950, 100, 1000, 10),   # 서버가 페이지 크기를 100으로 제한
+    (950, 5000, 1000, 1),   # 큰 pageUnit 한 번으로 모두 받음
+    (40, 20, 20, 2),
+    (1000, 100, 1000, 10),  # 마지막 페이지가 꽉 찬 경우
+])
+def test_pages_are_merged_in_order(stub_server, n_records, max_page_unit, page_unit, n_pages):
+    server = stub_server(n_records, max_page_unit)
+    df = nxt.fetch_daily_stock_prices_from_nxt('20250502', page_unit=page_unit, max_workers=4, url=server.url)
+
+    assert sorted(page for page, _, _ in server.requests) == list(range(1, n_pages + 1))
+    assert {date for _, _, date in server.requests} == {'20250502'}
+    assert list(df.columns) == ['일자'] + list(nxt.COLUMNS_MAPPING.values())
+    assert df['종목코드'].tolist() == _expected_symbols(n_records)
+    assert df['종가'].tolist() == [1000 + i for i in range(n_records)]
+    assert (df['일자'] == pd.Timestamp('2025-05-02')).all()
+    assert df.index.tolist() == list(range(n_records))
+
+
+def test_total_pages_without_records(stub_server):
+    server = stub_server(45, 20, with_records=False)
+    df = nxt.fetch_daily_stock_prices_from_nxt('20250502', page_unit=20, url=server.url)
+    assert sorted(page for page, _, _ in server.requests) == [1, 2, 3]
+    assert df['종목코드'].tolist() == _expected_symbols(45)
+
+
+def test_empty_result(stub_server):
+    server = stub_server(0, 100)
+    df = nxt.fetch_daily_stock_prices_from_nxt('20250502', url=server.url)
+    assert df.empty
+    assert list(df.columns) == ['일자'] + list(nxt.COLUMNS_MAPPING.values())
+    assert len(server.requests) == 1
+
+
+def test_remaining_pages_are_fetched_concurrently(stub_server):
+    server = stub_server(800, 100, delay=0.05)
+    df = nxt.fetch_daily_stock_prices_from_nxt('20250502', max_workers=4, url=server.url)
+    assert len(df) == 800
+    assert server.max_active > 1
+
+
+def test_positional_call(stub_server, isolated_crawler_cache):
+    server = stub_server(30, 10)
+    df = nxt.fetch_daily_stock_prices_from_nxt('20250502', 10, 2, server.url)
+    assert df['종목코드'].tolist() == _expected_symbols(30)
+    assert sorted(page for page, _, _ in server.requests) == [1, 2, 3]
+
+
+def test_non_default_url_is_not_cached(stub_server, isolated_crawler_cache):
+    server = stub_server(30, 100)
+    nxt.fetch_daily_stock_prices_from_nxt('20250502', url=server.url)
+    nxt.fetch_daily_stock_prices_from_nxt('20250502', url=server.url)
+    assert len(server.requests) == 2
+    assert isolated_crawler_cache.stats('nxt_daily')['writes'] == 0
+    assert not (isolated_crawler_cache.path / 'nxt_daily').exists()
+
+
+def test_default_url_past_date_is_cached(monkeypatch, isolated_crawler_cache):
+    calls = []
+    def fake_rows(date, page_unit, max_workers, url, session):
+        calls.append((date, url, session))
+        return _rows(3)
+    monkeypatch.setattr(nxt, 'fetch_nxt_rows', fake_rows)
+    first = nxt.fetch_daily_stock_prices_from_nxt('20250502')
+    second = nxt.fetch_daily_stock_prices_from_nxt(pd.Timestamp('2025-05-02'), nxt.PAGE_UNIT)
+    assert len(calls) == 1 and calls[0][1] == nxt.NXT_URL
+    pd.testing.assert_frame_equal(first, second)
+    assert isolated_crawler_cache.stats('nxt_daily') == {'hits': 1, 'misses': 1, 'writes': 1, 'expired': 0, 'evictions': 0}
+
+
+def test_empty_result_is_not_cached(monkeypatch, isolated_crawler_cache):
+    calls = []
+    def fake_rows(date, page_unit, max_workers, url, session):
+        calls.append(date)
+        return [] if len(calls) < 3 else _rows(3)
+    monkeypatch.setattr(nxt, 'fetch_nxt_rows', fake_rows)
+    assert nxt.fetch_daily_stock_prices_from_nxt('20240502').empty
+    assert nxt.fetch_daily_stock_prices_from_nxt('20240502').empty
+    assert len(nxt.fetch_daily_stock_prices_from_nxt('20240502')) == 3
+    assert len(nxt.fetch_daily_stock_prices_from_nxt('20240502')) == 3
+    assert len(calls) == 3
+    assert isolated_crawler_cache.stats('nxt_daily')['writes'] == 1
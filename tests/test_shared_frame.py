@@ -0,0 +1,153 @@
+import os
+import subprocess
+import sys
+import textwrap
+import uuid
+from multiprocessing import shared_memory
+
+import pytest
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='POSIX shared memory')
+
+COMMON = '''
+import multiprocessing as mp
+import os
+import sys
+import numpy as np
+import pandas as pd
+from mydatahandler import StockDataHandler
+
+def make(n_days, close):
+    dates = pd.bdate_range('2024-01-02', periods=n_days)
+    index = pd.MultiIndex.from_product([dates, ['000020', '005930']], names=['일자', '종목코드'])
+    return pd.DataFrame({'종가': np.full(len(index), close), '종목명': ['동화약품', '삼성전자'] * n_days}, index=index)
+
+def summary(dh):
+    return len(dh.date_list), int(dh.df['종가'].iloc[0]), dh.df['종목명'].iloc[-1]
+'''
+
+PUBLISH_ATTACH_REPUBLISH = COMMON + '''
+def reader(name, attached, republished, out):
+    dh = StockDataHandler.attach_shared(name)
+    out.put(summary(dh))
+    attached.set()
+    republished.wait(30)
+    out.put(dh.refresh_shared())
+    out.put(summary(dh))
+
+if __name__ == '__main__':
+    name = sys.argv[1]
+    publisher = StockDataHandler(make(3, 100))
+    assert publisher.publish_shared(name) == 1
+    local = StockDataHandler.attach_shared(name)  # publisher와 같은 프로세스에서 붙기
+    assert summary(local) == (3, 100, '삼성전자')
+
+    ctx = mp.get_context('spawn')
+    attached, republished, out = ctx.Event(), ctx.Event(), ctx.Queue()
+    process = ctx.Process(target=reader, args=(name, attached, republished, out))
+    process.start()
+    assert out.get(timeout=60) == (3, 100, '삼성전자')
+    assert attached.wait(60)
+
+    publisher.set_data(make(4, 200))
+    assert publisher.publish_shared() == 2
+    republished.set()
+    assert out.get(timeout=60) is True
+    assert out.get(timeout=60) == (4, 200, '삼성전자')
+    process.join(60)
+    assert process.exitcode == 0
+
+    assert summary(local) == (3, 100, '삼성전자')  # 이전 버전을 계속 읽을 수 있다.
+    assert local.refresh_shared() and summary(local) == (4, 200, '삼성전자')
+    assert publisher.publish_shared() == 3
+    publisher.close_shared()
+    print('done')
+'''
+
+CRASH_AFTER_ATTACH = COMMON + '''
+if __name__ == '__main__':
+    name = sys.argv[1]
+    publisher = StockDataHandler(make(3, 100))
+    publisher.publish_shared(name)
+    local = StockDataHandler.attach_shared(name)
+    assert not local.refresh_shared()
+    print('published', flush=True)
+    os._exit(1)  # close_shared 없이 비정상 종료
+'''
+
+READ_AND_EXIT = COMMON + '''
+if __name__ == '__main__':
+    dh = StockDataHandler.attach_shared(sys.argv[1])
+    print(summary(dh))
+'''
+
+
+def run_script(tmp_path, source, name):
+    script = tmp_path / 'scenario.py'
+    script.write_text(textwrap.dedent(source), encoding='utf-8')
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    return subprocess.run([sys.executable, str(script), name], capture_output=True, text=True, env=env, timeout=180)
+
+
+def exists(name):
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    # 확인용으로 붙은 것이므로 이 프로세스의 resource_tracker가 지우지 않도록 한다.
+    from multiprocessing import resource_tracker
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    shm.close()
+    return True
+
+
+@pytest.fixture
+def shm_name():
+    name = f"mdh_test_{uuid.uuid4().hex[:8]}"
+    yield name
+    for block in [name] + [f"{name}_v{version}" for version in range(1, 4)]:
+        try:
+            shm = shared_memory.SharedMemory(name=block)
+        except FileNotFoundError:
+            continue
+        shm.close()
+        shm.unlink()
+
+
+def test_publish_attach_republish_and_refresh(tmp_path, shm_name):
+    result = run_script(tmp_path, PUBLISH_ATTACH_REPUBLISH, shm_name)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'done'
+    # publisher 프로세스에서 붙어도 resource_tracker의 KeyError, leak 경고가 없어야 한다.
+    assert 'Traceback' not in result.stderr and 'KeyError' not in result.stderr, result.stderr
+    assert 'leaked' not in result.stderr, result.stderr
+    assert not exists(shm_name) and not exists(f"{shm_name}_v3")
+
+
+def test_blocks_are_cleaned_up_when_publisher_crashes(tmp_path, shm_name):
+    result = run_script(tmp_path, CRASH_AFTER_ATTACH, shm_name)
+    assert result.stdout.strip() == 'published', result.stderr
+    # 같은 프로세스에서 붙었어도 블록은 계속 추적되므로, resource_tracker가 정리한다.
+    assert not exists(shm_name) and not exists(f"{shm_name}_v1")
+
+
+def test_independent_reader_does_not_unlink_blocks(tmp_path, shm_name):
+    import numpy as np
+    import pandas as pd
+    from mydatahandler import StockDataHandler
+    dates = pd.bdate_range('2024-01-02', periods=3)
+    index = pd.MultiIndex.from_product([dates, ['000020', '005930']], names=['일자', '종목코드'])
+    publisher = StockDataHandler(pd.DataFrame({'종가': np.full(len(index), 100), '종목명': ['동화약품', '삼성전자'] * 3}, index=index))
+    publisher.publish_shared(shm_name)
+    try:
+        # 별도로 실행한 프로세스(자신의 resource_tracker)가 붙었다가 종료되어도 블록은 남아 있어야 한다.
+        result = run_script(tmp_path, READ_AND_EXIT, shm_name)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "(3, 100, '삼성전자')"
+        assert 'leaked' not in result.stderr and 'Traceback' not in result.stderr, result.stderr
+        dh = StockDataHandler.attach_shared(shm_name)
+        assert len(dh.date_list) == 3
+        publisher.publish_shared()
+        assert dh.refresh_shared()
+    finally:
+        publisher.close_shared()
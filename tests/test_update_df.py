@@ -0,0 +1,122 @@
+import gc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mydatahandler import StockDataHandler
+from mydatahandler.handler.functions import update_df_positional
+
+
+def make_history(n_days, symbols=('000020', '000040', '005930')):
+    dates = pd.bdate_range('2024-01-02', periods=n_days)
+    index = pd.MultiIndex.from_product([dates, list(symbols)], names=['일자', '종목코드'])
+    close = np.arange(len(index), dtype=np.int64) + 1000
+    return pd.DataFrame({'종가': close, '거래량': close * 10, '변동률': np.zeros(len(index))}, index=index)
+
+
+def intraday(dh, add=7):
+    return dh.df_today[['종가', '거래량']] + add
+
+
+def close_buffer(dh):
+    return dh.df['종가'].to_numpy()
+
+
+@pytest.fixture
+def dh():
+    return StockDataHandler(make_history(30))
+
+
+def test_update_copies_updated_columns_by_default(dh):
+    expected = update_df_positional(dh.df, intraday(dh))
+    buffer = close_buffer(dh)
+    volume = dh.df['변동률'].to_numpy()
+    version = dh.cache_info()['version']
+    dh.update_df_with_another_df(intraday(dh))
+    assert not np.shares_memory(close_buffer(dh), buffer)
+    assert np.shares_memory(dh.df['변동률'].to_numpy(), volume)  # 갱신하지 않은 칼럼은 공유
+    pd.testing.assert_frame_equal(dh.df, expected)
+    assert dh.cache_info()['version'] > version
+    assert (dh.tdf['종가'] == expected.xs(dh.last_date)['종가']).all()
+
+
+def test_update_keeps_held_snapshot_unchanged(dh):
+    snap = dh.snapshot()
+    before = snap.df.copy()
+    dh.update_df_with_another_df(intraday(dh))
+    pd.testing.assert_frame_equal(snap.df, before)
+    assert (dh.tdf['종가'] == snap.tdf['종가'] + 7).all()
+
+
+def test_update_keeps_frames_from_dropped_snapshot_unchanged(dh):
+    # 스냅샷 핸들은 버리고, 스냅샷에서 받은 DataFrame만 계속 사용하는 경우
+    tdf = dh.snapshot().tdf
+    df = dh.snapshot().df
+    tdf_before, df_before = tdf.copy(), df.copy()
+    gc.collect()
+    dh.update_df_with_another_df(intraday(dh))
+    dh.update_df_with_another_df(intraday(dh, add=1))
+    pd.testing.assert_frame_equal(tdf, tdf_before)
+    pd.testing.assert_frame_equal(df, df_before)
+
+
+def test_update_keeps_previously_returned_frames_unchanged(dh):
+    df, tdf = dh.df, dh.tdf
+    df_before, tdf_before = df.copy(), tdf.copy()
+    dh.update_df_with_another_df(intraday(dh))
+    pd.testing.assert_frame_equal(df, df_before)
+    pd.testing.assert_frame_equal(tdf, tdf_before)
+    assert (dh.tdf['종가'] == tdf_before['종가'] + 7).all()
+
+
+def test_update_inplace_writes_into_existing_arrays(dh):
+    expected = update_df_positional(dh.df, intraday(dh))
+    buffer = close_buffer(dh)
+    version = dh.cache_info()['version']
+    dh.update_df_with_another_df(intraday(dh), inplace=True)
+    assert np.shares_memory(close_buffer(dh), buffer)
+    pd.testing.assert_frame_equal(dh.df, expected)
+    assert dh.cache_info()['version'] > version
+    assert (dh.tdf['종가'] == expected.xs(dh.last_date)['종가']).all()
+    assert dh.snapshot().df['종가'].equals(expected['종가'])
+
+
+@pytest.mark.parametrize('inplace', [False, True])
+def test_update_widens_column_dtype(dh, inplace):
+    update = intraday(dh)[['종가']].astype(float)
+    update.iloc[0, 0] = np.nan
+    dh.update_df_with_another_df(update, inplace=inplace)
+    assert dh.df['종가'].dtype == np.float64
+    assert np.isnan(dh.tdf['종가'].iloc[0])
+
+
+def test_update_without_save_leaves_handler_unchanged(dh):
+    before = dh.df.copy()
+    result = dh.update_df_with_another_df(intraday(dh), save=False)
+    pd.testing.assert_frame_equal(dh.df, before)
+    assert (result.xs(dh.last_date)['종가'] == before.xs(dh.last_date)['종가'] + 7).all()
+
+
+def test_panel_engine_update_keeps_snapshot_unchanged():
+    dh = StockDataHandler(make_history(30), engine='panel')
+    snap = dh.snapshot()
+    before = snap.tdf.copy()
+    dh.update_df_with_another_df(intraday(dh), inplace=True)  # panel에서는 무시된다.
+    pd.testing.assert_frame_equal(snap.tdf, before)
+    assert (dh.tdf['종가'] == before['종가'] + 7).all()
+
+
+@pytest.mark.parametrize('n_days', [5, 127, 128, 300])
+def test_date_row_slice_matches_mask(n_days):
+    from mydatahandler.handler.functions import date_row_slice
+    index = make_history(n_days).index
+    dates = index.levels[0]
+    values = index.get_level_values('일자')
+    for from_date, to_date in [(dates[0], dates[-1]), (dates[n_days // 2], dates[-1]), (dates[-1], dates[-1]),
+                               (dates[0] - pd.Timedelta(days=3), dates[0]), (dates[-1] + pd.Timedelta(days=1), None)]:
+        rows = date_row_slice(index, from_date, to_date)
+        mask = values >= from_date
+        if to_date is not None:
+            mask &= values <= to_date
+        assert list(np.flatnonzero(mask)) == list(range(len(index))[rows])